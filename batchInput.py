@@ -0,0 +1,237 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# Batch mode for the Cassandra Input File Editor: writes one Cassandra input file for each of the
+# parameter sets in the given files, without a display.
+#
+# Usage:
+#       python batchInput.py [--output-dir DIRECTORY] [--processes N] file [file ...]
+#
+# Each file holds parameter sets keyed by the dictionary keywords of the editor (e.g. "ensemble",
+# "numSpecies", "temperature", "MCF s1", "prob vol"):
+#   - .json: a list of objects (or a single object)
+#   - .csv: a header line of keywords, then one parameter set per line; empty cells are left out
+#   - .yaml / .yml: a list of mappings (or a single mapping); requires PyYAML
+#
+# Each parameter set is applied to the editor's form (test.py, with the headless backend) as if it
+# had been entered by hand: the values of the master widgets (e.g. the ensemble) show and hide the
+# other widgets, and the values of hidden widgets are discarded, as the editor does.  A parameter set
+# is rejected if it has a keyword the editor does not know, a value that is not one of the choices of
+# its widget, or a value of the wrong type.
+#
+# The input file of a parameter set is named after its "runName" (or after its file and its position in
+# the file, if it has none).  The parameter sets are processed by a pool of processes, each of which
+# imports the form once and then reuses it for all of the parameter sets it is given.
+
+import os, sys, csv, json, multiprocessing
+
+# the directory holding test.py
+thisDirectory = os.path.dirname(os.path.abspath(__file__))
+
+# parse the command line arguments; there are few enough that we do it by hand
+usage = "usage: python batchInput.py [--output-dir DIRECTORY] [--processes N] file [file ...]"
+
+def parseArguments(argv):
+    options = {"output-dir": os.getcwd(), "processes": multiprocessing.cpu_count(), "files": []}
+    index = 0
+    while index < len(argv):
+        argument = argv[index]
+        if argument in ("--output-dir", "--processes"):
+            if (index + 1 >= len(argv)):
+                raise ValueError("%s requires a value" %(argument))
+            options[argument[2:]] = argv[index+1]
+            index += 2
+        elif argument in ("-h", "--help"):
+            print usage
+            sys.exit(0)
+        elif argument.startswith("-"):
+            raise ValueError("unrecognized argument: %s" %(argument))
+        else:
+            options["files"].append(argument)
+            index += 1
+    if not options["files"]:
+        raise ValueError(usage)
+    options["processes"] = int(options["processes"])
+    return options
+
+#********************************************************************************
+# reading the parameter sets
+#********************************************************************************
+
+# the text of a value read from a file, as it would have been typed into the editor
+def asText(value):
+    if isinstance(value, bool):
+        return str(value).upper()
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    return str(value)
+
+def readJSON(f):
+    data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+def readCSV(f):
+    return [dict([(key, value) for key, value in row.iteritems() if value]) for row in csv.DictReader(f)]
+
+def readYAML(f):
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("reading YAML parameter sets requires PyYAML (pip install pyyaml)")
+    data = yaml.safe_load(f)
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+readers = {".json": readJSON, ".csv": readCSV, ".yaml": readYAML, ".yml": readYAML}
+
+# the parameter sets in the file 'path': a list of dictionaries of keyword -> text
+def readParameterSets(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in readers:
+        raise ValueError("%s: unknown file type; expected one of %s" %(path, ", ".join(sorted(readers.keys()))))
+    f = open(path, "rb")
+    try:
+        data = readers[extension](f)
+    finally:
+        f.close()
+    parameterSets = []
+    for number, parameters in enumerate(data):
+        if not isinstance(parameters, dict):
+            raise ValueError("%s: parameter set %d is not a mapping of keywords to values" %(path, number + 1))
+        parameterSets.append(dict([(asText(key), asText(value)) for key, value in parameters.iteritems() \
+                if value is not None]))
+    return parameterSets
+
+#********************************************************************************
+# applying a parameter set to the form
+#********************************************************************************
+
+# apply 'parameters' to the form of the module 'editor' (test.py), which is reset first.
+# returns (the keywords discarded because their widgets are hidden, a list of error messages)
+def applyParameterSet(editor,parameters):
+    Widget = editor.Widget
+    myDict = editor.myDict
+    schema = myDict.schema()
+
+    if not Widget._graphCompiled:
+        editor.compileDependencyGraph()
+
+    # start from an empty form
+    myDict.clear()
+    for widget in Widget._register:
+        widget.resetVisibility()
+
+    errors = []
+    values = {}
+    for key, value in parameters.iteritems():
+        widgets = Widget._register.find("_dictKwarg", key)
+        if (not widgets and schema.lookup(key).section is None):
+            errors.append("%s: unknown keyword" %(key))
+            continue
+        for widget in widgets:
+            if (widget._widgetType == "choice" and value not in widget._choices):
+                errors.append("%s: '%s' is not one of %s" %(key, value, ", ".join(widget._choices[1:])))
+        values[key] = value
+
+    # store the values, as restoring a session does: the masters then tell their slaves whether to show
+    # with their own values, masters first, rather than resetting the widgets below them; a master hidden
+    # by then tells its slaves to hide, as it could not have been selected
+    editor.bulkAssign(values)
+
+    # the values of the widgets that are hidden are discarded
+    dropped = []
+    for key in values:
+        widgets = Widget._register.find("_dictKwarg", key)
+        if (widgets and all([widget.isHidden() for widget in widgets])):
+            if key in myDict:
+                del myDict[key]
+            dropped.append(key)
+
+    for key, message in sorted(myDict.errors().items()):
+        errors.append(message)
+    return dropped, errors
+
+#********************************************************************************
+# the worker processes
+#********************************************************************************
+
+# the form, imported once in each worker process
+editor = None
+
+def initializeWorker():
+    global editor
+    os.environ["CASSANDRA_GUI_BACKEND"] = "headless"
+    os.environ["CASSANDRA_GUI_QUIET"] = "1"
+    if thisDirectory not in sys.path:
+        sys.path.insert(0, thisDirectory)
+    import test
+    editor = test
+
+# write the input file of a single parameter set; 'task' is (name, parameters, output directory)
+def generate(task):
+    name, parameters, outputDirectory = task
+    if editor is None:
+        initializeWorker()
+    dropped, errors = applyParameterSet(editor, parameters)
+    if not errors:
+        errors = editor.inputFileGenerator.errors()
+    result = {"name": name, "dropped": dropped, "errors": errors, "path": None}
+    if not errors:
+        fileName = (editor.myDict.text("runName") or name) + ".inp"
+        result["path"] = os.path.join(outputDirectory, fileName)
+        editor.inputFileGenerator.write(result["path"])
+    return result
+
+if __name__ == "__main__":
+    options = parseArguments(sys.argv[1:])
+    outputDirectory = os.path.abspath(options["output-dir"])
+    if not os.path.isdir(outputDirectory):
+        os.makedirs(outputDirectory)
+
+    tasks = []
+    for path in options["files"]:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for number, parameters in enumerate(readParameterSets(path)):
+            tasks.append(("%s-%d" %(stem, number + 1), parameters, outputDirectory))
+
+    # hand the parameter sets to the workers in chunks, to keep the cost of communicating with them low
+    processes = max(1, min(options["processes"], len(tasks)))
+    chunkSize = max(1, len(tasks) // (4 * processes))
+    if (processes == 1):
+        results = map(generate, tasks)
+    else:
+        pool = multiprocessing.Pool(processes, initializeWorker)
+        try:
+            results = pool.map(generate, tasks, chunkSize)
+        finally:
+            pool.close()
+            pool.join()
+
+    failed = 0
+    for result in results:
+        for key in result["dropped"]:
+            print "%s: '%s' ignored; its widget is hidden by the other values" %(result["name"], key)
+        for error in result["errors"]:
+            print "%s: %s" %(result["name"], error)
+        if result["errors"]:
+            failed += 1
+    print "Wrote %d input file(s) to %s; %d parameter set(s) rejected" %(len(results) - failed, \
+            outputDirectory, failed)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,315 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# Performance benchmarks for the Cassandra Input File Editor (test.py).
+#
+# Usage:
+#       python benchmark.py [--backend wx|headless] [--output results.json] [--repeat N]
+#
+# With the (default) wx backend, the editor is run under a virtual X display: if no
+# DISPLAY is set, an Xvfb server is started for the duration of the benchmark.
+# With the headless backend (see headless.py), no display is needed at all.
+#
+# The following are measured, and written as JSON to stdout (or to --output):
+#   - modelConstruction: the time taken to construct a Widget, and the memory it occupies
+#   - initObj: the time taken by MainFrame.initObj()
+#   - buildAllPages: the time taken to construct all of the (lazily constructed) notebook pages
+#   - selectionChanges: the time taken by each ensembleWidget/numberOfSpeciesWidget selection change,
+#     for all 7x7 combinations of their choices, with the number of widgets each combination showed or
+#     hid and the number of widgets then visible
+#   - amberCharmm: the time taken by amberCharmmFunction to fill in the scale factors
+#   - keystrokes: the time taken by each keystroke in temperatureWidget (i.e., the dispatch of an EVT_TEXT
+#     event to its function), and the number of bindings made by the EventDispatchers of the panels
+#   - hMatrixOpen / hMatrixClose: the time taken to open (hMatrixFunction) and close the H-matrix frame
+#   - peakRSSKilobytes: the peak resident set size of the process
+#
+# Anything the editor prints to stdout while being benchmarked is discarded.
+
+import os, sys, time, json, hashlib, resource, subprocess, platform
+
+# the directory holding test.py
+thisDirectory = os.path.dirname(os.path.abspath(__file__))
+
+# parse the command line arguments; there are few enough that we do it by hand
+def parseArguments(argv):
+    options = {"backend": "wx", "output": None, "repeat": 1}
+    index = 0
+    while index < len(argv):
+        argument = argv[index]
+        if argument in ("--backend", "--output", "--repeat"):
+            if (index + 1 >= len(argv)):
+                raise ValueError("%s requires a value" %(argument))
+            options[argument[2:]] = argv[index+1]
+            index += 2
+        elif argument in ("-h", "--help"):
+            print "usage: python benchmark.py [--backend wx|headless] [--output results.json] [--repeat N]"
+            sys.exit(0)
+        else:
+            raise ValueError("unrecognized argument: %s" %(argument))
+    if options["backend"] not in ("wx", "headless"):
+        raise ValueError("the backend must be either 'wx' or 'headless'")
+    options["repeat"] = int(options["repeat"])
+    return options
+
+# start an Xvfb server on the first free display number; returns the process
+def startXvfb():
+    for displayNumber in range(99, 199):
+        if os.path.exists("/tmp/.X%d-lock" %displayNumber):
+            continue
+        devnull = open(os.devnull, "w")
+        process = subprocess.Popen(["Xvfb", ":%d" %displayNumber, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"], \
+                stdout = devnull, stderr = devnull)
+        # wait for the server to come up
+        for attempt in range(50):
+            if os.path.exists("/tmp/.X11-unix/X%d" %displayNumber):
+                os.environ["DISPLAY"] = ":%d" %displayNumber
+                return process
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        process.terminate()
+    raise RuntimeError("could not start Xvfb; is it installed?")
+
+# summary statistics (in seconds) of a list of timings
+def summarize(timings):
+    return {"count": len(timings), "total": sum(timings), "min": min(timings), \
+            "max": max(timings), "mean": sum(timings)/len(timings)}
+
+# the attributes of an object, whether they are stored in its __dict__ or in __slots__
+def attributesOf(obj):
+    if hasattr(obj, "__dict__"):
+        return vars(obj).values()
+    values = []
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name) and name != "__weakref__":
+                values.append(getattr(obj, name))
+    return values
+
+# the cost of constructing the model (the Widget descriptors, before any wx object exists):
+# the time taken to construct a Widget, and the number of bytes each Widget occupies, counting
+# the instance, its __dict__ (if any), and the containers it does not share with other Widgets
+def measureModel(editor,count):
+    frame = editor.Frame(None, "benchmark", (100,100))
+    panel = editor.Panel(frame)
+
+    start = time.time()
+    widgets = [editor.Widget(panel, widgetType = "text", name = "", pos = (index,1)) for index in range(count)]
+    elapsed = time.time() - start
+
+    counted = set()
+    totalBytes = 0
+    for widget in widgets:
+        totalBytes += sys.getsizeof(widget)
+        if hasattr(widget, "__dict__"):
+            totalBytes += sys.getsizeof(widget.__dict__)
+        for value in attributesOf(widget):
+            if isinstance(value, (list, dict, set, frozenset)) and id(value) not in counted:
+                counted.add(id(value))
+                totalBytes += sys.getsizeof(value)
+
+    # remove the widgets again, so they do not take part in the other benchmarks
+    frame.dispose()
+    return {"count": count, "secondsPerWidget": elapsed/count, "bytesPerWidget": float(totalBytes)/count}
+
+# time a single call of function(*args)
+def timeCall(function,*args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+# the functions driving the GUI as a user would; wx and the headless backend differ here
+class Driver:
+    def __init__(self,wx,backend):
+        self._wx = wx
+        self._backend = backend
+
+    def _process(self,obj,eventType,**kwargs):
+        wx = self._wx
+        event = wx.CommandEvent(eventType, obj.GetId())
+        event.SetEventObject(obj)
+        if "string" in kwargs:
+            event.SetString(kwargs["string"])
+        if "int" in kwargs:
+            event.SetInt(kwargs["int"])
+        obj.GetEventHandler().ProcessEvent(event)
+
+    def choice(self,obj,string):
+        if (self._backend == "headless"):
+            self._wx.simulateChoice(obj, string)
+        else:
+            obj.SetStringSelection(string)
+            self._process(obj, self._wx.wxEVT_COMMAND_CHOICE_SELECTED, string = string, \
+                    int = obj.GetSelection())
+
+    def check(self,obj,state):
+        if (self._backend == "headless"):
+            self._wx.simulateCheck(obj, state)
+        else:
+            obj.SetValue(state)
+            self._process(obj, self._wx.wxEVT_COMMAND_CHECKBOX_CLICKED, int = int(state))
+
+    def text(self,obj,value):
+        if (self._backend == "headless"):
+            self._wx.simulateText(obj, value)
+        else:
+            # SetValue() generates the EVT_TEXT event itself
+            obj.SetValue(value)
+
+    def click(self,obj):
+        if (self._backend == "headless"):
+            self._wx.simulateClick(obj)
+        else:
+            self._process(obj, self._wx.wxEVT_COMMAND_BUTTON_CLICKED)
+
+    # let the GUI process whatever is pending (e.g., windows being destroyed)
+    def flush(self):
+        if (self._backend == "headless"):
+            self._wx.processPendingEvents()
+        else:
+            self._wx.GetApp().ProcessPendingEvents()
+            self._wx.SafeYield()
+
+def runBenchmarks(options):
+    results = {"backend": options["backend"], "python": platform.python_version(), \
+            "repeat": options["repeat"]}
+
+    # identify the version of the editor being benchmarked
+    for fileName in ("test.py", "GUI_Template.py"):
+        path = os.path.join(thisDirectory, fileName)
+        if os.path.exists(path):
+            results["sha1 " + fileName] = hashlib.sha1(open(path, "rb").read()).hexdigest()
+
+    if (options["backend"] == "headless"):
+        os.environ["CASSANDRA_GUI_BACKEND"] = "headless"
+    sys.path.insert(0, thisDirectory)
+
+    # the editor is constructed (but not instantiated) when it is imported
+    start = time.time()
+    import test as editor
+    results["import"] = time.time() - start
+    wx = editor.wx
+    results["wxVersion"] = getattr(wx, "VERSION_STRING", None)
+    results["numberOfWidgets"] = len(editor.Widget._register)
+    results["modelConstruction"] = measureModel(editor, 10000)
+
+    app = wx.App(False)
+    driver = Driver(wx, options["backend"])
+
+    results["initObj"] = timeCall(editor.MainFrame.initObj)
+
+    # construct every page, so that the selection changes below act on all of the widgets;
+    # constructing a page may create further (nested) notebooks, so repeat until none are left
+    def buildAllPages():
+        built = 0
+        while built < len(editor.Notebook._register):
+            notebook = editor.Notebook._register[built]
+            for index in range(len(notebook._children)):
+                notebook.buildPage(index)
+            built += 1
+    results["buildAllPages"] = timeCall(buildAllPages)
+    driver.flush()
+
+    ensembleObj = editor.ensembleWidget._obj
+    numberOfSpeciesObj = editor.numberOfSpeciesWidget._obj
+
+    # all 7x7 combinations of the ensemble and number of species choices
+    ensembleTimings = []
+    numberOfSpeciesTimings = []
+    combinations = []
+    for repeat in range(options["repeat"]):
+        for ensemble in editor.ensembleChoices:
+            for numberOfSpecies in editor.numberOfSpeciesChoices:
+                snapshot = editor.visibilitySnapshot()
+                ensembleTime = timeCall(driver.choice, ensembleObj, ensemble)
+                numberOfSpeciesTime = timeCall(driver.choice, numberOfSpeciesObj, numberOfSpecies)
+                ensembleTimings.append(ensembleTime)
+                numberOfSpeciesTimings.append(numberOfSpeciesTime)
+                combinations.append({"ensemble": ensemble, "numberOfSpecies": numberOfSpecies, \
+                        "ensembleChange": ensembleTime, "numberOfSpeciesChange": numberOfSpeciesTime, \
+                        "widgetsChanged": len(editor.changedSince(snapshot)), \
+                        "visibleWidgets": sum([panel.countVisible() for panel in editor.Panel._register])})
+    results["selectionChanges"] = {"ensembleWidget": summarize(ensembleTimings), \
+            "numberOfSpeciesWidget": summarize(numberOfSpeciesTimings), "combinations": combinations}
+
+    # fill in the scale factors for all species
+    driver.choice(numberOfSpeciesObj, editor.numberOfSpeciesChoices[-1])
+    amberTimings = []
+    for repeat in range(options["repeat"]):
+        amberTimings.append(timeCall(driver.check, editor.amberCheckbox._obj, True))
+        driver.check(editor.amberCheckbox._obj, False)
+    results["amberCharmm"] = summarize(amberTimings)
+
+    # type a temperature, one keystroke at a time
+    temperatureObj = editor.temperatureWidget._obj
+    keystrokeTimings = []
+    for repeat in range(options["repeat"]):
+        typed = ""
+        for character in "298.15":
+            typed += character
+            keystrokeTimings.append(timeCall(driver.text, temperatureObj, typed))
+    dispatchers = [panel._obj._dispatcher for panel in editor.Panel._register \
+            if getattr(panel._obj, "_dispatcher", None) is not None]
+    results["keystrokes"] = summarize(keystrokeTimings)
+    results["keystrokes"]["eventDispatch"] = editor.eventDispatch
+    results["keystrokes"]["panelBindings"] = sum([dispatcher.counts()[0] for dispatcher in dispatchers])
+    results["keystrokes"]["dispatchedControls"] = sum([dispatcher.counts()[1] for dispatcher in dispatchers])
+
+    # open and close the H-matrix frame
+    openTimings = []
+    closeTimings = []
+    for repeat in range(options["repeat"]):
+        openTimings.append(timeCall(driver.click, editor.box1HMatrix._obj))
+        hMatrixFrame = editor.Frame._register[-1]
+        doneButton = [widget for widget in hMatrixFrame._children[0]._children if widget._name == "Done"][0]
+        start = time.time()
+        driver.click(doneButton._obj)
+        driver.flush()
+        closeTimings.append(time.time() - start)
+    results["hMatrixOpen"] = summarize(openTimings)
+    results["hMatrixClose"] = summarize(closeTimings)
+
+    # the H-matrix frame is built once and then reused, so the registers should not grow with the repeats
+    results["registeredAfterHMatrix"] = {"Frame": len(editor.Frame._register), \
+            "Panel": len(editor.Panel._register), "Widget": len(editor.Widget._register)}
+
+    results["peakRSSKilobytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+if __name__ == "__main__":
+    options = parseArguments(sys.argv[1:])
+
+    xvfb = None
+    if (options["backend"] == "wx" and not os.environ.get("DISPLAY")):
+        xvfb = startXvfb()
+
+    # discard whatever the editor prints while it is being benchmarked
+    realStdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        results = runBenchmarks(options)
+    finally:
+        sys.stdout = realStdout
+        if xvfb is not None:
+            xvfb.terminate()
+
+    output = json.dumps(results, indent = 2, sort_keys = True)
+    if options["output"]:
+        f = open(options["output"], "w")
+        f.write(output + "\n")
+        f.close()
+    else:
+        print output
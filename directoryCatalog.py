@@ -0,0 +1,184 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# A catalog of the files in a simulation directory, indexed by the kind of file.
+#
+# The directory (and its subdirectories, down to maxDepth levels) is scanned once, when the catalog is
+# created (an OSError is raised if it cannot be read); scandir is used if it is available (os.scandir, or the scandir package), as it avoids a stat()
+# of every file.  refresh() then polls the modification time of each directory, and only scans the
+# directories that changed again, so keeping the catalog up to date costs one stat() per directory,
+# however many files there are.
+#
+# Both take an optional progress(fraction, message) callback (e.g. the progress() of a worker pool task),
+# called as the subdirectories of the root are scanned, and as the directories are polled.
+#
+# The kinds of files (see kindOf):
+#   "mcf"       - molecular connectivity files (*.mcf)
+#   "fragment"  - fragment libraries (*.dat), and MCFs in a directory whose name contains "frag"
+#   "xyz"       - configurations (*.xyz, *.H)
+#   "input"     - Cassandra input files (*.inp)
+#   "output"    - the output of previous simulations (*.out, *.log, *.prp)
+
+import os, stat, threading
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# the kind of file of each extension
+extensionKinds = {".mcf": "mcf", ".dat": "fragment", ".xyz": "xyz", ".h": "xyz", ".inp": "input", \
+        ".out": "output", ".log": "output", ".prp": "output"}
+
+# the kind of the file 'name' in the directory 'directory' (relative to the catalog), or None
+def kindOf(directory,name):
+    kind = extensionKinds.get(os.path.splitext(name)[1].lower())
+    if (kind == "mcf" and "frag" in directory.lower()):
+        return "fragment"
+    return kind
+
+# the files and subdirectories of the directory 'path': ([file names], [subdirectory names])
+def listDirectory(path):
+    files = []
+    directories = []
+    if scandir is not None:
+        for entry in scandir(path):
+            if entry.is_dir():
+                directories.append(entry.name)
+            else:
+                files.append(entry.name)
+    else:
+        for name in os.listdir(path):
+            try:
+                mode = os.stat(os.path.join(path, name)).st_mode
+            except OSError:
+                continue
+            if stat.S_ISDIR(mode):
+                directories.append(name)
+            else:
+                files.append(name)
+    return files, directories
+
+class DirectoryCatalog(object):
+    def __init__(self,root,maxDepth=3,progress=None):
+        self.root = os.path.abspath(root)
+        self.maxDepth = maxDepth
+
+        # directory (relative to the root; "" is the root) -> (modification time, {file name: kind},
+        # [subdirectory names])
+        self._directories = {}
+
+        # kind -> sorted list of paths relative to the root; rebuilt when a directory changed
+        self._index = None
+        self._lock = threading.Lock()
+
+        # held while the catalog is refreshed, so that only one thread scans its directories at a time
+        self._refreshing = threading.Lock()
+        self._scan("", 0, progress)
+
+    # scan the directory 'directory', and those of its subdirectories that are not known yet; 'progress'
+    # is called after each subdirectory
+    def _scan(self,directory,depth,progress=None):
+        path = os.path.join(self.root, directory)
+        try:
+            modified = os.stat(path).st_mtime
+            files, subdirectories = listDirectory(path)
+        except OSError:
+            # the root itself must be readable when the catalog is created
+            if (directory == "" and not self._directories):
+                raise
+            self._forget(directory)
+            return
+        kinds = {}
+        for name in files:
+            kind = kindOf(directory, name)
+            if kind is not None:
+                kinds[name] = kind
+        if (depth >= self.maxDepth):
+            subdirectories = []
+        old = self._directories.get(directory)
+        with self._lock:
+            self._directories[directory] = (modified, kinds, subdirectories)
+            self._index = None
+
+        # subdirectories that disappeared are forgotten; new ones are scanned
+        if old is not None:
+            for name in old[2]:
+                if name not in subdirectories:
+                    self._forget(os.path.join(directory, name))
+        for index, name in enumerate(subdirectories):
+            subdirectory = os.path.join(directory, name)
+            if subdirectory not in self._directories:
+                self._scan(subdirectory, depth + 1)
+            if progress is not None:
+                progress(float(index + 1) / len(subdirectories), "Scanning %s" %(self.root))
+
+    def _forget(self,directory):
+        with self._lock:
+            for known in list(self._directories.keys()):
+                if (known == directory or known.startswith(directory + os.sep)):
+                    del self._directories[known]
+            self._index = None
+
+    # scan again the directories that were modified since they were last scanned; returns True if any were.
+    # If another thread is refreshing the catalog already, returns False at once: that refresh finds the
+    # changes
+    def refresh(self,progress=None):
+        if not self._refreshing.acquire(False):
+            return False
+        try:
+            return self._refresh(progress)
+        finally:
+            self._refreshing.release()
+
+    def _refresh(self,progress):
+        changed = False
+        directories = sorted(self._directories.keys())
+        for index, directory in enumerate(directories):
+            if progress is not None:
+                progress(float(index) / len(directories), "Checking %s for new files" %(self.root))
+            entry = self._directories.get(directory)
+            if entry is None:
+                # forgotten while refreshing, along with its parent
+                continue
+            try:
+                modified = os.stat(os.path.join(self.root, directory)).st_mtime
+            except OSError:
+                modified = None
+            if (modified != entry[0]):
+                self._scan(directory, directory.count(os.sep) + (directory != ""))
+                changed = True
+        return changed
+
+    # the paths (relative to the root) of the files of kind 'kind', sorted
+    def files(self,kind):
+        with self._lock:
+            if self._index is None:
+                index = {}
+                for directory, (modified, kinds, subdirectories) in self._directories.iteritems():
+                    for name, fileKind in kinds.iteritems():
+                        index.setdefault(fileKind, []).append(os.path.join(directory, name))
+                for paths in index.values():
+                    paths.sort()
+                self._index = index
+            return list(self._index.get(kind, ()))
+
+    # the number of directories in the catalog
+    def __len__(self):
+        return len(self._directories)
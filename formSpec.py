@@ -0,0 +1,309 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# A declarative description of the pages of the form, compiled into a flat build plan.
+#
+# Pages whose rows repeat for every species and/or box are described here as data rather than
+# as a Widget(...) call, a setDictKwarg() and a setFunction() per row and per species.  Each page
+# of a spec is a dictionary:
+#       {"panel": name of the Panel, "widgets": [entries]}
+# and each entry describes a widget, or a widget per species and/or box:
+#       "id"        - the name of the widget in the plan, e.g. "s%(species)sb%(box)sTranslation"
+#       "type"      - the widgetType ("static", "text", "choice", ...)
+#       "name"      - the name of the widget (the text of a label)
+#       "pos"       - the position of the (first) widget
+#       "span"      - optional; the span of the widget
+#       "choices"   - for choice widgets
+#       "style"     - optional; the name of the wx style of the widget, e.g. "TE_READONLY"
+#       "key"       - optional; the dictionary keyword of the widget
+#       "function"  - optional; the name of the function the widget is bound to
+#       "repeat"    - optional; "species", "box" or "species box": one widget per species (box, or both)
+#       "column"    - optional, for entries repeated over the species; the label of their column in a
+#                     grid.  Entries without one are left out when the page uses a grid
+#       "action"    - optional, for buttons repeated over the species; the name of the function called
+#                     with (grid, species number) when their cell of a grid is double-clicked
+#       "header"    - optional; True for labels that are left out when the page uses a grid
+#       "step"      - optional; how far the position moves per species and per box:
+#                     {"species": (rows, columns), "box": (rows, columns)}; one row per species by default
+# "id", "name" and "key" may contain %(species)s, %(box)s and %(angstrom)s.
+#
+# compilePlan(spec, numberOfSpecies) expands the repetitions into a plan: a tuple with one tuple per
+# widget, (id, panel, widgetType, name, pos, kwargs, key, function), holding nothing but strings,
+# numbers and tuples; the form then builds its widgets from the plan (see buildFromPlan in test.py).
+# Each page may also name its grid, {"grid": name}; by default, the grid of a page is named after its panel.
+
+# the number of simulation boxes
+numberOfBoxes = 2
+
+# above this number of species, the rows repeated for every species are entered in a grid instead
+# (see compilePlan); a grid shows gridVisibleRows rows at once, and scrolls through the others
+gridThreshold = 6
+gridVisibleRows = 12
+
+# utf-8 encoding of the Angstrom unit symbol
+angstrom = u'\u212B'.encode('utf-8')
+
+#********************************************************************************
+# the spec of the Move Probability pages
+#********************************************************************************
+
+_sumNote = "Please note that the sum of the move probabilities across all move types must sum to 1."
+
+# the "Move Probability: " label and text widget of a page
+def _moveProbability(page,key):
+    return [
+        {"id": "moveProbability%sLabel" %page, "type": "static", "name": "Move Probability: ", "pos": (0,2)},
+        {"id": "moveProbability%sWidget" %page, "type": "text", "name": "", "pos": (0,3), "key": key, \
+                "function": "defaultTextFunction"},
+    ]
+
+# the "Species N: " labels of a page
+def _speciesLabels(page):
+    return [{"id": "s%%(species)s%sLabel" %page, "type": "static", "name": "Species %(species)s: ", \
+            "pos": (5,2), "repeat": "species"}]
+
+# the "Box N" column headers of a page
+def _boxHeaders(page):
+    return [{"id": "box%%(box)s%sLabel" %page, "type": "static", "name": "Box %(box)s", "pos": (4,3), \
+            "repeat": "box", "step": {"box": (0,1)}, "header": True}]
+
+moveProbabilitySpec = [
+    {"panel": "PanelThreeTranslation", "widgets": [
+        {"id": "P3TranslationLabel1", "type": "static", "name": _sumNote, "pos": (1,2), "span": (1,6)},
+        {"id": "P3TranslationLabel2", "type": "static", "pos": (3,2), "span": (1,6), \
+                "name": "Enter the maximum displacement (%(angstrom)s) allowed for each species in each box below."},
+        ] + _moveProbability("Translation", "prob translation") + _speciesLabels("Translation") + \
+                _boxHeaders("Translation") + [
+        {"id": "s%(species)sb%(box)sTranslation", "type": "text", "name": "", "pos": (5,3), \
+                "repeat": "species box", "step": {"species": (1,0), "box": (0,1)}, \
+                "column": "Box %(box)s", "key": "prob trans s%(species)s b%(box)s", "function": "defaultTextFunction"},
+    ]},
+    {"panel": "PanelThreeRotation", "widgets": [
+        {"id": "P3RotationString1Label", "type": "static", "name": _sumNote, "pos": (1,2), "span": (1,6)},
+        {"id": "P3RotationString2Label", "type": "static", "pos": (3,2), "span": (1,6), \
+                "name": "Enter the maximum rotational width in degrees for each species in each box below."},
+        ] + _moveProbability("Rotation", "prob rotation") + _speciesLabels("Rotation") + \
+                _boxHeaders("Rotation") + [
+        {"id": "s%(species)sb%(box)sRotation", "type": "text", "name": "", "pos": (5,3), \
+                "repeat": "species box", "step": {"species": (1,0), "box": (0,1)}, \
+                "column": "Box %(box)s", "key": "prob rot s%(species)s b%(box)s", "function": "defaultTextFunction"},
+    ]},
+    {"panel": "PanelThreeRegrowth", "widgets": [
+        {"id": "P3RegrowthString1Label", "type": "static", "name": _sumNote, "pos": (1,2), "span": (1,6)},
+        {"id": "P3RegrowthString2Label", "type": "static", "pos": (3,2), "span": (1,6), \
+                "name": "Enter the relative probability of regrowth for each species below."},
+        {"id": "P3RegrowthString3Label", "type": "static", "pos": (4,2), "span": (1,6), \
+                "name": "Note that the relative probabilities below must sum to 1."},
+        ] + _moveProbability("Regrowth", "prob regrowth") + _speciesLabels("Regrowth") + [
+        {"id": "s%(species)sRegrowthWidget", "type": "text", "name": "", "pos": (5,3), "repeat": "species", \
+                "column": "Relative probability", "key": "prob regrowth s%(species)s", \
+                "function": "defaultTextFunction"},
+    ]},
+    {"panel": "PanelThreeVolume", "widgets": [
+        {"id": "P3VolumeString1Label", "type": "static", "name": _sumNote, "pos": (1,2), "span": (1,6)},
+        {"id": "P3VolumeString2Label", "type": "static", "pos": (3,2), "span": (1,6), \
+                "name": "Enter the maximum volume displacements in  %(angstrom)s^3 for the simulation box(es) below"},
+        {"id": "P3VolumeString3Label", "type": "static", "pos": (4,2), "span": (1,8), \
+                "name": "This flag is required for NPT-MC, GEMC-NPT, and GEMC-NVT simulations, " + \
+                "and may not be used for other simulation types."},
+        ] + _moveProbability("Volume", "prob vol") + [
+        {"id": "box%(box)sVolumeLabel", "type": "static", "name": "Box %(box)s: ", "pos": (5,2), \
+                "repeat": "box", "step": {"box": (1,0)}},
+        {"id": "box%(box)sVolumeWidget", "type": "text", "name": "", "pos": (5,3), "repeat": "box", \
+                "step": {"box": (1,0)}, "key": "prob vol b%(box)s", "function": "defaultTextFunction"},
+    ]},
+    {"panel": "PanelThreeInsertion", "widgets": [
+        {"id": "P3InsertionString1Label", "type": "static", "name": _sumNote, "pos": (1,2), "span": (1,6)},
+        {"id": "P3InsertionString2Label", "type": "static", "pos": (2,2), "span": (1,6), \
+                "name": "Additionally, insertion moves define an equal probability of deletion, and so this "},
+        {"id": "P3InsertionString3Label", "type": "static", "pos": (3,2), "span": (1,6), \
+                "name": "probability should be counted twice when summing to 1."},
+        {"id": "P3InsertionString4Label", "type": "static", "pos": (8,4), "span": (1,6), \
+                "name": "This flag is allowed only for GCMC simulations."},
+        ] + _moveProbability("Insertion", "prob insertion") + _speciesLabels("Insertion") + [
+        {"id": "s%(species)sInsertionWidget", "type": "choice", "name": "", "pos": (5,3), "repeat": "species", \
+                "choices": ("", "cbmc", "none"), "column": "Insertion method", \
+                "key": "insertion method s%(species)s", \
+                "function": "defaultChoiceFunction"},
+    ]},
+    {"panel": "PanelThreeSwap", "widgets": [
+        {"id": "P3SwapString1Label", "type": "static", "name": _sumNote, "pos": (1,2), "span": (1,6)},
+        {"id": "P3SwapString2Label", "type": "static", "pos": (8,4), "span": (1,6), \
+                "name": "This flag is allowed only for GEMC simulations."},
+        {"id": "P3SwapString3Label", "type": "static", "pos": (3,2), "span": (1,6), \
+                "name": "Select the swap method for each relevant species in the simulation below."},
+        ] + _moveProbability("Swap", "prob swap") + _speciesLabels("Swap") + [
+        {"id": "s%(species)sSwapChoice", "type": "choice", "name": "", "pos": (5,3), "repeat": "species", \
+                "choices": ("", "reservoir", "none"), "column": "Swap method", \
+                "key": "swap method s%(species)s", \
+                "function": "defaultChoiceFunction"},
+    ]},
+]
+
+#********************************************************************************
+# the spec of the per-species rows of the Basic Information, Intramolecular and Molecule Files pages
+#********************************************************************************
+
+# shown only for GCMC simulations (see test.py)
+chemicalPotentialSpec = [
+    {"panel": "PanelOnePageTwo", "grid": "chemicalPotentialGrid", "widgets": [
+        {"id": "chemicalPotentialLabel", "type": "static", "name": "Chemical Potential (kJ/mol)", "pos": (1,5), \
+                "span": (1,2)},
+        {"id": "chemicalPotentialS%(species)sLabel", "type": "static", "name": "Species %(species)s: ", \
+                "pos": (2,5), "repeat": "species"},
+        {"id": "chemicalPotentialS%(species)sWidget", "type": "text", "name": "", "pos": (2,6), \
+                "repeat": "species", "column": "Chemical potential", "key": "chemPot S%(species)s", \
+                "function": "defaultTextFunction"},
+    ]},
+]
+
+# the text widgets of the intramolecular scale factors of a species: the van der Waals factors on its
+# first row, and the Coulombic factors on its second
+def _intramolecularScales():
+    scales = []
+    for row, interaction, label in ((5, "vdw", "vdW"), (6, "coul", "Coulombic")):
+        for column, bond in enumerate(("1-2", "1-3", "1-4", "1-N")):
+            scales.append({"id": "s%%(species)s%s%s" %(interaction.capitalize(), bond), "type": "text", \
+                    "name": "", "pos": (row, 3 + column), "repeat": "species", "step": {"species": (2,0)}, \
+                    "column": "%s %s" %(bond, label), "key": "s%%(species)s %s %s" %(bond, interaction), \
+                    "function": "defaultTextFunction"})
+    return scales
+
+intramolecularSpec = [
+    {"panel": "PanelTwoIntramolecular", "grid": "intramolecularGrid", "widgets": [
+        {"id": "s%(species)sIntraLabel", "type": "static", "name": "Species %(species)s", "pos": (5,1), \
+                "repeat": "species", "step": {"species": (2,0)}},
+        {"id": "s%(species)sVdwLabel", "type": "static", "name": "van der Waals", "pos": (5,2), \
+                "repeat": "species", "step": {"species": (2,0)}},
+        {"id": "s%(species)sCoulLabel", "type": "static", "name": "Coulombic", "pos": (6,2), \
+                "repeat": "species", "step": {"species": (2,0)}},
+        {"id": "interactionsLabel12", "type": "static", "name": "1-2 Scaling", "pos": (4,3), "header": True},
+        {"id": "interactionsLabel13", "type": "static", "name": "1-3 Scaling", "pos": (4,4), "header": True},
+        {"id": "interactionsLabel14", "type": "static", "name": "1-4 Scaling", "pos": (4,5), "header": True},
+        {"id": "interactionsLabel1N", "type": "static", "name": "1-N Scaling", "pos": (4,6), "header": True},
+        ] + _intramolecularScales()},
+]
+
+# in a grid, the MCF of a species is selected by double-clicking its cell
+moleculeFilesSpec = [
+    {"panel": "PanelFourMoleculeFiles", "grid": "moleculeFilesGrid", "widgets": [
+        {"id": "selectMCFLabel", "type": "static", "name": "Select", "pos": (3,2), "header": True},
+        {"id": "selectionMCFLabel", "type": "static", "name": "                     Selection                     ", \
+                "pos": (3,3), "header": True},
+        {"id": "nMoleculesLabel", "type": "static", "name": "# Molecules", "pos": (3,4), "header": True},
+        {"id": "s%(species)sMCFLabel", "type": "static", "name": "Species %(species)s: ", "pos": (4,1), \
+                "repeat": "species"},
+        {"id": "s%(species)sMCFButton", "type": "button", "name": "Select MCF File", "pos": (4,2), \
+                "repeat": "species", "column": "MCF file", "key": "MCF s%(species)s", \
+                "function": "MCFButtonFunction", "action": "selectSpeciesMCF"},
+        {"id": "s%(species)sMCFDisplay", "type": "text", "name": "", "pos": (4,3), "repeat": "species", \
+                "style": "TE_READONLY"},
+        {"id": "s%(species)sNmolsWidget", "type": "text", "name": "", "pos": (4,4), "repeat": "species", \
+                "column": "# Molecules", "key": "max nmols s%(species)s", "function": "defaultTextFunction"},
+    ]},
+]
+
+#********************************************************************************
+# compiling a spec
+#********************************************************************************
+
+# the species and box numbers for which an entry is repeated, as a list of (species, box)
+def _repetitions(repeat,numberOfSpecies):
+    species = [None]
+    boxes = [None]
+    if "species" in repeat:
+        species = range(1, numberOfSpecies + 1)
+    if "box" in repeat:
+        boxes = range(1, numberOfBoxes + 1)
+    return [(s, b) for s in species for b in boxes]
+
+# the position of an entry, for the given species and box numbers (None if not repeated over them)
+def _position(entry,species,box):
+    step = entry.get("step", {"species": (1,0)})
+    row, column = entry["pos"]
+    for index, name in ((species, "species"), (box, "box")):
+        if index is not None:
+            rows, columns = step.get(name, (0,0))
+            row += rows*(index - 1)
+            column += columns*(index - 1)
+    return (row, column)
+
+# the columns of the grid replacing an entry repeated over the species: (label, keyword pattern, choices,
+# action), one per box if the entry is also repeated over the boxes
+def _gridColumns(entry):
+    columns = []
+    for species, box in _repetitions(entry["repeat"].replace("species", ""), 0):
+        # the species number stays a placeholder, to be filled in by the grid for each row
+        values = {"species": "%(species)s", "box": box, "angstrom": angstrom}
+        choices = entry.get("choices")
+        if choices is not None:
+            choices = tuple(choices)
+        columns.append((entry["column"] %values, entry["key"] %values, choices, entry.get("action")))
+    return columns
+
+# the plan of a grid widget holding 'columns', in place of the first entry repeated over the species.
+# A grid with action columns is bound to gridCellFunction (see test.py)
+def _gridPlan(page,entry,columns,numberOfSpecies):
+    rows = min(numberOfSpecies, gridVisibleRows)
+    kwargs = (("columns", tuple(columns)), ("rows", ("numSpecies", numberOfSpecies)), \
+            ("size", (120*(len(columns) + 1), 25*(rows + 1))), ("span", (1, len(columns))))
+    function = None
+    if any([column[3] for column in columns]):
+        function = "gridCellFunction"
+    return (page.get("grid", page["panel"] + "Grid"), page["panel"], "grid", "", tuple(entry["pos"]), \
+            kwargs, None, function)
+
+# expand 'spec' for 'numberOfSpecies' species into a plan (see above).  Above gridThreshold species,
+# the entries of a page repeated over the species are replaced by a single grid widget (see
+# StoreGridTable in test.py): the entries with a "column" become its columns, and the other entries
+# repeated over the species (e.g. their labels), and the "header" entries, are left out.  The rows of the
+# grid follow the number of species chosen
+def compilePlan(spec,numberOfSpecies):
+    useGrids = (numberOfSpecies > gridThreshold)
+    plan = []
+    for page in spec:
+        panel = page["panel"]
+        gridIndex = None
+        gridEntry = None
+        columns = []
+        for entry in page["widgets"]:
+            get = entry.get
+            if (useGrids and "species" in get("repeat", "")):
+                if "column" in entry:
+                    if gridIndex is None:
+                        gridIndex = len(plan)
+                        gridEntry = entry
+                    columns.extend(_gridColumns(entry))
+                continue
+            if (useGrids and get("header")):
+                continue
+            for species, box in _repetitions(get("repeat", ""), numberOfSpecies):
+                values = {"species": species, "box": box, "angstrom": angstrom}
+                kwargs = {}
+                if "span" in entry:
+                    kwargs["span"] = tuple(entry["span"])
+                if "choices" in entry:
+                    kwargs["choices"] = tuple(entry["choices"])
+                if "style" in entry:
+                    kwargs["style"] = entry["style"]
+                key = get("key")
+                if key is not None:
+                    key = key %values
+                plan.append((entry["id"] %values, panel, entry["type"], entry["name"] %values, \
+                        _position(entry, species, box), tuple(sorted(kwargs.items())), key, get("function")))
+        if gridIndex is not None:
+            plan.insert(gridIndex, _gridPlan(page, gridEntry, columns, numberOfSpecies))
+    return tuple(plan)
@@ -0,0 +1,87 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# Validation of the fragment libraries selected for a species.
+#
+# A fragment library holds configurations of a fragment: each line is either a single number (e.g.
+# the energy of the configuration that follows), or an atom name followed by its x, y and z coordinates;
+# lines starting with '!' or '#' are comments.  validateFragmentFile() checks a single file against this
+# format; the files selected for a species are validated independently of each other, so they can be
+# validated in parallel (see the Fragment Files page of the editor), and the results are then compared
+# with the number of fragments that the MCF of the species declares by validateSelection().
+
+import os, re
+
+# the result of validating one fragment library: the path, whether it is valid, the number of atom lines,
+# and a message (the reason it is not valid)
+class FragmentFileResult(object):
+    __slots__ = ("path", "valid", "numberOfAtoms", "message")
+
+    def __init__(self,path,valid,numberOfAtoms,message):
+        self.path = path
+        self.valid = valid
+        self.numberOfAtoms = numberOfAtoms
+        self.message = message
+
+# the key sorting fragment libraries by name, with the numbers in the names compared as numbers
+# (frag_2.dat before frag_10.dat)
+def naturalKey(path):
+    parts = re.split(r"(\d+)", os.path.basename(path))
+    return [(int(part) if part.isdigit() else part.lower()) for part in parts]
+
+def _isNumber(field):
+    try:
+        float(field)
+        return True
+    except ValueError:
+        return False
+
+# validate the fragment library 'path'; stops at the first line that does not match the format
+def validateFragmentFile(path):
+    try:
+        f = open(path, "rb")
+    except IOError, error:
+        return FragmentFileResult(path, False, 0, "could not be read (%s)" %(error.strerror))
+    numberOfAtoms = 0
+    try:
+        for number, line in enumerate(f):
+            fields = line.split()
+            if (not fields or fields[0].startswith(("!", "#"))):
+                continue
+            if (len(fields) == 1 and _isNumber(fields[0])):
+                continue
+            if (len(fields) == 4 and not _isNumber(fields[0]) and all([_isNumber(field) for field in fields[1:]])):
+                numberOfAtoms += 1
+                continue
+            return FragmentFileResult(path, False, numberOfAtoms, \
+                    "line %d: expected a number, or an atom name and its three coordinates" %(number + 1))
+    finally:
+        f.close()
+    if (numberOfAtoms == 0):
+        return FragmentFileResult(path, False, 0, "holds no configurations")
+    return FragmentFileResult(path, True, numberOfAtoms, "")
+
+# compare the results of validating the fragment libraries of a species with the number of fragments
+# declared by its MCF ('expected'; None if no MCF has been read).  Returns a list of messages, which is
+# empty if the selection is complete and valid
+def validateSelection(results,expected):
+    messages = []
+    for result in results:
+        if not result.valid:
+            messages.append("%s: %s" %(os.path.basename(result.path), result.message))
+    if (expected is not None and len(results) != expected):
+        messages.append("%d fragment file(s) selected, but the MCF declares %d fragment(s)" %(len(results), expected))
+    return messages
@@ -0,0 +1,920 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# A headless (display-free) backend for the Frame/Panel/Notebook/Widget classes.
+#
+# This module provides the subset of the wxPython API that those classes, and the
+# GUI scripts built from them, make use of; it is imported in place of wx:
+#
+#       import headless as wx
+#
+# (test.py does this when the environment variable CASSANDRA_GUI_BACKEND is set
+# to "headless").  No window is ever drawn, and wx is never imported, so the whole
+# form tree can be instantiated, driven and inspected in-process without a display,
+# e.g. for scripted sessions in batch jobs or continuous integration.
+#
+# Windows keep their state (values, selections, whether they are shown) in plain
+# attributes, and events are dispatched to the handlers bound with Bind() in the
+# same way wx does it: command events travel from the control that generated them
+# up through its parents until a handler does not call event.Skip().
+#
+# Programmatic changes behave like their wx counterparts - e.g., TextCtrl.SetValue()
+# generates an EVT_TEXT event while Choice.SetSelection() does not.  To mimic the
+# user interacting with a control, use the simulate*() functions at the end of this file.
+# Timers started with CallLater() run on a virtual clock, which is advanced with advanceTime().
+# The classes of wx.grid are available as headless.grid; a grid reads its cells from its table only
+# when asked for them (GetCellValue()), as wx does when it draws them.
+
+#********************************************************************************
+# constants
+#********************************************************************************
+
+ID_ANY = -1
+NOT_FOUND = -1
+ID_OK = 5100
+ID_CANCEL = 5101
+
+HORIZONTAL = 0x0004
+VERTICAL = 0x0008
+
+EXPAND = 0x2000
+ALIGN_CENTER = 0x0900
+RESERVE_SPACE_EVEN_IF_HIDDEN = 0x0002
+ALL = 0x00f0
+
+TE_READONLY = 0x0010
+TE_MULTILINE = 0x0020
+TE_PROCESS_ENTER = 0x0400
+
+DD_DEFAULT_STYLE = 0x20000c00
+OPEN = 0x0001
+FD_OPEN = 0x0001
+MULTIPLE = 0x0020
+FD_MULTIPLE = 0x0020
+DEFAULT_DIALOG_STYLE = 0x20001800
+
+DefaultPosition = (-1,-1)
+DefaultSize = (-1,-1)
+
+# the size, in pixels, of a cell of a GridBagSizer; only used to give windows a plausible geometry
+_cellSize = (100,25)
+
+#********************************************************************************
+# events
+#********************************************************************************
+
+# an event type, as passed to Bind(); 'isCommand' events propagate to parent windows
+class PyEventBinder:
+    def __init__(self,name,isCommand=True):
+        self._name = name
+        self._isCommand = isCommand
+
+    def __repr__(self):
+        return "<headless event %s>" %(self._name)
+
+EVT_TEXT = PyEventBinder("EVT_TEXT")
+EVT_TEXT_ENTER = PyEventBinder("EVT_TEXT_ENTER")
+EVT_CHOICE = PyEventBinder("EVT_CHOICE")
+EVT_BUTTON = PyEventBinder("EVT_BUTTON")
+EVT_CHECKBOX = PyEventBinder("EVT_CHECKBOX")
+EVT_NOTEBOOK_PAGE_CHANGED = PyEventBinder("EVT_NOTEBOOK_PAGE_CHANGED")
+EVT_NOTEBOOK_PAGE_CHANGING = PyEventBinder("EVT_NOTEBOOK_PAGE_CHANGING")
+EVT_CLOSE = PyEventBinder("EVT_CLOSE",isCommand=False)
+EVT_KILL_FOCUS = PyEventBinder("EVT_KILL_FOCUS",isCommand=False)
+EVT_SET_FOCUS = PyEventBinder("EVT_SET_FOCUS",isCommand=False)
+
+class Event:
+    def __init__(self,eventType,eventObject,**kwargs):
+        self._eventType = eventType
+        self._eventObject = eventObject
+        self._string = kwargs.get('string',"")
+        self._int = kwargs.get('int',0)
+        self._selection = kwargs.get('selection',-1)
+        self._oldSelection = kwargs.get('oldSelection',-1)
+        # the cell of a grid event
+        self._row = kwargs.get('row',-1)
+        self._col = kwargs.get('col',-1)
+        self._skipped = False
+        self._vetoed = False
+
+    def GetEventType(self):
+        return self._eventType
+
+    def GetEventObject(self):
+        return self._eventObject
+
+    def GetId(self):
+        return self._eventObject.GetId()
+
+    def GetString(self):
+        return self._string
+
+    def GetInt(self):
+        return self._int
+
+    def GetSelection(self):
+        return self._selection
+
+    def GetOldSelection(self):
+        return self._oldSelection
+
+    def GetRow(self):
+        return self._row
+
+    def GetCol(self):
+        return self._col
+
+    def IsChecked(self):
+        return bool(self._int)
+
+    def Skip(self,skip=True):
+        self._skipped = skip
+
+    def GetSkipped(self):
+        return self._skipped
+
+    def Veto(self):
+        self._vetoed = True
+
+    def CanVeto(self):
+        return True
+
+# functions queued by CallAfter(), to be run by processPendingEvents()
+_pending = []
+
+def CallAfter(function,*args,**kwargs):
+    _pending.append((function,args,kwargs))
+
+# run everything queued by CallAfter(), including anything queued while doing so
+def processPendingEvents():
+    while _pending:
+        function, args, kwargs = _pending.pop(0)
+        function(*args,**kwargs)
+
+# there is no real clock: time passes only when advanceTime() is called, which fires the timers
+# started by CallLater that are due by then
+_now = 0
+_timers = []
+
+class CallLater:
+    def __init__(self,millis,function,*args,**kwargs):
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+        self._due = None
+        self.Start(millis)
+
+    def Start(self,millis=None):
+        if millis is not None:
+            self._millis = millis
+        self._due = _now + self._millis
+        if self not in _timers:
+            _timers.append(self)
+        return True
+
+    def Restart(self,millis=None):
+        return self.Start(millis)
+
+    def Stop(self):
+        self._due = None
+        if self in _timers:
+            _timers.remove(self)
+
+    def IsRunning(self):
+        return (self._due is not None)
+
+    def Notify(self):
+        self.Stop()
+        self._function(*self._args,**self._kwargs)
+
+# let 'millis' milliseconds pass, firing the timers that are due in order
+def advanceTime(millis):
+    global _now
+    end = _now + millis
+    while True:
+        due = [timer for timer in _timers if timer._due <= end]
+        if not due:
+            break
+        timer = min(due, key = lambda timer: timer._due)
+        _now = max(_now, timer._due)
+        timer.Notify()
+    _now = end
+
+def Yield():
+    processPendingEvents()
+    return True
+
+class App:
+    def __init__(self,redirect=False,*args,**kwargs):
+        pass
+
+    # there is no user to wait for; just run whatever is pending, then return
+    def MainLoop(self):
+        processPendingEvents()
+
+    def ProcessPendingEvents(self):
+        processPendingEvents()
+
+#********************************************************************************
+# windows
+#********************************************************************************
+
+# the base class of all headless windows
+class Window(object):
+    _nextId = 1000
+
+    def __init__(self,parent=None,id=ID_ANY,pos=DefaultPosition,size=DefaultSize,style=0,name=""):
+        self._parent = parent
+        self._children = []
+        if (parent is not None):
+            parent._children.append(self)
+        if (id == ID_ANY):
+            id = Window._nextId
+            Window._nextId += 1
+        self._id = id
+        self._name = name
+        self._style = style
+        self._shown = True
+        self._frozen = 0
+        self._sizer = None
+        self._rect = (pos[0], pos[1], size[0], size[1])
+        self._bindings = []
+        self._destroyed = False
+
+    def GetId(self):
+        return self._id
+
+    def GetName(self):
+        return self._name
+
+    def GetParent(self):
+        return self._parent
+
+    def GetChildren(self):
+        return list(self._children)
+
+    def IsTopLevel(self):
+        return False
+
+    # like wx, stops at the first frame or dialog
+    def GetTopLevelParent(self):
+        window = self
+        while window._parent is not None and not window.IsTopLevel():
+            window = window._parent
+        return window
+
+    def Show(self,show=True):
+        changed = (self._shown != bool(show))
+        self._shown = bool(show)
+        return changed
+
+    def Hide(self):
+        return self.Show(False)
+
+    def IsShown(self):
+        return self._shown
+
+    # True if this window and all of its parents (up to its frame or dialog) are shown
+    def IsShownOnScreen(self):
+        window = self
+        while window is not None:
+            if not window._shown:
+                return False
+            if window.IsTopLevel():
+                break
+            window = window._parent
+        return True
+
+    def Raise(self):
+        pass
+
+    def Enable(self,enable=True):
+        pass
+
+    def Freeze(self):
+        self._frozen += 1
+
+    def Thaw(self):
+        if (self._frozen == 0):
+            raise RuntimeError("Thaw() called without a matching Freeze()")
+        self._frozen -= 1
+
+    def IsFrozen(self):
+        return (self._frozen > 0)
+
+    def SetSizer(self,sizer):
+        self._sizer = sizer
+        sizer._containingWindow = self
+
+    def GetSizer(self):
+        return self._sizer
+
+    def Layout(self):
+        if (self._sizer is not None):
+            self._sizer.Layout()
+        return True
+
+    def SetInitialSize(self,size=DefaultSize):
+        self.SetSize(size)
+
+    def SetSize(self,size):
+        self._rect = (self._rect[0], self._rect[1], size[0], size[1])
+
+    def GetSize(self):
+        return (self._rect[2], self._rect[3])
+
+    def GetClientSize(self):
+        return self.GetSize()
+
+    def SetRect(self,rect):
+        self._rect = tuple(rect)
+
+    def GetRect(self):
+        return self._rect
+
+    def Bind(self,event,handler,source=None,id=ID_ANY,id2=ID_ANY):
+        self._bindings.append((event, handler, source, id))
+
+    def Unbind(self,event,source=None,id=ID_ANY,id2=ID_ANY,handler=None):
+        before = len(self._bindings)
+        self._bindings = [binding for binding in self._bindings if not \
+                (binding[0] is event and binding[2] is source and \
+                (handler is None or binding[1] == handler))]
+        return (len(self._bindings) != before)
+
+    # dispatch 'event' to the handlers bound on this window and, for command events, on its parents.
+    # as in wx, the handlers bound last are called first, and processing stops at the first
+    # handler that does not call event.Skip().  Returns True if a handler processed the event
+    def ProcessEvent(self,event):
+        window = self
+        while window is not None:
+            for binder, handler, source, id in reversed(window._bindings):
+                if (binder is not event._eventType):
+                    continue
+                if (source is not None and source is not event._eventObject):
+                    continue
+                if (id != ID_ANY and id != event.GetId()):
+                    continue
+                event._skipped = False
+                handler(event)
+                if not event._skipped:
+                    return True
+            if not event._eventType._isCommand:
+                break
+            window = window._parent
+        return False
+
+    def GetEventHandler(self):
+        return self
+
+    def Close(self,force=False):
+        event = Event(EVT_CLOSE, self)
+        if self.ProcessEvent(event):
+            return not event._vetoed
+        # no handler for EVT_CLOSE; the default is to destroy the window
+        self.Destroy()
+        return True
+
+    def Destroy(self):
+        for child in list(self._children):
+            child.Destroy()
+        if (self._parent is not None and self in self._parent._children):
+            self._parent._children.remove(self)
+        self._bindings = []
+        self._destroyed = True
+        return True
+
+class Frame(Window):
+    def __init__(self,parent=None,id=ID_ANY,title="",pos=DefaultPosition,size=DefaultSize, \
+            style=0,name="frame"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._title = title
+        # like wx, frames are created hidden
+        self._shown = False
+
+    def IsTopLevel(self):
+        return True
+
+    def GetTitle(self):
+        return self._title
+
+    def SetTitle(self,title):
+        self._title = title
+
+    # the status bar only holds its text
+    def CreateStatusBar(self,number=1,style=0):
+        self._statusText = ""
+
+    def SetStatusText(self,text,number=0):
+        if not hasattr(self, "_statusText"):
+            raise RuntimeError("the frame has no status bar")
+        self._statusText = text
+
+    def GetStatusText(self,number=0):
+        return self._statusText
+
+class Panel(Window):
+    def __init__(self,parent=None,id=ID_ANY,pos=DefaultPosition,size=DefaultSize,style=0,name="panel"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+
+class Notebook(Window):
+    def __init__(self,parent=None,id=ID_ANY,pos=DefaultPosition,size=DefaultSize,style=0,name="notebook"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._pages = []
+        self._pageNames = []
+        self._selection = -1
+
+    def AddPage(self,page,text,select=False):
+        self._pages.append(page)
+        self._pageNames.append(text)
+        if (select or self._selection == -1):
+            self.ChangeSelection(len(self._pages)-1)
+        else:
+            page._shown = False
+        return True
+
+    def GetPageCount(self):
+        return len(self._pages)
+
+    def GetPage(self,index):
+        return self._pages[index]
+
+    def GetPageText(self,index):
+        return self._pageNames[index]
+
+    def GetSelection(self):
+        return self._selection
+
+    def GetCurrentPage(self):
+        if (self._selection == -1):
+            return None
+        return self._pages[self._selection]
+
+    # change the selected page without generating an event
+    def ChangeSelection(self,index):
+        oldSelection = self._selection
+        for pageIndex, page in enumerate(self._pages):
+            page._shown = (pageIndex == index)
+        self._selection = index
+        return oldSelection
+
+    # change the selected page, generating an EVT_NOTEBOOK_PAGE_CHANGED event
+    def SetSelection(self,index):
+        oldSelection = self.ChangeSelection(index)
+        if (oldSelection != index):
+            self.ProcessEvent(Event(EVT_NOTEBOOK_PAGE_CHANGED, self, selection = index, \
+                    oldSelection = oldSelection))
+        return oldSelection
+
+class TextCtrl(Window):
+    def __init__(self,parent=None,id=ID_ANY,value="",pos=DefaultPosition,size=DefaultSize, \
+            style=0,name="text"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._value = value
+
+    def GetValue(self):
+        return self._value
+
+    # set the value, generating an EVT_TEXT event
+    def SetValue(self,value):
+        self._value = value
+        self.ProcessEvent(Event(EVT_TEXT, self, string = value))
+
+    # set the value without generating an event
+    def ChangeValue(self,value):
+        self._value = value
+
+    def AppendText(self,text):
+        self.SetValue(self._value + text)
+
+    def Clear(self):
+        self.SetValue("")
+
+class Choice(Window):
+    def __init__(self,parent=None,id=ID_ANY,pos=DefaultPosition,size=DefaultSize,choices=[], \
+            style=0,name="choice"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._choices = list(choices)
+        self._selection = -1
+
+    def GetCount(self):
+        return len(self._choices)
+
+    def GetString(self,index):
+        return self._choices[index]
+
+    def GetItems(self):
+        return list(self._choices)
+
+    def SetItems(self,choices):
+        self._choices = list(choices)
+        self._selection = -1
+
+    def Append(self,item):
+        self._choices.append(item)
+
+    def Clear(self):
+        self.SetItems([])
+
+    def GetSelection(self):
+        return self._selection
+
+    # set the selection without generating an event, as wx does
+    def SetSelection(self,index):
+        self._selection = index
+
+    def GetStringSelection(self):
+        if (self._selection == -1):
+            return ""
+        return self._choices[self._selection]
+
+    def SetStringSelection(self,string):
+        if string not in self._choices:
+            return False
+        self._selection = self._choices.index(string)
+        return True
+
+class Button(Window):
+    def __init__(self,parent=None,id=ID_ANY,label="",pos=DefaultPosition,size=DefaultSize, \
+            style=0,name="button"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._label = label
+
+    def GetLabel(self):
+        return self._label
+
+    def SetLabel(self,label):
+        self._label = label
+
+class CheckBox(Window):
+    def __init__(self,parent=None,id=ID_ANY,label="",pos=DefaultPosition,size=DefaultSize, \
+            style=0,name="check"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._label = label
+        self._checked = False
+
+    def GetValue(self):
+        return self._checked
+
+    def IsChecked(self):
+        return self._checked
+
+    # set the value without generating an event, as wx does
+    def SetValue(self,state):
+        self._checked = bool(state)
+
+class StaticText(Window):
+    def __init__(self,parent=None,id=ID_ANY,label="",pos=DefaultPosition,size=DefaultSize, \
+            style=0,name="staticText"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._label = label
+
+    def GetLabel(self):
+        return self._label
+
+    def SetLabel(self,label):
+        self._label = label
+
+#********************************************************************************
+# grids (wx.grid)
+#********************************************************************************
+
+GRIDTABLE_REQUEST_VIEW_GET_VALUES = 2000
+GRIDTABLE_NOTIFY_ROWS_INSERTED = 2002
+GRIDTABLE_NOTIFY_ROWS_APPENDED = 2003
+GRIDTABLE_NOTIFY_ROWS_DELETED = 2004
+
+EVT_GRID_CELL_CHANGED = PyEventBinder("EVT_GRID_CELL_CHANGED")
+EVT_GRID_CELL_LEFT_DCLICK = PyEventBinder("EVT_GRID_CELL_LEFT_DCLICK")
+
+# as in wx, a table of the values of a grid; a subclass provides the values, which the grid only
+# asks for when it draws a cell (here, when GetCellValue() is called)
+class PyGridTableBase(object):
+    def __init__(self):
+        self._view = None
+
+    def GetView(self):
+        return self._view
+
+    def SetView(self,grid):
+        self._view = grid
+
+    def GetNumberRows(self):
+        return 0
+
+    def GetNumberCols(self):
+        return 0
+
+    def GetValue(self,row,col):
+        return ""
+
+    def SetValue(self,row,col,value):
+        pass
+
+    def IsEmptyCell(self,row,col):
+        return (self.GetValue(row, col) == "")
+
+    def GetRowLabelValue(self,row):
+        return str(row + 1)
+
+    def GetColLabelValue(self,col):
+        return str(col + 1)
+
+    def GetAttr(self,row,col,kind):
+        return None
+
+class GridTableMessage(object):
+    def __init__(self,table,id,position=0,count=0):
+        self._table = table
+        self._id = id
+        self._position = position
+        self._count = count
+
+    def GetTableObject(self):
+        return self._table
+
+    def GetId(self):
+        return self._id
+
+    def GetCommandInt(self):
+        return self._position
+
+    def GetCommandInt2(self):
+        return self._count
+
+class GridCellChoiceEditor(object):
+    def __init__(self,choices=[],allowOthers=False):
+        self._choices = list(choices)
+
+    def GetChoices(self):
+        return list(self._choices)
+
+class GridCellAttr(object):
+    def __init__(self):
+        self._editor = None
+        self._readOnly = False
+
+    def SetEditor(self,editor):
+        self._editor = editor
+
+    def GetEditor(self,grid=None,row=0,col=0):
+        return self._editor
+
+    def SetReadOnly(self,readOnly=True):
+        self._readOnly = readOnly
+
+    def IsReadOnly(self):
+        return self._readOnly
+
+    # wxPython's reference counting of attributes returned by a table; nothing to count here
+    def IncRef(self):
+        pass
+
+    def DecRef(self):
+        pass
+
+# a grid shows the values of its table; it keeps no values of its own
+class Grid(Window):
+    def __init__(self,parent=None,id=ID_ANY,pos=DefaultPosition,size=DefaultSize,style=0,name="grid"):
+        Window.__init__(self,parent,id,pos,size,style,name)
+        self._table = None
+        self._numberOfRows = 0
+        self._refreshes = 0
+
+    def SetTable(self,table,takeOwnership=False,selmode=0):
+        self._table = table
+        table.SetView(self)
+        self._numberOfRows = table.GetNumberRows()
+        return True
+
+    def GetTable(self):
+        return self._table
+
+    # the number of rows the grid shows; as in wx, it only follows the table when told to
+    def GetNumberRows(self):
+        return self._numberOfRows
+
+    def GetNumberCols(self):
+        return self._table.GetNumberCols()
+
+    def GetCellValue(self,row,col):
+        return self._table.GetValue(row, col)
+
+    def SetCellValue(self,row,col,value):
+        self._table.SetValue(row, col, value)
+
+    def GetRowLabelValue(self,row):
+        return self._table.GetRowLabelValue(row)
+
+    def GetColLabelValue(self,col):
+        return self._table.GetColLabelValue(col)
+
+    def ProcessTableMessage(self,message):
+        id = message.GetId()
+        if (id == GRIDTABLE_NOTIFY_ROWS_APPENDED):
+            self._numberOfRows += message.GetCommandInt()
+        elif (id == GRIDTABLE_NOTIFY_ROWS_INSERTED):
+            self._numberOfRows += message.GetCommandInt2()
+        elif (id == GRIDTABLE_NOTIFY_ROWS_DELETED):
+            self._numberOfRows -= message.GetCommandInt2()
+        return True
+
+    # the number of times the grid was asked to redraw its cells
+    def ForceRefresh(self):
+        self._refreshes += 1
+
+    def AutoSizeColumns(self,setAsMin=True):
+        pass
+
+    def SetRowLabelSize(self,width):
+        pass
+
+# in wx, the classes above are in the module wx.grid
+import types
+grid = types.ModuleType("grid")
+for _name in ("GRIDTABLE_REQUEST_VIEW_GET_VALUES", "GRIDTABLE_NOTIFY_ROWS_INSERTED", \
+        "GRIDTABLE_NOTIFY_ROWS_APPENDED", "GRIDTABLE_NOTIFY_ROWS_DELETED", "EVT_GRID_CELL_CHANGED", \
+        "EVT_GRID_CELL_LEFT_DCLICK", \
+        "PyGridTableBase", "GridTableMessage", "GridCellChoiceEditor", "GridCellAttr", "Grid"):
+    setattr(grid, _name, globals()[_name])
+del _name
+
+#********************************************************************************
+# sizers
+#********************************************************************************
+
+class BoxSizer:
+    def __init__(self,orient=HORIZONTAL):
+        self._orient = orient
+        self._items = []
+        self._containingWindow = None
+
+    def Add(self,item,proportion=0,flag=0,border=0):
+        self._items.append(item)
+
+    def GetChildren(self):
+        return list(self._items)
+
+    # every item fills the containing window
+    def Layout(self):
+        if (self._containingWindow is None):
+            return
+        width, height = self._containingWindow.GetClientSize()
+        for item in self._items:
+            item.SetRect((0, 0, width, height))
+
+class GridBagSizer:
+    def __init__(self,vgap=0,hgap=0):
+        self._vgap = vgap
+        self._hgap = hgap
+        self._items = []
+        self._containingWindow = None
+        # the number of times the items were placed
+        self._layouts = 0
+
+    def Add(self,item,pos,span=(1,1),flag=0,border=0):
+        self._items.append((item, tuple(pos), tuple(span), flag))
+
+    def GetChildren(self):
+        return [item[0] for item in self._items]
+
+    # place each item in its cell; hidden items only keep their space if they asked for it
+    def Layout(self):
+        self._layouts += 1
+        for item, pos, span, flag in self._items:
+            if (not item._shown and not (flag & RESERVE_SPACE_EVEN_IF_HIDDEN)):
+                continue
+            item.SetRect((pos[1]*(_cellSize[0]+self._hgap), pos[0]*(_cellSize[1]+self._vgap), \
+                    span[1]*_cellSize[0], span[0]*_cellSize[1]))
+
+#********************************************************************************
+# dialogs
+#********************************************************************************
+
+# there is no user to answer a dialog; instead, the answers are queued in advance with
+# queueDialogResult().  A dialog with no queued answer behaves as if the user cancelled it
+_dialogResults = []
+
+# 'path' is the path the next dialog returns; for a dialog allowing multiple selections,
+# a list of paths may be given
+def queueDialogResult(path):
+    _dialogResults.append(path)
+
+class Dialog(Window):
+    def __init__(self,parent=None,message="",*args,**kwargs):
+        Window.__init__(self,parent)
+        self._message = message
+        self._paths = []
+        self._shown = False
+
+    def IsTopLevel(self):
+        return True
+
+    def ShowModal(self):
+        if not _dialogResults:
+            return ID_CANCEL
+        result = _dialogResults.pop(0)
+        if isinstance(result, (list, tuple)):
+            self._paths = list(result)
+        else:
+            self._paths = [result]
+        return ID_OK
+
+    def GetPath(self):
+        if not self._paths:
+            return ""
+        return self._paths[0]
+
+    def GetPaths(self):
+        return list(self._paths)
+
+class DirDialog(Dialog):
+    pass
+
+class FileDialog(Dialog):
+    pass
+
+# the queued result of a SingleChoiceDialog is the string to select, which must be one of its choices
+class SingleChoiceDialog(Dialog):
+    def __init__(self,parent=None,message="",caption="",choices=[],*args,**kwargs):
+        Dialog.__init__(self,parent,message)
+        self._choices = list(choices)
+
+    def ShowModal(self):
+        result = Dialog.ShowModal(self)
+        if (result == ID_OK and self.GetPath() not in self._choices):
+            raise ValueError("'%s' is not one of the choices of this dialog" %(self.GetPath()))
+        return result
+
+    def GetStringSelection(self):
+        return self.GetPath()
+
+    def GetSelection(self):
+        if self.GetPath() not in self._choices:
+            return NOT_FOUND
+        return self._choices.index(self.GetPath())
+
+#********************************************************************************
+# driving the GUI: these functions do what a user interacting with the control would
+#********************************************************************************
+
+# type 'value' in to a text control
+def simulateText(textCtrl,value):
+    textCtrl.SetValue(value)
+
+# move the focus away from a window, generating an EVT_KILL_FOCUS event
+def simulateFocusLoss(window):
+    window.ProcessEvent(Event(EVT_KILL_FOCUS, window))
+
+# press Enter in a text control, generating an EVT_TEXT_ENTER event; as in wx, only a control with the
+# TE_PROCESS_ENTER style generates it
+def simulateEnter(textCtrl):
+    if not (textCtrl._style & TE_PROCESS_ENTER):
+        return
+    textCtrl.ProcessEvent(Event(EVT_TEXT_ENTER, textCtrl, string = textCtrl.GetValue()))
+
+# select the item 'string' of a choice control, generating an EVT_CHOICE event
+def simulateChoice(choice,string):
+    if not choice.SetStringSelection(string):
+        raise ValueError("'%s' is not one of the choices of this widget" %(string))
+    choice.ProcessEvent(Event(EVT_CHOICE, choice, string = string, int = choice.GetSelection(), \
+            selection = choice.GetSelection()))
+
+# click a button
+def simulateClick(button):
+    button.ProcessEvent(Event(EVT_BUTTON, button))
+
+# check (or uncheck) a check box, generating an EVT_CHECKBOX event
+def simulateCheck(checkBox,state=True):
+    checkBox.SetValue(state)
+    checkBox.ProcessEvent(Event(EVT_CHECKBOX, checkBox, int = int(bool(state))))
+
+# edit a cell of a grid, generating an EVT_GRID_CELL_CHANGED event
+def simulateCellEdit(grid,row,col,value):
+    if not (0 <= row < grid.GetNumberRows() and 0 <= col < grid.GetNumberCols()):
+        raise ValueError("the grid has no cell (%d, %d)" %(row, col))
+    grid.SetCellValue(row, col, value)
+    grid.ProcessEvent(Event(EVT_GRID_CELL_CHANGED, grid, string = value, row = row, col = col))
+
+# double-click a cell of a grid, generating an EVT_GRID_CELL_LEFT_DCLICK event
+def simulateCellDoubleClick(grid,row,col):
+    if not (0 <= row < grid.GetNumberRows() and 0 <= col < grid.GetNumberCols()):
+        raise ValueError("the grid has no cell (%d, %d)" %(row, col))
+    grid.ProcessEvent(Event(EVT_GRID_CELL_LEFT_DCLICK, grid, row = row, col = col))
+
+# select a page of a notebook
+def simulatePageSelection(notebook,index):
+    notebook.SetSelection(index)
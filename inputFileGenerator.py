@@ -0,0 +1,333 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# Generates the Cassandra input file from the values in a ParameterStore (see parameterStore.py).
+#
+# Each section of the input file ("# Sim_Type", "# Box_Info", ...) is rendered by a function of
+# its own.  The text of each section is cached along with the versions of the store sections it
+# was rendered from; a section is only rendered again once one of those store sections has changed,
+# so regenerating the file after a single edit renders a single section.
+#
+# The file is written section by section to a temporary file in the directory of the input file,
+# which is then renamed to the input file; a reader never sees a partially written input file.
+#
+# Sections for which no values have been entered are left out.  A line holding one value per species (or
+# per box) must have all of its values, as Cassandra reads them by position; a line with only some of them
+# raises an IncompleteRowError, and errors() lists these before the file is written.
+
+import os, tempfile
+
+# the line separating the sections of the input file
+separator = "!" + "-"*78
+
+# the number of boxes in the simulation
+def numberOfBoxes(store):
+    if store.text("ensemble") in ("GEMC", "GEMC_NPT"):
+        return 2
+    return 1
+
+# the species numbers (1, 2, ...) of the species in the simulation
+def speciesNumbers(store):
+    return range(1, store.value("numSpecies", 0) + 1)
+
+# a line of the input file has some, but not all, of the values it needs
+class IncompleteRowError(ValueError):
+    pass
+
+# the texts of 'keys', or None if none of them has a value; missing values are left out.  For lines whose
+# later values are optional (e.g., the spline cutoffs of VDW_Style)
+def joinTexts(store,keys):
+    texts = [store.text(key) for key in keys]
+    if not any(texts):
+        return None
+    return " ".join([text for text in texts if text])
+
+# the texts of 'keys', or None if none of them has a value; for lines holding a value for each species (or
+# box), which are read by position, so that a missing value raises an IncompleteRowError
+def joinRow(store,keys):
+    texts = [store.text(key) for key in keys]
+    if not any(texts):
+        return None
+    missing = [key for key, text in zip(keys, texts) if not text]
+    if missing:
+        raise IncompleteRowError("no value for %s, although the other values of its line are set" \
+                %(", ".join(["'%s'" %key for key in missing])))
+    return " ".join(texts)
+
+#********************************************************************************
+# the sections; each returns the lines following the section header, or None to leave it out
+#********************************************************************************
+
+def renderRunName(store):
+    if not store.text("runName"):
+        return None
+    return [store.text("runName")]
+
+def renderSimType(store):
+    if not store.text("ensemble"):
+        return None
+    return [store.text("ensemble")]
+
+def renderNbrSpecies(store):
+    if not store.text("numSpecies"):
+        return None
+    return [store.text("numSpecies")]
+
+vdwFunctionalForms = {"Lennard Jones 12-6": "LJ", "MIE": "Mie", "None": "NONE"}
+
+def renderVdwStyle(store):
+    lines = []
+    for box in range(1, numberOfBoxes(store) + 1):
+        functional = vdwFunctionalForms.get(store.text("box %d vdw functional" %box), "")
+        rest = joinTexts(store, ["box %d vdw tail" %box, "box %d spline on" %box, \
+                "box %d spline off" %box, "box %d logical" %box])
+        if not (functional or rest):
+            continue
+        lines.append(" ".join([text for text in (functional, rest) if text]))
+    return lines or None
+
+chargeFunctionalForms = {"Coulombic": "coul", "None": "NONE"}
+
+def renderChargeStyle(store):
+    lines = []
+    for box in range(1, numberOfBoxes(store) + 1):
+        functional = chargeFunctionalForms.get(store.text("box %d charge functional" %box), "")
+        rest = joinTexts(store, ["box %d charge method" %box, "box %d charge cutoff" %box, \
+                "box %d ewald accuracy" %box])
+        if not (functional or rest):
+            continue
+        lines.append(" ".join([text for text in (functional, rest) if text]))
+    return lines or None
+
+def renderIntraScaling(store):
+    lines = []
+    for species in speciesNumbers(store):
+        for interaction in ("vdw", "coul"):
+            line = joinRow(store, ["s%d %s %s" %(species, bond, interaction) \
+                    for bond in ("1-2", "1-3", "1-4", "1-N")])
+            if line is not None:
+                lines.append(line)
+    return lines or None
+
+mixingRules = {"Lorentz-Berthelot": "LB", "Geometric": "geometric"}
+
+def renderMixingRule(store):
+    if not store.text("mixingRule"):
+        return None
+    return [mixingRules.get(store.text("mixingRule"), store.text("mixingRule"))]
+
+def renderSeedInfo(store):
+    line = joinRow(store, ["seed1", "seed2"])
+    return line and [line]
+
+def renderRcutoffLow(store):
+    line = joinTexts(store, ["rCutoffLow"])
+    return line and [line]
+
+def renderPairEnergy(store):
+    line = joinTexts(store, ["pairStorage"])
+    return line and [line]
+
+def renderMoleculeFiles(store):
+    lines = []
+    for species in speciesNumbers(store):
+        line = joinRow(store, ["MCF s%d" %species, "max nmols s%d" %species])
+        if line is not None:
+            lines.append(line)
+    return lines or None
+
+# the box shapes of the editor, and the keywords Cassandra knows them by; a NON-CUBIC box is given by
+# its cell matrix (the H-matrix entered for the box)
+boxShapes = {"CUBIC": "CUBIC", "NON-CUBIC": "CELL_MATRIX"}
+
+def renderBoxInfo(store):
+    lines = []
+    boxes = numberOfBoxes(store)
+    for box in range(1, boxes + 1):
+        shape = store.text("box%dShape" %box)
+        if not shape:
+            continue
+        lines.append(boxShapes.get(shape, shape))
+        if (shape == "CUBIC"):
+            line = joinRow(store, ["box%dLength" %box])
+            if line is None:
+                raise IncompleteRowError("no value for 'box%dLength', although the box is CUBIC" %box)
+            lines.append(line)
+        else:
+            for first in "xyz":
+                line = joinRow(store, ["%s%s %d" %(first, second, box) for second in "xyz"])
+                if line is None:
+                    raise IncompleteRowError("no value for the %s row of the H-matrix of box %d" %(first, box))
+                lines.append(line)
+        lines.append("")
+    if not lines:
+        return None
+    return [str(boxes)] + lines[:-1]
+
+def renderTemperatureInfo(store):
+    line = joinTexts(store, ["temperature"])
+    return line and [line]
+
+def renderPressureInfo(store):
+    line = joinTexts(store, ["pressure"])
+    return line and [line]
+
+def renderChemicalPotentialInfo(store):
+    line = joinTexts(store, ["chemPot S%d" %species for species in speciesNumbers(store)])
+    return line and [line]
+
+def renderMoveProbabilityInfo(store):
+    species = speciesNumbers(store)
+    boxes = range(1, numberOfBoxes(store) + 1)
+
+    # each move: (name in the input file, keyword of its probability, the lines of keywords following it)
+    moves = [("Prob_Translation", "prob translation", \
+                [["prob trans s%d b%d" %(s, b) for s in species] for b in boxes]), \
+            ("Prob_Rotation", "prob rotation", \
+                [["prob rot s%d b%d" %(s, b) for s in species] for b in boxes]), \
+            ("Prob_Regrowth", "prob regrowth", [["prob regrowth s%d" %s for s in species]]), \
+            ("Prob_Volume", "prob vol", [["prob vol b%d" %b for b in boxes]]), \
+            ("Prob_Insertion", "prob insertion", [["insertion method s%d" %s for s in species]]), \
+            ("Prob_Swap", "prob swap", [["swap method s%d" %s for s in species]])]
+
+    lines = []
+    for name, probability, rows in moves:
+        if not store.text(probability):
+            continue
+        lines.append("")
+        lines.append("# " + name)
+        lines.append(store.text(probability))
+        for row in rows:
+            line = joinRow(store, row)
+            if line is not None:
+                lines.append(line)
+    if not lines:
+        return None
+    return lines[1:] + ["", "# Done_Probability_Info"]
+
+# each fragment library, followed by the number of the fragment (counting over all species)
+def renderFragmentFiles(store):
+    lines = []
+    fragmentNumber = 0
+    for species in speciesNumbers(store):
+        for path in store.text("fragment files s%d" %species).splitlines():
+            fragmentNumber += 1
+            lines.append("%s %d" %(path, fragmentNumber))
+    return lines or None
+
+def renderCBMCInfo(store):
+    lines = []
+    for name, key in (("kappa_ins", "trialInsertions"), ("kappa_rot", "rotationalBias"), \
+            ("kappa_dih", "trialOrientations")):
+        if store.text(key):
+            lines.append("%s %s" %(name, store.text(key)))
+    cutoffs = joinRow(store, ["cbmcCutoffBox%d" %box for box in range(1, numberOfBoxes(store) + 1)])
+    if cutoffs is not None:
+        lines.append("rcut_cbmc %s" %cutoffs)
+    return lines or None
+
+# the sections of the input file, in order: (header, function rendering it, the store sections it reads)
+sections = [("Run_Name", renderRunName, ("Run_Name",)), \
+        ("Sim_Type", renderSimType, ("Sim_Type",)), \
+        ("Nbr_Species", renderNbrSpecies, ("Nbr_Species",)), \
+        ("VDW_Style", renderVdwStyle, ("VDW_Style", "Sim_Type")), \
+        ("Charge_Style", renderChargeStyle, ("Charge_Style", "Sim_Type")), \
+        ("Intra_Scaling", renderIntraScaling, ("Intra_Scaling", "Nbr_Species")), \
+        ("Mixing_Rule", renderMixingRule, ("Mixing_Rule",)), \
+        ("Seed_Info", renderSeedInfo, ("Seed_Info",)), \
+        ("Rcutoff_Low", renderRcutoffLow, ("Rcutoff_Low",)), \
+        ("Pair_Energy", renderPairEnergy, ("Pair_Energy",)), \
+        ("Molecule_Files", renderMoleculeFiles, ("Molecule_Files", "Nbr_Species")), \
+        ("Box_Info", renderBoxInfo, ("Box_Info", "Sim_Type")), \
+        ("Temperature_Info", renderTemperatureInfo, ("Temperature_Info",)), \
+        ("Pressure_Info", renderPressureInfo, ("Pressure_Info",)), \
+        ("Chemical_Potential_Info", renderChemicalPotentialInfo, ("Chemical_Potential_Info", "Nbr_Species")), \
+        ("Move_Probability_Info", renderMoveProbabilityInfo, ("Move_Probability_Info", "Nbr_Species", "Sim_Type")), \
+        ("CBMC_Info", renderCBMCInfo, ("CBMC_Info", "Sim_Type")), \
+        ("Fragment_Files", renderFragmentFiles, ("Fragment_Files", "Nbr_Species"))]
+
+class InputFileGenerator(object):
+    def __init__(self,store):
+        self._store = store
+
+        # header -> (versions of the store sections it was rendered from, rendered text)
+        self._cache = {}
+
+        # the number of times a section has been rendered (rather than taken from the cache)
+        self.renderCount = 0
+
+    # the text of the section with the given header and renderer, from the cache if it is up to date
+    def section(self,header,function,inputs):
+        store = self._store
+        versions = tuple([store.version(section) for section in inputs])
+        cached = self._cache.get(header)
+        if (cached is not None and cached[0] == versions):
+            return cached[1]
+        self.renderCount += 1
+        lines = function(store)
+        if lines is None:
+            text = ""
+        else:
+            text = "# %s\n%s\n%s\n\n" %(header, "\n".join(lines), separator)
+        self._cache[header] = (versions, text)
+        return text
+
+    # the reasons the input file cannot be written (a list of messages, empty if it can be); the sections
+    # are rendered (and cached) along the way
+    def errors(self):
+        errors = []
+        for header, function, inputs in sections:
+            try:
+                self.section(header, function, inputs)
+            except IncompleteRowError, error:
+                errors.append("%s: %s" %(header, error))
+        return errors
+
+    # the texts of all sections, in order
+    def sections(self):
+        for header, function, inputs in sections:
+            text = self.section(header, function, inputs)
+            if text:
+                yield text
+
+    def render(self):
+        return "".join(self.sections())
+
+    # write the input file to 'path', replacing it (if it exists) only once the new file is complete
+    def write(self,path):
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temporaryPath = tempfile.mkstemp(prefix = ".", suffix = ".inp.tmp", dir = directory)
+        try:
+            f = os.fdopen(descriptor, "w")
+            try:
+                for text in self.sections():
+                    f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                f.close()
+            # mkstemp() creates the file readable by its owner only; give it the permissions of a new file
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temporaryPath, 0666 & ~umask)
+            # os.rename() replaces an existing file atomically, except on Windows, where it must be removed first
+            if (os.name == "nt" and os.path.exists(path)):
+                os.remove(path)
+            os.rename(temporaryPath, path)
+        except:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
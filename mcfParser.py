@@ -0,0 +1,114 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# A parser for Cassandra molecular connectivity files (MCF).
+#
+# An MCF consists of sections, each starting with a header line ("# Atom_Info", "# Bond_Info", ...),
+# followed by the number of entries in the section, and then one line per entry.  Lines starting
+# with '!' are comments.
+#
+# sectionCounts(path, names) reads the number of entries of the named sections only.  The file is
+# mapped into memory and searched for the headers, so only the lines that are needed are read, however
+# large the file is; fragmentCount(path) is a shortcut for the number of fragments.
+# The results are cached, keyed by the path, size and modification time of the file, so asking
+# again about a file that has not changed does not read it again.
+
+import os, mmap
+from collections import OrderedDict
+
+#********************************************************************************
+# the cache
+#********************************************************************************
+
+# the number of files whose contents are kept
+cacheSize = 32
+
+# (kind, absolute path) -> ((size, modification time), result), most recently used last
+_cache = OrderedDict()
+
+def _cached(kind,path,function):
+    path = os.path.abspath(path)
+    status = os.stat(path)
+    stamp = (status.st_size, status.st_mtime)
+    key = (kind, path)
+    entry = _cache.pop(key, None)
+    if (entry is None or entry[0] != stamp):
+        entry = (stamp, function(path))
+    _cache[key] = entry
+    while (len(_cache) > cacheSize):
+        _cache.popitem(last = False)
+    return entry[1]
+
+def clearCache():
+    _cache.clear()
+
+#********************************************************************************
+# reading the number of entries of a section
+#********************************************************************************
+
+# the number on the first line after position 'start' that is neither blank nor a comment, or None
+def _countAfter(data,start):
+    end = data.find("\n", start)
+    while (end != -1):
+        lineEnd = data.find("\n", end + 1)
+        if (lineEnd == -1):
+            lineEnd = len(data)
+        line = data[end + 1:lineEnd].strip()
+        if (line and not line.startswith("!")):
+            try:
+                return int(line.split()[0])
+            except ValueError:
+                return None
+        if (lineEnd == len(data)):
+            break
+        end = lineEnd
+    return None
+
+# the number of entries of the section 'name' in 'data' (a string or a memory map), or None
+def _findCount(data,name):
+    position = data.find(name)
+    while (position != -1):
+        # the header is the line holding the name, if the name is only preceded by '#' on it
+        lineStart = data.rfind("\n", 0, position) + 1
+        if (data[lineStart:position].replace(" ", "").replace("\t", "") == "#"):
+            return _countAfter(data, position)
+        position = data.find(name, position + len(name))
+    return None
+
+def _readCounts(names):
+    def read(path):
+        if (os.path.getsize(path) == 0):
+            return dict([(name, None) for name in names])
+        f = open(path, "rb")
+        try:
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            try:
+                return dict([(name, _findCount(data, name)) for name in names])
+            finally:
+                data.close()
+        finally:
+            f.close()
+    return read
+
+# the number of entries of each of the sections 'names' in the MCF 'path': name -> number, or None
+# if the section (or its number) is missing
+def sectionCounts(path,names=("Fragment_Info",)):
+    names = tuple(names)
+    return dict(_cached(("counts",) + names, path, _readCounts(names)))
+
+# the number of fragments of the molecule in the MCF 'path', or None if it could not be identified
+def fragmentCount(path):
+    return sectionCounts(path, ("Fragment_Info",))["Fragment_Info"]
@@ -0,0 +1,359 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# A typed, schema-driven store for the parameters entered in the Cassandra Input File Editor.
+#
+# The schema declares, for every dictionary keyword used by the form (e.g. "temperature",
+# "s1 1-4 vdw", "prob vol b1"), the type of its value, its units, the species and/or box it
+# refers to, and the section of the Cassandra input file to which it belongs.  Keywords that
+# refer to a species or a box are declared once, as a pattern (e.g. "max nmols s%(species)s"),
+# and match any species or box number.
+#
+# ParameterStore is a dictionary of the text entered for each keyword (so it can be used
+# wherever the form used a plain dictionary), which in addition:
+#   - parses each value once, when it is written; store.value(key) returns the parsed value,
+#     and store.errors() the keywords whose text could not be parsed
+#   - notifies the functions subscribed to a keyword, or to a section, when a value changes;
+#     the subscribers are found by dictionary lookup, whatever the number of keywords
+#   - counts the changes made to each section (store.version(section)), so that anything derived
+#     from a section (e.g. its text in the input file) can be cached until the section changes
+#   - groups many changes into a transaction (with store.transaction(): ...), whose subscribers are
+#     notified once, when it ends, rather than once per change
+
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+
+#********************************************************************************
+# the schema
+#********************************************************************************
+
+# the declaration of a single keyword
+class Parameter(object):
+    __slots__ = ("name", "type", "units", "section", "species", "box")
+
+    def __init__(self,name,type,section,units=None,species=None,box=None):
+        self.name = name
+        self.type = type
+        self.units = units
+        self.section = section
+        self.species = species
+        self.box = box
+
+    # the value of 'text' as an instance of self.type; raises a ValueError if it is not one.
+    # values that are not strings (e.g., an integer computed by the form) are converted as they are
+    def parse(self,text):
+        if (self.type is str or isinstance(text, self.type)):
+            return text
+        if isinstance(text, basestring):
+            text = text.strip()
+        try:
+            return self.type(text)
+        except (TypeError, ValueError):
+            raise ValueError("%s: '%s' is not a valid %s" %(self.name, text, self.type.__name__))
+
+# the placeholders that may appear in the name of a declared keyword
+_placeholders = {"species": r"(?P<species>\d+)", "box": r"(?P<box>\d+)"}
+
+class Schema(object):
+    def __init__(self):
+        # keyword -> Parameter, for the keywords without placeholders, and for the keywords
+        # that have already been matched against a pattern
+        self._parameters = {}
+
+        # (compiled pattern, type, section, units), for the keywords with placeholders
+        self._patterns = []
+
+        # the sections, in order of declaration
+        self._sections = []
+
+    # declare the keyword 'name'; it may contain the placeholders %(species)s and %(box)s
+    def declare(self,name,type,section,units=None):
+        if section not in self._sections:
+            self._sections.append(section)
+        if ("%(" in name):
+            pattern = re.compile("^" + (re.escape(name).replace("\\%\\(", "%(").replace("\\)s", ")s") \
+                    %_placeholders) + "$")
+            self._patterns.append((pattern, type, section, units))
+        else:
+            self._parameters[name] = Parameter(name, type, section, units)
+
+    # the Parameter for the keyword 'name'.  Keywords that have not been declared are accepted as text,
+    # in the section None, so that the form can always store what it needs to
+    def lookup(self,name):
+        parameter = self._parameters.get(name)
+        if parameter is not None:
+            return parameter
+        parameter = Parameter(name, str, None)
+        for pattern, type, section, units in self._patterns:
+            match = pattern.match(name)
+            if match:
+                indices = match.groupdict()
+                species = indices.get("species")
+                box = indices.get("box")
+                parameter = Parameter(name, type, section, units, \
+                        species = (species and int(species)), box = (box and int(box)))
+                break
+        self._parameters[name] = parameter
+        return parameter
+
+    def sections(self):
+        return list(self._sections)
+
+# the schema of the Cassandra Input File Editor.  The sections are named after the sections
+# of the Cassandra input file; keywords that are not written to the input file are in "Editor"
+def cassandraSchema():
+    schema = Schema()
+    declare = schema.declare
+
+    declare("simDir", str, "Editor")
+    declare("displaySimDir", str, "Editor")
+
+    declare("runName", str, "Run_Name")
+    declare("ensemble", str, "Sim_Type")
+    declare("numSpecies", int, "Nbr_Species")
+
+    declare("box %(box)s vdw functional", str, "VDW_Style")
+    declare("box %(box)s vdw tail", str, "VDW_Style")
+    declare("box %(box)s spline on", float, "VDW_Style", "Angstrom")
+    declare("box %(box)s spline off", float, "VDW_Style", "Angstrom")
+    declare("box %(box)s logical", str, "VDW_Style")
+
+    declare("box %(box)s charge functional", str, "Charge_Style")
+    declare("box %(box)s charge method", str, "Charge_Style")
+    declare("box %(box)s charge cutoff", float, "Charge_Style", "Angstrom")
+    declare("box %(box)s ewald accuracy", float, "Charge_Style")
+
+    for bond in ("1-2", "1-3", "1-4", "1-N"):
+        declare("s%%(species)s %s vdw" %bond, float, "Intra_Scaling")
+        declare("s%%(species)s %s coul" %bond, float, "Intra_Scaling")
+
+    declare("mixingRule", str, "Mixing_Rule")
+    declare("rCutoffLow", float, "Rcutoff_Low", "Angstrom")
+    declare("pairStorage", str, "Pair_Energy")
+    declare("seed1", int, "Seed_Info")
+    declare("seed2", int, "Seed_Info")
+    declare("pressure", float, "Pressure_Info", "bar")
+    declare("chemPot S%(species)s", float, "Chemical_Potential_Info", "kJ/mol")
+
+    declare("box%(box)sShape", str, "Box_Info")
+    declare("box%(box)sLength", float, "Box_Info", "Angstrom")
+    for first in "xyz":
+        for second in "xyz":
+            declare(first + second + " %(box)s", float, "Box_Info", "Angstrom")
+
+    declare("temperature", float, "Temperature_Info", "K")
+
+    declare("prob translation", float, "Move_Probability_Info")
+    declare("prob trans s%(species)s b%(box)s", float, "Move_Probability_Info", "Angstrom")
+    declare("prob rotation", float, "Move_Probability_Info")
+    declare("prob rot s%(species)s b%(box)s", float, "Move_Probability_Info", "degrees")
+    declare("prob regrowth", float, "Move_Probability_Info")
+    declare("prob regrowth s%(species)s", float, "Move_Probability_Info")
+    declare("prob vol", float, "Move_Probability_Info")
+    declare("prob vol b%(box)s", float, "Move_Probability_Info", "Angstrom^3")
+    declare("prob insertion", float, "Move_Probability_Info")
+    declare("insertion method s%(species)s", str, "Move_Probability_Info")
+    declare("prob swap", float, "Move_Probability_Info")
+    declare("swap method s%(species)s", str, "Move_Probability_Info")
+
+    declare("trialInsertions", int, "CBMC_Info")
+    declare("rotationalBias", int, "CBMC_Info")
+    declare("trialOrientations", int, "CBMC_Info")
+    declare("cbmcCutoffBox%(box)s", float, "CBMC_Info", "Angstrom")
+
+    declare("MCF s%(species)s", str, "Molecule_Files")
+    declare("max nmols s%(species)s", int, "Molecule_Files")
+    declare("nfrags expected s%(species)s", int, "Fragment_Files")
+    # the fragment libraries of a species, one path per line
+    declare("fragment files s%(species)s", str, "Fragment_Files")
+
+    return schema
+
+#********************************************************************************
+# the store
+#********************************************************************************
+
+class ParameterStore(dict):
+    def __init__(self,schema):
+        dict.__init__(self)
+        self._schema = schema
+
+        # keyword -> parsed value, for the keywords whose text could be parsed
+        self._values = {}
+
+        # keyword -> error message, for the keywords whose text could not be parsed
+        self._errors = {}
+
+        # keyword (or section) -> list of functions, called as function(store, key) on a change
+        self._subscribers = {}
+        self._sectionSubscribers = {}
+
+        # functions called as function(store, keys) once per change, or once per transaction
+        self._changeSubscribers = []
+
+        # section -> the number of changes made to it
+        self._versions = {}
+
+        # the number of transactions that have begun and not ended, and the keywords changed during them
+        self._transactions = 0
+        self._pending = OrderedDict()
+
+    def schema(self):
+        return self._schema
+
+    def __setitem__(self,key,value):
+        if (dict.get(self, key, None) == value and key in self):
+            return
+        parameter = self._schema.lookup(key)
+        try:
+            self._values[key] = parameter.parse(value)
+            self._errors.pop(key, None)
+        except ValueError, error:
+            self._values.pop(key, None)
+            self._errors[key] = str(error)
+        dict.__setitem__(self, key, value)
+        self._changed(parameter)
+
+    def __delitem__(self,key):
+        dict.__delitem__(self, key)
+        self._values.pop(key, None)
+        self._errors.pop(key, None)
+        self._changed(self._schema.lookup(key))
+
+    # the dictionary methods that would otherwise bypass __setitem__ and __delitem__
+    def update(self,*args,**kwargs):
+        for key, value in dict(*args,**kwargs).iteritems():
+            self[key] = value
+
+    def setdefault(self,key,value=None):
+        if key not in self:
+            self[key] = value
+        return dict.__getitem__(self, key)
+
+    def pop(self,key,*default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = dict.__getitem__(self, key)
+        del self[key]
+        return value
+
+    def clear(self):
+        for key in self.keys():
+            del self[key]
+
+    # the parsed value of 'key'; 'default' if it has no value, or its text could not be parsed
+    def value(self,key,default=None):
+        return self._values.get(key, default)
+
+    # the text of 'key'; 'default' if it has no value
+    def text(self,key,default=""):
+        if key in self:
+            return str(dict.__getitem__(self, key))
+        return default
+
+    # keyword -> error message, for the values that could not be parsed
+    def errors(self):
+        return dict(self._errors)
+
+    # the keywords of the section 'section' that have a value
+    def keysOf(self,section):
+        lookup = self._schema.lookup
+        return [key for key in self if lookup(key).section == section]
+
+    # the number of changes made to the section 'section' so far
+    def version(self,section):
+        return self._versions.get(section, 0)
+
+    # call function(store, key) whenever the value of 'key' changes
+    def subscribe(self,key,function):
+        self._subscribers.setdefault(key, []).append(function)
+
+    # call function(store, key) whenever the value of any keyword in 'section' changes
+    def subscribeSection(self,section,function):
+        self._sectionSubscribers.setdefault(section, []).append(function)
+
+    # call function(store, keys) after every change, with the keyword that changed, or at the end of a
+    # transaction, with all of the keywords that changed during it
+    def subscribeChanges(self,function):
+        self._changeSubscribers.append(function)
+
+    def unsubscribeChanges(self,function):
+        if function in self._changeSubscribers:
+            self._changeSubscribers.remove(function)
+
+    def unsubscribe(self,key,function):
+        functions = self._subscribers.get(key, [])
+        if function in functions:
+            functions.remove(function)
+
+    def unsubscribeSection(self,section,function):
+        functions = self._sectionSubscribers.get(section, [])
+        if function in functions:
+            functions.remove(function)
+
+    # the changes made within a transaction are only notified when it ends: each changed section's
+    # version is then increased once, the subscribers of each changed keyword and section are called
+    # once, and the change subscribers once with all of the changed keywords.  Transactions may be
+    # nested; the outermost one notifies
+    @contextmanager
+    def transaction(self):
+        self._transactions += 1
+        try:
+            yield self
+        finally:
+            self._transactions -= 1
+            if (self._transactions == 0):
+                self._notifyPending()
+
+    def _changed(self,parameter):
+        if (self._transactions > 0):
+            self._pending.pop(parameter.name, None)
+            self._pending[parameter.name] = parameter
+            return
+        section = parameter.section
+        self._versions[section] = self._versions.get(section, 0) + 1
+        for function in self._subscribers.get(parameter.name, ()):
+            function(self, parameter.name)
+        for function in self._sectionSubscribers.get(section, ()):
+            function(self, parameter.name)
+        for function in list(self._changeSubscribers):
+            function(self, [parameter.name])
+
+    def _notifyPending(self):
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = OrderedDict()
+
+        # the last keyword changed in each section
+        sections = OrderedDict()
+        for name, parameter in pending.iteritems():
+            sections.pop(parameter.section, None)
+            sections[parameter.section] = name
+        for section in sections:
+            self._versions[section] = self._versions.get(section, 0) + 1
+        for name in pending:
+            for function in self._subscribers.get(name, ()):
+                function(self, name)
+        for section, name in sections.iteritems():
+            for function in self._sectionSubscribers.get(section, ()):
+                function(self, name)
+        keys = list(pending.keys())
+        for function in list(self._changeSubscribers):
+            function(self, keys)
@@ -0,0 +1,282 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# Parameter sweeps for state-point studies: expands a sweep specification into parameter sets,
+# and writes one simulation directory (holding the Cassandra input file) for each of them.
+#
+# Usage:
+#       python sweep.py [--output-dir DIRECTORY] [--processes N] [--count] specification.json
+#
+# A sweep specification (JSON, or YAML if PyYAML is installed) looks like
+#       {"base": {"runName": "isotherm", "ensemble": "GCMC", "numSpecies": "1", ...},
+#        "sweep": {"temperature": {"start": 250, "stop": 350, "step": 10},
+#                  "chemPot S1": {"start": -40.0, "stop": -20.0, "num": 41},
+#                  "seed1": {"values": [1234, 5678]}},
+#        "mode": "product"}
+# where "base" holds the values shared by all points, using the dictionary keywords of the editor, and
+# "sweep" the values of the keywords that vary:
+#   {"values": [...]}                           the listed values
+#   {"start": a, "stop": b, "step": s}          a, a+s, a+2s, ... up to and including b
+#   {"start": a, "stop": b, "num": n}           n evenly spaced values from a to b
+#   {"start": a, "stop": b}                     (Latin hypercube only) any value from a to b
+# With "mode": "product" (the default), every combination of the values is a point.  With
+# "mode": "latin", "samples" points are drawn as a Latin hypercube: the range of each keyword is
+# divided into "samples" strata, and each stratum of each keyword is used by exactly one point;
+# "seed" makes the draw reproducible.
+#
+# The points are generated one at a time, and handed to the worker processes in batches, so that the
+# memory used does not depend on the number of points (a Latin hypercube keeps one shuffle of its strata
+# for each keyword).  Each point is applied to the editor's form as
+# in batchInput.py (so hidden values are discarded), and its input file is rendered; the simulation
+# directory is named after the hash of the input file, so points leading to the same input file (e.g.,
+# a pressure sweep in an ensemble without a pressure) share one directory, and a sweep that is run again
+# only writes the directories that do not exist yet.
+
+import os, sys, json, errno, random, hashlib, itertools, multiprocessing
+
+import batchInput
+
+# the number of points handed to the worker processes at a time
+batchSize = 1000
+
+#********************************************************************************
+# the values of a single keyword
+#********************************************************************************
+
+# the text of a value, as it would have been typed into the editor
+def formatValue(value):
+    if isinstance(value, float):
+        return "%.10g" %(value)
+    return batchInput.asText(value)
+
+class Axis(object):
+    def __init__(self,key,specification):
+        self.key = key
+        self.values = None
+        self.lower = None
+        self.upper = None
+        if "values" in specification:
+            self.values = list(specification["values"])
+        elif ("start" in specification and "stop" in specification):
+            start = specification["start"]
+            stop = specification["stop"]
+            if "step" in specification:
+                step = specification["step"]
+                if (step == 0 or (stop - start) * step < 0):
+                    raise ValueError("%s: the step does not lead from start to stop" %(key))
+                count = int((stop - start) / float(step) + 1e-9) + 1
+                # ranges of integers stay integers (e.g., seeds)
+                if all([isinstance(value, (int, long)) for value in (start, stop, step)]):
+                    self.values = [start + index * step for index in range(count)]
+                else:
+                    self.values = [start + index * float(step) for index in range(count)]
+            elif "num" in specification:
+                count = int(specification["num"])
+                if (count == 1):
+                    self.values = [start]
+                else:
+                    self.values = [start + index * (stop - start) / float(count - 1) for index in range(count)]
+            else:
+                # a continuous range; only a Latin hypercube can sample it
+                self.lower = float(start)
+                self.upper = float(stop)
+        else:
+            raise ValueError("%s: expected either 'values', or 'start' and 'stop'" %(key))
+        if (self.values is not None and not self.values):
+            raise ValueError("%s: no values" %(key))
+
+    def isContinuous(self):
+        return (self.values is None)
+
+    # the value in the stratum 'stratum' of 'strata'; 'offset' (0 <= offset < 1) is its position in the stratum
+    def sample(self,stratum,strata,offset):
+        if self.isContinuous():
+            return self.lower + (stratum + offset) / float(strata) * (self.upper - self.lower)
+        return self.values[stratum * len(self.values) // strata]
+
+#********************************************************************************
+# the expansion of a sweep into points
+#********************************************************************************
+
+def readSpecification(path):
+    if path.lower().endswith((".yaml", ".yml")):
+        return batchInput.readYAML(open(path, "rb"))
+    return json.load(open(path, "rb"))
+
+def axesOf(specification):
+    sweep = specification.get("sweep", {})
+    return [Axis(batchInput.asText(key), sweep[key]) for key in sorted(sweep.keys())]
+
+# the number of points of the sweep
+def countPoints(specification):
+    axes = axesOf(specification)
+    if (specification.get("mode", "product") == "latin"):
+        return int(specification["samples"])
+    count = 1
+    for axis in axes:
+        if axis.isContinuous():
+            raise ValueError("%s: a range without a step or number of values needs the 'latin' mode" %(axis.key))
+        count *= len(axis.values)
+    return count
+
+# every combination of the values of the axes
+def productPoints(axes):
+    for axis in axes:
+        if axis.isContinuous():
+            raise ValueError("%s: a range without a step or number of values needs the 'latin' mode" %(axis.key))
+    keys = [axis.key for axis in axes]
+    for values in itertools.product(*[axis.values for axis in axes]):
+        yield zip(keys, values)
+
+# 'samples' points of a Latin hypercube.  The strata of each axis are shuffled independently of the other
+# axes; point i uses the i-th stratum of each shuffle
+def latinPoints(axes,samples,seed):
+    generator = random.Random(seed)
+    permutations = []
+    for axis in axes:
+        strata = range(samples)
+        generator.shuffle(strata)
+        permutations.append(strata)
+    for index in xrange(samples):
+        point = []
+        for axis, strata in zip(axes, permutations):
+            point.append((axis.key, axis.sample(strata[index], samples, generator.random())))
+        yield point
+
+# the parameter sets of the sweep, one at a time
+def expand(specification):
+    base = dict([(batchInput.asText(key), batchInput.asText(value)) for key, value in \
+            specification.get("base", {}).iteritems() if value is not None])
+    axes = axesOf(specification)
+    mode = specification.get("mode", "product")
+    if (mode == "product"):
+        points = productPoints(axes)
+    elif (mode == "latin"):
+        points = latinPoints(axes, int(specification["samples"]), specification.get("seed"))
+    else:
+        raise ValueError("unknown sweep mode: %s" %(mode))
+    for point in points:
+        parameters = dict(base)
+        for key, value in point:
+            parameters[key] = formatValue(value)
+        yield parameters
+
+#********************************************************************************
+# the worker processes
+#********************************************************************************
+
+# write the simulation directory of a single point; 'task' is (parameters, output directory).
+# returns (the directory, or None if the point was rejected, whether it was written now, the errors)
+def writePoint(task):
+    parameters, outputDirectory = task
+    if batchInput.editor is None:
+        batchInput.initializeWorker()
+    editor = batchInput.editor
+    dropped, errors = batchInput.applyParameterSet(editor, parameters)
+    if not errors:
+        errors = editor.inputFileGenerator.errors()
+    if errors:
+        return None, False, errors
+
+    text = editor.inputFileGenerator.render()
+    directory = os.path.join(outputDirectory, hashlib.sha1(text).hexdigest()[:16])
+
+    # creating the directory is what claims the point; if it exists, the same input file has been written
+    try:
+        os.mkdir(directory)
+    except OSError, error:
+        if (error.errno == errno.EEXIST):
+            return directory, False, []
+        raise
+
+    # the sections are still cached from render(), so this only writes them out
+    editor.inputFileGenerator.write(os.path.join(directory, (editor.myDict.text("runName") or "sweep") + ".inp"))
+    f = open(os.path.join(directory, "parameters.json"), "w")
+    json.dump(parameters, f, indent = 2, sort_keys = True)
+    f.close()
+    return directory, True, []
+
+# batches of 'size' items of 'iterable'
+def batches(iterable,size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+if __name__ == "__main__":
+    options = {"output-dir": os.getcwd(), "processes": multiprocessing.cpu_count(), "count": False}
+    arguments = sys.argv[1:]
+    paths = []
+    while arguments:
+        argument = arguments.pop(0)
+        if argument in ("--output-dir", "--processes"):
+            if not arguments:
+                raise ValueError("%s requires a value" %(argument))
+            options[argument[2:]] = arguments.pop(0)
+        elif (argument == "--count"):
+            options["count"] = True
+        elif argument in ("-h", "--help"):
+            print "usage: python sweep.py [--output-dir DIRECTORY] [--processes N] [--count] specification.json"
+            sys.exit(0)
+        else:
+            paths.append(argument)
+    if (len(paths) != 1):
+        raise ValueError("expected a single sweep specification")
+
+    specification = readSpecification(paths[0])
+    if options["count"]:
+        print countPoints(specification)
+        sys.exit(0)
+
+    outputDirectory = os.path.abspath(options["output-dir"])
+    if not os.path.isdir(outputDirectory):
+        os.makedirs(outputDirectory)
+
+    tasks = ((parameters, outputDirectory) for parameters in expand(specification))
+    processes = max(1, int(options["processes"]))
+    pool = None
+    if (processes > 1):
+        pool = multiprocessing.Pool(processes, batchInput.initializeWorker)
+
+    written = 0
+    duplicates = 0
+    rejected = 0
+    try:
+        for batch in batches(tasks, batchSize):
+            if pool is None:
+                results = map(writePoint, batch)
+            else:
+                results = pool.map(writePoint, batch, max(1, len(batch) // (4 * processes)))
+            for (parameters, directory), (path, new, errors) in zip(batch, results):
+                if errors:
+                    rejected += 1
+                    for error in errors:
+                        print "%s: %s" %(json.dumps(parameters, sort_keys = True), error)
+                elif new:
+                    written += 1
+                else:
+                    duplicates += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    print "Wrote %d simulation director%s to %s; %d duplicate point(s), %d point(s) rejected" \
+            %(written, (written == 1) and "y" or "ies", outputDirectory, duplicates, rejected)
+    if rejected:
+        sys.exit(1)
@@ -88,15 +88,155 @@
 
 
 # import the needed modules
-import wx, os
-
-# global dictionary in which we store data
-myDict = {}
+import os, time, weakref, json, tempfile
+from collections import OrderedDict
+
+# the GUI can also be built and driven without a display (e.g., for scripted sessions in batch jobs);
+# to do so, set the environment variable CASSANDRA_GUI_BACKEND to "headless" before importing this file.
+# in that case, headless.py takes the place of wx, and wx is never imported
+if (os.environ.get("CASSANDRA_GUI_BACKEND","wx") == "headless"):
+    import headless as wx
+else:
+    import wx
+    import wx.grid
+
+# global dictionary in which we store data.  It is a ParameterStore (see parameterStore.py): it holds
+# the text entered for each dictionary keyword, and also parses it according to the Cassandra schema;
+# use myDict.value(keyword) for the parsed value, and myDict.text(keyword) for the text
+from parameterStore import ParameterStore, cassandraSchema
+from inputFileGenerator import InputFileGenerator
+import mcfParser
+from workerPool import WorkerPool
+from directoryCatalog import DirectoryCatalog
+import fragmentFiles
+import formSpec
+myDict = ParameterStore(cassandraSchema())
+
+# when True, the default widget functions print each value they store; when False (the "quiet" mode),
+# nothing is written to stdout while the user types.  set the environment variable CASSANDRA_GUI_QUIET
+# to start in quiet mode
+verbose = (os.environ.get("CASSANDRA_GUI_QUIET") is None)
+
+# print the given values (as the print statement would) unless we are in quiet mode
+def echo(*values):
+    if verbose:
+        print " ".join([str(value) for value in values])
+
+# the text stored in myDict for 'value': values read from a session file (by json) are unicode, and
+# are stored encoded as UTF-8, as the values typed into the widgets are
+def storeText(value):
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    return str(value)
+
+# when the value of a text widget is stored (i.e., when its function is called):
+#   "keystroke" - on every change of its text (i.e., on every keystroke)
+#   "debounce"  - once the user has stopped typing for textCommitDelay milliseconds
+#   "focus"     - when the widget loses the focus, or the user presses Enter (these widgets are given
+#                 the wx.TE_PROCESS_ENTER style)
+# with "debounce", a pending value is also stored at once when the widget loses the focus.
+# this is the default for all text widgets; a widget can choose its own with Widget(..., commit = "focus")
+textCommitPolicy = "keystroke"
+textCommitDelay = 300
+
+# how the events of the widgets reach their functions:
+#   "delegated" - each panel binds each event type once; its EventDispatcher then looks up the functions of
+#                 the widget that sent the event by the widget's id
+#   "direct"    - the function of every widget (and masterFunction, for masters) is bound on its panel
+# with "delegated", wx has a handful of bindings per panel to search for each event instead of hundreds
+eventDispatch = "delegated"
+
+# when True (and eventDispatch is "delegated"), the number of calls and the time spent in each function
+# called by an EventDispatcher are recorded; see dispatchTimings().  Set the environment variable
+# CASSANDRA_GUI_DISPATCH_TIMING to start with timing on
+dispatchTiming = (os.environ.get("CASSANDRA_GUI_DISPATCH_TIMING") is not None)
+
+# when True, a panel laid out by its sizer remembers where the sizer placed its widgets, for the set of
+# widgets then visible and the size of the panel; when the same widgets are visible at the same size again
+# (e.g., the user switches back to an ensemble seen before), the positions are restored instead of
+# laying the panel out again.  See wxPanel.Layout()
+# The remembered positions assume that the size of each control is fixed once it is created: the form
+# never changes the choices, labels or fonts of its controls afterwards (and the grids are given a size
+# of their own, whatever their number of rows).  Code that does change them must turn layoutCaching off
+layoutCaching = True
+
+# the number of layouts a panel remembers; beyond this, it forgets all of them and starts over
+layoutCacheSize = 64
 
 #********************************************************************************
 # Custom classes wrapping wxWidgets objects
 #********************************************************************************
 
+# a register of the instances of one of the classes below (e.g., Widget._register).
+# instances are held by weak reference, so the register never keeps an instance alive: an instance
+# leaves the register when it is disposed of (see Frame.dispose()) or garbage collected.
+# iterating over a register yields the live instances in the order in which they were registered;
+# instances may also be looked up by the value of an attribute, e.g. find("_dictKwarg", "temperature")
+class Register(object):
+
+    def __init__(self):
+        # id(instance) -> weak reference to the instance, in order of registration
+        self._refs = OrderedDict()
+
+        # attribute name -> {attribute value: [instances]}; built on demand by find(), and
+        # discarded whenever the register changes (or invalidate() is called)
+        self._indexes = {}
+
+    def append(self,obj):
+        key = id(obj)
+        self._refs[key] = weakref.ref(obj, lambda ref, key = key: self._discard(key, ref))
+        self._indexes = {}
+
+    def remove(self,obj):
+        key = id(obj)
+        ref = self._refs.get(key)
+        if (ref is not None and ref() is obj):
+            del self._refs[key]
+            self._indexes = {}
+
+    # called when a registered instance is garbage collected
+    def _discard(self,key,ref):
+        if (self._refs.get(key) is ref):
+            del self._refs[key]
+            self._indexes = {}
+
+    def __iter__(self):
+        for ref in list(self._refs.values()):
+            obj = ref()
+            if obj is not None:
+                yield obj
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __contains__(self,obj):
+        ref = self._refs.get(id(obj))
+        return (ref is not None and ref() is obj)
+
+    def __getitem__(self,index):
+        return list(self)[index]
+
+    # the registered instances whose attribute 'attribute' is equal to 'value'
+    def find(self,attribute,value):
+        index = self._indexes.get(attribute)
+        if index is None:
+            index = {}
+            for obj in self:
+                index.setdefault(getattr(obj, attribute, None), []).append(obj)
+            self._indexes[attribute] = index
+        return list(index.get(value, ()))
+
+    # the first registered instance whose attribute 'attribute' is equal to 'value', or None
+    def findOne(self,attribute,value):
+        found = self.find(attribute, value)
+        if found:
+            return found[0]
+        return None
+
+    # to be called when an attribute used with find() changes value
+    def invalidate(self):
+        self._indexes = {}
+
 class wxFrame(wx.Frame):
     # note to others: we pass another class (an instance of Frame) to this wx.Frame derived class;
     # the ambiguity of parent in the class __init__ vs the wx.Frame.__init__ is due to parent in the
@@ -110,14 +250,20 @@ class wxFrame(wx.Frame):
     def __init__(self,sibling):
         wx.Frame.__init__(self,parent=sibling._parent,title=sibling._title)
         self.SetInitialSize(sibling._size)
+        if sibling._statusBar:
+            self.CreateStatusBar()
+
+        # when the frame is closed, the objects on it are disposed of
+        self.Bind(wx.EVT_CLOSE, sibling.onClose)
 
 # we define our own Frame() class, because we don't instantly want to create an actual wx.Frame object yet
-class Frame:
+class Frame(object):
 
     # a static class object we can access using Frame._register[index] - we don't access this via an instance of
     # the class; we can also iterate over it, looking for instances with specific data
-    _register = []
+    _register = Register()
     _typeName = "Frame"
+    __slots__ = ("_parent", "_title", "_size", "_statusBar", "_children", "_obj", "__weakref__")
 
       # implicit argument self
       # parent: typically None, but if a frame is spawned dynamically it may be useful to pass the relevant object
@@ -127,14 +273,27 @@ class Frame:
     def __init__(self, parent, title, size, **kwargs):
         self._parent = parent;
         self._title = title;
-        self._size = size;
+        self._size = tuple(size);
+
+        # if statusBar is True, the frame has a status bar (see showStatus())
+        self._statusBar = kwargs.get("statusBar",False)
 
         # an instance variable holding other instances that are children of this instance
         self._children = []
 
+        # this will be instantiated by initObj()
+        self._obj = None
+
 
     def initObj(self):
 
+        # all master/slave relationships are known by now; compile them (this also checks for cycles),
+        # and precompute the visibility tables
+        if not Widget._graphCompiled:
+            compileDependencyGraph()
+        for table in VisibilityTable._tables:
+            table._upToDate()
+
         # make an instance of the frame, that is a derived class of the wx.Frame class
         self._obj = wxFrame(self)
         Frame._register.append(self)
@@ -146,6 +305,22 @@ class Frame:
         # we have now instantiated all of the objects on this frame; show the frame
         self._obj.Show()
 
+    # dispose of this frame: the descriptors of all objects on it are removed from the registers and released,
+    # and the wx frame (with all of the wx objects on it) is destroyed
+    def dispose(self):
+        for obj in self._children:
+            obj.dispose()
+        self._children = []
+        Frame._register.remove(self)
+
+        if (self._obj is not None):
+            obj = self._obj
+            self._obj = None
+            obj.Destroy()
+
+    def onClose(self,event):
+        self.dispose()
+
 
 # a wxNotebook class
 class wxNotebook(wx.Notebook):
@@ -174,13 +349,14 @@ class wxNotebook(wx.Notebook):
         sibling._parent._obj.SetSizer(self.NBSizer)
 
 # our notebook class that collates information before making a wx.Notebook notebook
-class Notebook:
+class Notebook(object):
     # the implicit self argument
     # parent panel object
     # the pages to be added to this notebook
     # and the names of the pages
-    _register = []
+    _register = Register()
     _typeName = "Notebook"
+    __slots__ = ("_parent", "_children", "_pages", "_lazy", "_obj", "NBSizer", "__weakref__")
 
     def __init__(self,parent, **kwargs):
         # instantiate the notebook
@@ -191,6 +367,15 @@ class Notebook:
         # append this instance to a list belonging to the parent, so that the parent knows
         parent._children.append(self);
 
+        # if lazy is True, a page (and all of the widgets on it) is only constructed the first time
+        # its tab is selected; until then, an empty placeholder panel is displayed in its place.
+        # the first page is always constructed, since it is what the user sees first.
+        self._lazy = kwargs.get("lazy",False)
+
+        # these will be instantiated by initObj()
+        self._obj = None
+        self.NBSizer = None
+
     def initObj(self):
 
         # our wxNotebook method initiates the instantiation of the self._children objects
@@ -200,14 +385,54 @@ class Notebook:
         # i.e., we pass this instance of Notebook as the 'sibling' argument (the wxNotebook 'self' is implicit)
         ##self._obj = wxNotebook(self)
         for index, item in enumerate(self._children):
-            item.initObj();
-            self._pages.append(item._obj);
+            if (self._lazy and index > 0):
+                # a placeholder page; the real page is later placed on it by buildPage()
+                placeholder = wx.Panel(self._obj)
+                placeholder.SetSizer(wx.BoxSizer())
+                self._pages.append(placeholder);
+            else:
+                item.initObj();
+                self._pages.append(item._obj);
             self._obj.AddPage(self._pages[index], item._name);
         self.NBSizer = wx.BoxSizer();
         self.NBSizer.Add(self._obj, 1, wx.EXPAND)
         self._parent._obj.SetSizer(self.NBSizer)
         Notebook._register.append(self)
 
+        if (self._lazy):
+            self._obj.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self.OnPageChanged)
+
+    # construct the page at the given index, if it has not been constructed already
+    def buildPage(self,index):
+        item = self._children[index]
+        if (item._obj is not None):
+            return
+
+        # the page is built directly on top of its placeholder, so the wx.Notebook itself is left untouched
+        placeholder = self._pages[index]
+        placeholder.Freeze()
+        item.initObj(placeholder)
+        placeholder.GetSizer().Add(item._obj, 1, wx.EXPAND)
+        placeholder.Layout()
+        placeholder.Thaw()
+
+    # remove this notebook and its pages from the registers; the wx objects are destroyed along with the frame
+    def dispose(self):
+        for obj in self._children:
+            obj.dispose()
+        self._children = []
+        self._pages = []
+        Notebook._register.remove(self)
+        self._obj = None
+        self.NBSizer = None
+
+    def OnPageChanged(self,event):
+        # page changed events from nested notebooks propagate up to this notebook as well;
+        # we only build pages that belong to this notebook
+        if (event.GetEventObject() is self._obj):
+            self.buildPage(event.GetSelection())
+        event.Skip()
+
     def customBehavior():
         pass
 
@@ -221,8 +446,20 @@ class Notebook:
 
 
 class wxPanel(wx.Panel):
-    def __init__(self,sibling):
-        wx.Panel.__init__(self,parent=sibling._parent._obj);
+    # parentObj is only given when the panel is placed somewhere other than on its parent's wx object;
+    # e.g., a lazily constructed notebook page is placed on its placeholder page
+    def __init__(self,sibling,parentObj=None):
+        if (parentObj is None):
+            parentObj = sibling._parent._obj
+        wx.Panel.__init__(self,parent=parentObj);
+
+        # the Panel instance (held weakly, as it holds this object), for its bitset of visible widgets
+        self._sibling = weakref.ref(sibling)
+
+        # (visible widgets, client size) -> the rectangles of self._laidOut; see Layout()
+        self._layouts = {}
+        self._laidOut = []
+
         self._needsSizer = True;
         for obj in sibling._children:
             if obj._typeName == "Notebook":
@@ -232,6 +469,13 @@ class wxPanel(wx.Panel):
             self.grid = wx.GridBagSizer(hgap=5,vgap=5);
             self.SetSizer(self.grid);
 
+        # with delegated dispatch, the functions of the widgets are registered with the dispatcher rather
+        # than bound one by one; it binds each event type on the panel once
+        if (eventDispatch == "delegated"):
+            self._dispatcher = EventDispatcher(self)
+        else:
+            self._dispatcher = None
+
         # call the init methods of the objects, which then places wxWidget objects in the self._widgets variable for
         # each Widget class instance
         # a panel holding a notebook will never have a widget - its a dummy panel
@@ -240,31 +484,197 @@ class wxPanel(wx.Panel):
             if child._typeName == "Widget":
                 child.initObj(self);
                 self.grid.Add(child._obj, pos=child._pos, span=child._span, flag=child._gridFlags)
+                self._laidOut.append(child._obj)
                 # if the base child widget object is a label, it won't have a function
                 if ((child._function is not None) and (child._wxEvt is not None)):
-                    self.Bind(child._wxEvt,child._function,child._obj)
+                    policy = child._commit or textCommitPolicy
+                    if (child._widgetType == "text" and policy != "keystroke"):
+                        TextCommitter(child._function, child._obj, policy, textCommitDelay).bind(self, self._dispatcher, \
+                                child._dictKwarg or child._name)
+                    elif (self._dispatcher is not None):
+                        self._dispatcher.add(child._wxEvt, child._obj, child._function, child._dictKwarg or child._name)
+                    else:
+                        self.Bind(child._wxEvt,child._function,child._obj)
                 if child._label is not None:
                     # we know that this will be a label;
                     child._labelObj = wx.StaticText(self,label=child._label)
                     self.grid.Add(child._labelObj,child._labelPos, child._labelSpan)
+                    self._laidOut.append(child._labelObj)
                 if (child._hasSlave):
-                    self.Bind(child._wxEvt, child.masterFunction, child._obj)
+                    if (self._dispatcher is not None):
+                        self._dispatcher.add(child._wxEvt, child._obj, child.masterFunction, child._dictKwarg or child._name)
+                    else:
+                        self.Bind(child._wxEvt, child.masterFunction, child._obj)
                 # some objects are initially hidden; here, we hide them.
-                if (child._initHide):
+                # if this panel was constructed lazily, a master may already have told the widget
+                # whether it should be displayed; in that case, its instructions take precedence
+                if (child._received):
+                    hideThis = (child._hideMask != 0)
+                else:
+                    hideThis = child._initHide
+                if (hideThis):
                     child._obj.Hide()
                     if (child._label is not None):
                         child._labelObj.Hide()
         self.Layout()
 
+    # lay the panel out; with layoutCaching, the sizer is only used the first time a combination of visible
+    # widgets and panel size is seen, and the positions it then gives the widgets are restored afterwards
+    def Layout(self):
+        sibling = self._sibling()
+        if (not layoutCaching or not self._needsSizer or sibling is None):
+            return wx.Panel.Layout(self)
+        key = (sibling._visibleMask, tuple(self.GetClientSize()))
+        rects = self._layouts.get(key)
+        if rects is not None:
+            for obj, rect in zip(self._laidOut, rects):
+                obj.SetRect(rect)
+            return True
+        result = wx.Panel.Layout(self)
+        if (len(self._layouts) >= layoutCacheSize):
+            self._layouts = {}
+        self._layouts[key] = [obj.GetRect() for obj in self._laidOut]
+        return result
+
+# the table of a grid widget.  The cells are not kept by the grid: each is read from the parameter store
+# when the grid draws it, and written to the store when the user edits it, so a grid of a hundred species
+# costs a single native control, like a grid of one.  Row r holds species r+1; each column is given as
+# (label, keyword pattern, choices, action), where the pattern contains %(species)s (e.g. "prob regrowth
+# s%(species)s"), and choices is None for a text column.  The cells of a column with an action are
+# read only: the action, a function, is called with the grid and the species of the row when the cell is
+# double-clicked (see gridCellFunction), and stores the value itself.  The number of rows follows the value
+# of 'countKeyword' in the store (e.g. "numSpecies"), up to 'maxRows'
+class StoreGridTable(wx.grid.PyGridTableBase):
+    def __init__(self,store,columns,countKeyword,maxRows):
+        wx.grid.PyGridTableBase.__init__(self)
+        self._store = store
+        self._columns = [tuple(column) for column in columns]
+        self._countKeyword = countKeyword
+        self._maxRows = maxRows
+        self._numberOfRows = self._countRows()
+
+        # True while the table writes to the store, so that it is not redrawn for its own writes
+        self._writing = False
+
+        # column -> wx.grid.GridCellAttr, for the columns with choices or an action
+        self._attrs = {}
+
+        # redraw the grid when the values of its columns are changed elsewhere (e.g., a session is restored)
+        lookup = store.schema().lookup
+        self._sections = []
+        for label, pattern, choices, action in self._columns:
+            section = lookup(pattern %{"species": 1}).section
+            if section not in self._sections:
+                self._sections.append(section)
+        for section in self._sections:
+            store.subscribeSection(section, self._onValueChange)
+        store.subscribe(countKeyword, self._onCountChange)
+
+    # stop following the store; called when the grid widget is disposed of
+    def detach(self):
+        for section in self._sections:
+            self._store.unsubscribeSection(section, self._onValueChange)
+        self._store.unsubscribe(self._countKeyword, self._onCountChange)
+
+    def _countRows(self):
+        count = self._store.value(self._countKeyword)
+        if not isinstance(count, int):
+            return 0
+        return max(0, min(count, self._maxRows))
+
+    def _keyword(self,row,col):
+        return self._columns[col][1] %{"species": row + 1}
+
+    def _onCountChange(self,store,key):
+        old = self._numberOfRows
+        new = self._countRows()
+        self._numberOfRows = new
+        view = self.GetView()
+        if (view is None or new == old):
+            return
+        if (new > old):
+            message = wx.grid.GridTableMessage(self, wx.grid.GRIDTABLE_NOTIFY_ROWS_APPENDED, new - old)
+        else:
+            message = wx.grid.GridTableMessage(self, wx.grid.GRIDTABLE_NOTIFY_ROWS_DELETED, new, old - new)
+        view.ProcessTableMessage(message)
+        view.ForceRefresh()
+
+    def _onValueChange(self,store,key):
+        view = self.GetView()
+        if (view is not None and not self._writing):
+            view.ForceRefresh()
+
+    def GetNumberRows(self):
+        return self._numberOfRows
+
+    def GetNumberCols(self):
+        return len(self._columns)
+
+    def GetValue(self,row,col):
+        return self._store.text(self._keyword(row, col))
+
+    # as defaultTextFunction does, an empty cell removes its keyword from the store
+    def SetValue(self,row,col,value):
+        keyword = self._keyword(row, col)
+        value = storeText(value)
+        self._writing = True
+        try:
+            if value:
+                self._store[keyword] = value
+            elif keyword in self._store:
+                del self._store[keyword]
+        finally:
+            self._writing = False
+        echo(keyword, value)
+
+    def IsEmptyCell(self,row,col):
+        return (self._keyword(row, col) not in self._store)
+
+    def GetRowLabelValue(self,row):
+        return "Species %d" %(row + 1)
+
+    def GetColLabelValue(self,col):
+        return self._columns[col][0]
+
+    # the function called when a cell of column 'col' is double-clicked, or None
+    def action(self,col):
+        return self._columns[col][3]
+
+    # the cells of a column with choices are edited with a choice editor; those of a column with an
+    # action are not edited at all
+    def GetAttr(self,row,col,kind):
+        label, pattern, choices, action = self._columns[col]
+        if (choices is None and action is None):
+            return None
+        attr = self._attrs.get(col)
+        if attr is None:
+            attr = wx.grid.GridCellAttr()
+            if action is not None:
+                attr.SetReadOnly(True)
+            else:
+                attr.SetEditor(wx.grid.GridCellChoiceEditor(list(choices)))
+            self._attrs[col] = attr
+        # wxPython hands the reference to the grid
+        attr.IncRef()
+        return attr
+
+# the indices of the bits set in 'bitset', lowest first
+def bitIndices(bitset):
+    while bitset:
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
+
 # in this class, we collate all the information we'll need to make a well-defined wx.Panel object
-class Panel:
+class Panel(object):
     # what do we require from the user to instantiate a base panel object?
     # make an iterable list of panel instances; make sure methods only access this /after/
     # the main frame has added all objects (i.e., at the end of the user's GUI script!)
-    _register = []
+    _register = Register()
 
     # all instances of this class have the _typeName = "Panel"
     _typeName = "Panel"
+    __slots__ = ("_widgets", "_visibleMask", "_parent", "_children", "_name", "_obj", "__weakref__")
 
     def __init__(self, parent,**kwargs):
 
@@ -273,6 +683,10 @@ class Panel:
         # directly from here! Very convenient.
         self._widgets = [];
 
+        # a bitset of the widgets in self._widgets that are visible: bit i is set if self._widgets[i] is shown
+        # (or, before the panel is constructed, will be shown).  The widgets keep their own bit up to date
+        self._visibleMask = 0
+
         # panel must have parent object on which it is displayed
         self._parent = parent;
 
@@ -284,9 +698,13 @@ class Panel:
         # displayed atop the notebook
         self._name = kwargs.get("name",None)
 
-    def initObj(self):
+        # this will be instantiated by initObj()
+        self._obj = None
+
+    # parentObj: optional; the wx object on which to place the panel, if not its parent's wx object
+    def initObj(self,parentObj=None):
         # we initialize the panel, which then refers to all of the panel's widgets' methods for their instantiation
-        self._obj = wxPanel(self);
+        self._obj = wxPanel(self,parentObj);
 
         # append this instance to the class register, so that we may iterate over the class instances if needed
         Panel._register.append(self);
@@ -300,13 +718,247 @@ class Panel:
     def deleteWidget():
         pass
 
+    # the bitset of the visible widgets of this panel; compare it with an earlier one with changedSince()
+    def visibleMask(self):
+        return self._visibleMask
+
+    # the widgets of this panel whose bit is set in 'mask'
+    def widgetsOf(self,mask):
+        return [self._widgets[index] for index in bitIndices(mask)]
+
+    # the bitset of the widgets whose visibility changed since the panel's visibleMask() was 'mask'
+    def changedSince(self,mask):
+        return self._visibleMask ^ mask
+
+    def countVisible(self):
+        return bin(self._visibleMask).count("1")
+
+    # remove this panel and its children from the registers; the wx objects are destroyed along with the frame
+    def dispose(self):
+        for obj in self._children:
+            obj.dispose()
+        self._children = []
+        self._widgets = []
+        self._visibleMask = 0
+        Panel._register.remove(self)
+        self._obj = None
+
+
+# when a master widget's selection changes, many slaves may be shown or hidden, each of which would
+# otherwise call Layout() on its panel.  While a propagation is in progress (between begin() and end()),
+# requestLayout() instead marks the panel as dirty and freezes it; end() then calls Layout() exactly once
+# for each dirty panel and thaws it.  Propagations may be nested; only the outermost end() lays out.
+class LayoutScheduler:
+
+    def __init__(self):
+        # the number of begin() calls without a matching end()
+        self._depth = 0
+
+        # wx panels awaiting a Layout() call, in the order in which they were marked,
+        # and the ids of those panels so we can check membership quickly
+        self._dirty = []
+        self._dirtyIds = set()
+
+    def begin(self):
+        self._depth += 1
+
+    def end(self):
+        self._depth -= 1
+        if (self._depth > 0):
+            return
+
+        dirty = self._dirty
+        self._dirty = []
+        self._dirtyIds = set()
+        for panelObj in dirty:
+            panelObj.Layout()
+            panelObj.Thaw()
+
+    def requestLayout(self,panelObj):
+        # outside of a propagation, lay the panel out immediately
+        if (self._depth == 0):
+            panelObj.Layout()
+            return
+
+        if (id(panelObj) not in self._dirtyIds):
+            self._dirtyIds.add(id(panelObj))
+            self._dirty.append(panelObj)
+            panelObj.Freeze()
+
+# the scheduler used by all Widget instances
+layoutScheduler = LayoutScheduler()
+
+# the event handed to a text widget's function by a TextCommitter: it carries the text that is being
+# stored, and the text widget, just as the EVT_TEXT event it stands in for
+class CommittedTextEvent:
+    def __init__(self,obj,string):
+        self._obj = obj
+        self._string = string
+
+    def GetEventObject(self):
+        return self._obj
+
+    def GetId(self):
+        return self._obj.GetId()
+
+    def GetString(self):
+        return self._string
+
+    def Skip(self,skip=True):
+        pass
+
+# calls the function of a text widget according to a commit policy other than "keystroke"
+# (see textCommitPolicy).  Each keystroke merely records the latest text; the function is
+# called with that text once the policy says the value is to be stored.
+class TextCommitter:
+    # the committers holding text that has not been stored yet; see flushPendingText()
+    _pending = set()
+
+    def __init__(self,function,obj,policy,delay):
+        if policy not in ("debounce", "focus"):
+            raise ValueError("unknown text commit policy: %s" %(policy))
+        self._function = function
+        self._obj = obj
+        self._policy = policy
+        self._delay = delay
+        self._text = None
+        self._timer = None
+
+    # bind the committer to the events of the text control 'obj', which is placed on 'panelObj'; its text
+    # events are registered with 'dispatcher' instead, if the panel has one ('name' is that of the widget)
+    def bind(self,panelObj,dispatcher=None,name=None):
+        if (dispatcher is not None):
+            dispatcher.add(wx.EVT_TEXT, self._obj, self.onText, name)
+        else:
+            panelObj.Bind(wx.EVT_TEXT, self.onText, self._obj)
+        # focus events are not propagated to the parent window, so these are bound on the control itself
+        self._obj.Bind(wx.EVT_KILL_FOCUS, self.onKillFocus)
+        self._obj.Bind(wx.EVT_TEXT_ENTER, self.onEnter)
+
+    def onText(self,event):
+        self._text = str(event.GetString())
+        TextCommitter._pending.add(self)
+        if (self._policy == "debounce"):
+            if (self._timer is None):
+                self._timer = wx.CallLater(self._delay, self.commit)
+            else:
+                self._timer.Restart(self._delay)
+        event.Skip()
+
+    def onKillFocus(self,event):
+        self.commit()
+        event.Skip()
+
+    def onEnter(self,event):
+        self.commit()
+        event.Skip()
+
+    # store the pending text, if any
+    def commit(self):
+        if (self._timer is not None and self._timer.IsRunning()):
+            self._timer.Stop()
+        if (self._text is None):
+            return
+        text = self._text
+        self._text = None
+        TextCommitter._pending.discard(self)
+        self._function(CommittedTextEvent(self._obj, text))
+
+# store the pending text of all text widgets; call this before the values in myDict are used
+def flushPendingText():
+    for committer in list(TextCommitter._pending):
+        committer.commit()
+
+
+# routes the events of the widgets on a panel to their functions (see eventDispatch).  Each event type is
+# bound on the panel once, when the first function for it is added; an event is then handed to the
+# functions added for the id of the control that sent it.  As with Bind(), the function added last is
+# called first, and the next one is only called if the event was skipped; events from controls without
+# functions (e.g., those on a nested panel, which has a dispatcher of its own) are skipped, so they
+# continue up to the parent windows
+class EventDispatcher:
+    # (control id, widget name, function name) -> [number of calls, total seconds, maximum seconds];
+    # see dispatchTimings()
+    _timings = OrderedDict()
+
+    def __init__(self,panelObj):
+        self._panelObj = panelObj
+
+        # event type -> {control id -> list of (function, timing key), in the order in which they are called}.
+        # The timing key is kept with each function, as many controls share a function (e.g.
+        # defaultTextFunction), and each is timed on its own
+        self._tables = {}
+
+    def add(self,event,obj,function,name=None):
+        table = self._tables.get(event)
+        if table is None:
+            table = self._tables[event] = {}
+            self._panelObj.Bind(event, lambda evt: self.dispatch(evt, table))
+        key = (obj.GetId(), name or "", getattr(function, "__name__", str(function)))
+        table.setdefault(obj.GetId(), []).insert(0, (function, key))
+
+    def dispatch(self,event,table):
+        functions = table.get(event.GetId())
+        if functions is None:
+            event.Skip()
+            return
+        for function, key in functions:
+            event.Skip(False)
+            if dispatchTiming:
+                start = time.time()
+                function(event)
+                elapsed = time.time() - start
+                timing = EventDispatcher._timings.setdefault(key, [0, 0.0, 0.0])
+                timing[0] += 1
+                timing[1] += elapsed
+                timing[2] = max(timing[2], elapsed)
+            else:
+                function(event)
+            if not event.GetSkipped():
+                return
 
+    # the number of event types bound on the panel, and the number of controls with functions
+    def counts(self):
+        return len(self._tables), sum([len(table) for table in self._tables.itervalues()])
 
+# the timings recorded while dispatchTiming is True, one per control and function, the slowest (in total)
+# first: a list of (widget name, function name, number of calls, total seconds, maximum seconds)
+def dispatchTimings():
+    timings = [key[1:] + tuple(value) for key, value in EventDispatcher._timings.iteritems()]
+    timings.sort(key = lambda timing: -timing[3])
+    return timings
 
-class Widget:
-    _register = []
+def resetDispatchTimings():
+    EventDispatcher._timings.clear()
+
+
+# defaults shared by all Widget instances
+_defaultSpan = (1,1)
+_defaultGridFlags = (wx.RESERVE_SPACE_EVEN_IF_HIDDEN | wx.EXPAND | wx.ALIGN_CENTER)
+_emptySet = frozenset()
+
+class Widget(object):
+    _register = Register()
     _typeName = "Widget"
 
+    # a form may have many hundreds of widgets; to keep each of them small, the attributes are stored
+    # in __slots__ rather than in a per-instance __dict__.  Any new attribute must be added here
+    __slots__ = ("_parent", "_widgetType", "_name", "_pos", "_choices", "_label", "_labelPos", "_span", \
+            "_labelSpan", "_size", "_style", "_initValue", "_function", "_wxEvt", "_hasMaster", "_hasSlave", \
+            "_fontOptions", "_hideMask", "_panelBit", "_received", "_labelObj", "_obj", "_initHide", \
+            "_gridFlags", "_dictKwarg", "_masters", "_hideWhen", "_masterIndex", "_slaves", "_cascade", \
+            "_cascadeSet", "_commit", "_columns", "_rows", "__weakref__")
+
+    # set to True by compileDependencyGraph(); set back to False whenever a new master is assigned
+    _graphCompiled = False
+
+    # all widgets, masters before their slaves; set by compileDependencyGraph()
+    _order = ()
+
+    # increased by every compileDependencyGraph(), so that what is derived from the graph (see
+    # VisibilityTable) can tell whether it is out of date
+    _graphVersion = 0
+
     # for all Widget objects, we need the parent object, widgetType, name, and position
     def __init__(self,parent,widgetType,name,pos,**kwargs):
         # note that we use **kwargs to pass in information that may be specific to certain type
@@ -320,15 +972,21 @@ class Widget:
         self._parent = parent; # parent object, typically an instance of Panel
         self._widgetType = widgetType; # button, textwidget, label, etc.
         self._name = name; #string
-        self._pos = pos; #tuple of coords: "(integer, integer)"
+        self._pos = tuple(pos); #tuple of coords: "(integer, integer)"
 
+        get = kwargs.get
 
         #####################
         # Required arguments, for some widget types
         #####################
 
         # required for choice widgets
-        self._choices = kwargs.get('choices',None)
+        self._choices = get('choices',None)
+
+        # required for grid widgets (see StoreGridTable): the columns, as (label, keyword pattern, choices, action),
+        # and the rows, as (keyword holding the number of rows, maximum number of rows)
+        self._columns = get('columns',None)
+        self._rows = get('rows',None)
 
         ############################
         # optional arguments
@@ -337,24 +995,31 @@ class Widget:
         # if a widget can use an initial value (e.g., a text control), it defaults to an empty string
         # if a widget is to be bound to a function, must specify this explicitly or bind to it later
         ############################
-        self._label = kwargs.get('label',None)
-        self._labelPos = kwargs.get('labelPos',None)
+        self._label = get('label',None)
+        self._labelPos = get('labelPos',None)
         # default behavior of span is (1,1) if not specified
-        self._span = kwargs.get('span',(1,1))
-        self._labelSpan = kwargs.get('labelSpan',(1,1))
-        self._size = kwargs.get('size',None)
-        self._style = kwargs.get('style',None)
-        self._initValue = kwargs.get('value',"")
-        self._function = kwargs.get('function',None)
+        self._span = get('span',_defaultSpan)
+        self._labelSpan = get('labelSpan',_defaultSpan)
+        self._size = get('size',None)
+        self._style = get('style',None)
+        self._initValue = get('value',"")
+        self._function = get('function',None)
+        # the commit policy of a text widget; None means textCommitPolicy
+        self._commit = get('commit',None)
         self._wxEvt = None
         self._hasMaster = False; # default this to false; changed if the setMaster() function is called on self
         self._hasSlave = False;
-        self._fontOptions = kwargs.get('fontOptions',None)
+        self._fontOptions = get('fontOptions',None)
+
+        # a bitmask of the masters currently hiding this widget: bit 'index' is set if the master at
+        # self._masters[index] instructs the widget to hide.  The widget is displayed only if no bit is set,
+        # i.e. if the mask is 0; whether it should display is a single comparison, however many masters it has.
+        # (most widgets never have a master; all of the master/slave containers below start out as shared,
+        # empty, immutable objects, and are only replaced by lists of their own when setMaster() is called)
+        self._hideMask = 0
 
-        # an array of booleans; this is positional with respect to the array of 'master' widgets that this
-        # object has.  "True" denotes that the widget should display, according to the master at index self._masters[index].
-        # if any of the values are false, the widget will not display.
-        self._hideArray = []
+        # becomes True once a master has sent this widget a message; see evaluateMessage()
+        self._received = False
 
         # these will be instantiated during the creation of the parent object
         self._labelObj = None;
@@ -366,27 +1031,40 @@ class Widget:
         self._initHide = False;
 
         # have the Panel's grid.Add() method use these flags when instantiating the widget
-        self._gridFlags = (wx.RESERVE_SPACE_EVEN_IF_HIDDEN | wx.EXPAND | wx.ALIGN_CENTER)
+        self._gridFlags = _defaultGridFlags
 
         # default the dictionary keyword for data storage to 'None';
         # we require the programmer to specify explicitly under what keyword to store the data
         # this can be accessed via the 'setDictKwarg()' method, defined below
         self._dictKwarg = None
 
-        # append the object to the list of children in the parent instance
+        # append the object to the list of children in the parent instance; its bit in the panel's
+        # bitset of visible widgets (see Panel.visibleMask) is given by its place among the panel's widgets
         parent._children.append(self)
+        parent._widgets.append(self)
+        self._panelBit = 1 << (len(parent._widgets) - 1)
+        self._updatePanelBit()
 
         # the master widget - this is a /Widget/ instance
-        self._masters = []
+        self._masters = ()
 
         # denotes messages from master that instruct self to Hide()
-        # these should be strings
-        self._hideWhen = []
+        # these are sets of strings, positional with respect to self._masters
+        self._hideWhen = ()
+
+        # maps each master Widget instance to its index in self._masters, so that a message
+        # from a master can be dispatched without searching the list of masters
+        self._masterIndex = None
 
         # widgets to which self is master; note that this is set implicitly via setMaster, when
         # other widgets denotes self as master
         # this is a /Widget/ instance (not a wx object)
-        self._slaves = []
+        self._slaves = ()
+
+        # all widgets depending on this one (its slaves, their slaves, etc.), in topological order,
+        # and the same widgets as a set; these are filled in by compileDependencyGraph()
+        self._cascade = ()
+        self._cascadeSet = _emptySet
         Widget._register.append(self); # append this instance to the class register
     # allows the function to which the widget will be bound to be set after construction of the widget instance
     # we allow the function to be defined according to whatever parameters the user inputs; no implicit self
@@ -394,50 +1072,106 @@ class Widget:
     def masterFunction(self,event):
         # pass the value of this widget to slaved widgets
         message = str(event.GetString())
-        masterObj = event.GetEventObject()
-
-        for slave in self._slaves:
-            slave.evaluateMessage(masterObj, message);
-            if slave._hasSlave:
-                #slave.masterFunction(event) // previously, it was this
-                slave.propagateEmptyString(event)
+        self.propagateMessage(message)
         event.Skip()
 
     # a master choice widget had its selection changed; this will then instruct the slaves to reset
     def propagateEmptyString(self,event):
         # propagate the empty string and see what happens
-
-        # 'masterObj' will be passed to slave.evaluateMessage, and so it turns out to be self._obj
-        masterObj = self._obj
-
-        for slave in self._slaves:
-            slave.evaluateMessage(masterObj,"")
-            if slave._hasSlave:
-                slave.propagateEmptyString(event)
-
+        self.propagateMessage("")
         event.Skip()
 
+    # send 'message' to the slaves of this widget; every widget further down the hierarchy
+    # (a slave of a slave, and so on) is sent the empty string by its master, i.e. it is reset.
+    # each dependent widget is visited exactly once, in topological order (see compileDependencyGraph()),
+    # no matter how many paths lead to it from this widget
+    def propagateMessage(self,message):
+        if not Widget._graphCompiled:
+            compileDependencyGraph()
+
+        # the drivers of a VisibilityTable only update the widgets whose visibility changes
+        table = VisibilityTable._byDriver.get(self)
+        if (table is not None and table.apply(self, message)):
+            return
+
+        # the panels of all slaves are laid out once, after the whole propagation
+        layoutScheduler.begin()
+        try:
+            for slave in self._cascade:
+                slave.receiveMessages(self, message, self._cascadeSet)
+        finally:
+            layoutScheduler.end()
+
+    # called during propagateMessage(); 'root' is the widget whose selection changed and 'affected' is the
+    # set of all widgets depending on it.  All of this widget's masters that took part in the propagation
+    # are evaluated at once, and the widget is then shown or hidden a single time
+    def receiveMessages(self,root,message,affected):
+        hideMessage = False
+        for index, master in enumerate(self._masters):
+            if (master is root):
+                hideThis = self.updateHideMask(index, message)
+            elif (master in affected):
+                hideThis = self.updateHideMask(index, "")
+            else:
+                continue
+            hideMessage = (hideMessage or hideThis)
+        self.applyVisibility(hideMessage)
 
-    def evaluateMessage(self,masterObj, message):
+    def evaluateMessage(self,master, message):
         # this is used by the interface to loop over child widgets
         # in the event that a chosen selection hides multiple levels of the parent-child hierarchy.
         # continues until exhaustion
+        # 'master' is the Widget instance that sent the message
+
+        # look up the index corresponding to the master that sent the message
+        index = self._masterIndex[master]
+        self.applyVisibility(self.updateHideMask(index, message))
+
+    # update the bit of the master at 'index' in the hideMask according to the message it sent;
+    # returns True if the message instructs this widget to hide
+    def updateHideMask(self,index,message):
+        hideThis = (message in self._hideWhen[index])
+        if hideThis:
+            self._hideMask |= (1 << index)
+        else:
+            self._hideMask &= ~(1 << index)
+
+        # the widget has now been told by a master whether to display; if it is on a page that has not been
+        # constructed yet, the panel will use this when the page is constructed
+        self._received = True
+        self._updatePanelBit()
+        return hideThis
+
+    # True if the widget is (or, on a page not constructed yet, will be) hidden: by its masters, once one
+    # of them has sent it a message, and otherwise if it is initially hidden
+    def isHidden(self):
+        if self._received:
+            return (self._hideMask != 0)
+        return self._initHide
+
+    # keep the widget's bit in its panel's bitset of visible widgets up to date
+    def _updatePanelBit(self):
+        if self.isHidden():
+            self._parent._visibleMask &= ~self._panelBit
+        else:
+            self._parent._visibleMask |= self._panelBit
 
-
-        thisIndexToIterate = -1; # this should throw an array loop 'out of bounds' error if not changed
-
-        # iterate over self._masters to find the index corresponding to the masterObject that received an event
-        for index, item in enumerate(self._masters):
-            if (item._obj is masterObj):
-                thisIndexToIterate = index
-                break
-            else:
-                continue
+    # show or hide the widget, after its hideMask has been updated.  'hideMessage' is True if a master
+    # has just instructed this widget to hide
+    def applyVisibility(self,hideMessage):
 
         # if the message received is in the hideWhen list corresponding to this master object, hide stuff
         # and also clear it; it is no longer relevant
-        if message in self._hideWhen[thisIndexToIterate]:
-            self._hideArray[index] = True;
+        if hideMessage:
+            try:
+                del myDict[self._dictKwarg]
+            except:
+                pass
+
+            # nothing else to do if the wx object hasn't been created yet (i.e., it is on a lazy page)
+            if (self._obj is None):
+                return
+
             self._obj.Hide()
 
             # we don't want any exceptions here (or we don't care... so just use try statements
@@ -446,47 +1180,57 @@ class Widget:
             elif (self._widgetType == "choice"):
                 self._obj.SetSelection(0)
 
-            try:
-                del myDict[self._dictKwarg]
-            except:
-                pass
-
             if (self._labelObj is not None):
                 self._labelObj.Hide()
-            self._parent._obj.Layout()
+            layoutScheduler.requestLayout(self._parent._obj)
 
         # else, show stuff, provided all other master objects also indicate that this widget should be shown
         else:
-            # this indicates that this master widget is sending a 'display' message
-            self._hideArray[index] = False;
-            self._obj.Show()
-            if (self._labelObj is not None):
-                self._labelObj.Show()
-            # however, if another master widget is still asserting that this widget should hide,
-            # then it should remain hidden.  Therefore:
-            # if any of the values in the hideArray are True, then we call the .Hide() method
-            for item in self._hideArray:
-                if item is True:
-                    self._obj.Hide()
-                    if (self._labelObj is not None):
-                        self._labelObj.Hide()
-            # call the Layout() method to update the panel's appearance
-            self._parent._obj.Layout()
+            if (self._obj is None):
+                return
+
+            # if another master widget is still asserting that this widget should hide,
+            # then it should remain hidden
+            if (self._hideMask == 0):
+                self._obj.Show()
+                if (self._labelObj is not None):
+                    self._labelObj.Show()
+            else:
+                self._obj.Hide()
+                if (self._labelObj is not None):
+                    self._labelObj.Hide()
+            # lay out the panel to update its appearance (deferred until the end of the propagation)
+            layoutScheduler.requestLayout(self._parent._obj)
 
     def setMaster(self, master, hideWhen):
+        # the dependency graph must be compiled again to include this relationship
+        Widget._graphCompiled = False
+
+        # the first master of this widget; give the widget containers of its own (see __init__)
+        if not self._hasMaster:
+            self._masters = []
+            self._hideWhen = []
+            self._masterIndex = {}
+
+        # index this master so that evaluateMessage() can find it directly
+        if master not in self._masterIndex:
+            self._masterIndex[master] = len(self._masters)
         self._masters.append(master)
 
-        # append a value for this master widget to the _hideArray
+        # set the bit of this master in the _hideMask
         # assume an initial value of 'false'- i.e., the widget will be displayed - if debugging (I find it
         # helpful; this way, things are displayed)
         # assume an initial value of 'True' if actually using the GUI for production purposes
-        self._hideArray.append(True)
-        # assume hideWhen is in the form of an array
+        self._hideMask |= (1 << (len(self._masters) - 1))
+        self._updatePanelBit()
+        # assume hideWhen is in the form of an array; we store it as a set for fast lookups
         #for instruction in hideWhen:
         #    self._hideWhen.append(instruction)
-        self._hideWhen.append(hideWhen)
+        self._hideWhen.append(frozenset(hideWhen))
 
         # append self to master._slaves[]
+        if not master._hasSlave:
+            master._slaves = []
         master._slaves.append(self);
 
         # if this is the first time we assign a master to this widget, change the boolean to True
@@ -501,6 +1245,46 @@ class Widget:
     def setDictKwarg(self,keyword):
         self._dictKwarg = keyword;
 
+        # the register's lookup by _dictKwarg must be rebuilt
+        Widget._register.invalidate()
+
+    # remove 'master' from the masters of this widget
+    def removeMaster(self,master):
+        if master not in self._masterIndex:
+            return
+        Widget._graphCompiled = False
+
+        keep = [index for index, item in enumerate(self._masters) if item is not master]
+        self._masters = [self._masters[index] for index in keep]
+        mask = 0
+        for position, index in enumerate(keep):
+            if (self._hideMask & (1 << index)):
+                mask |= (1 << position)
+        self._hideMask = mask
+        self._hideWhen = [self._hideWhen[index] for index in keep]
+        self._updatePanelBit()
+        self._masterIndex = {}
+        for index, item in enumerate(self._masters):
+            if item not in self._masterIndex:
+                self._masterIndex[item] = index
+        self._hasMaster = (len(self._masters) > 0)
+
+        master._slaves = [slave for slave in master._slaves if slave is not self]
+        master._hasSlave = (len(master._slaves) > 0)
+
+    # remove this widget from the register, and cut its ties to its masters and slaves
+    # (the wx objects are destroyed along with the frame)
+    def dispose(self):
+        for master in list(self._masters):
+            self.removeMaster(master)
+        for slave in list(self._slaves):
+            slave.removeMaster(self)
+        Widget._register.remove(self)
+        if (self._widgetType == "grid" and self._obj is not None):
+            self._obj.GetTable().detach()
+        self._obj = None
+        self._labelObj = None
+
     def setFunction(self,function):
         self._function = function;
 
@@ -509,12 +1293,22 @@ class Widget:
 
     def setInitHide(self,boolean):
         self._initHide = boolean;
+        self._updatePanelBit()
+
+    # forget the messages received from the masters, so that the widget is hidden until its masters
+    # tell it otherwise, as it was when the form was constructed (the wx object is not affected)
+    def resetVisibility(self):
+        VisibilityTable.forgetAll()
+        if self._hasMaster:
+            self._hideMask = (1 << len(self._masters)) - 1
+        self._received = False
+        self._updatePanelBit()
 
     # maybe the user wants to attach labels later; allow them to do so here
     def setLabel(self,label,labelPos,**kwargs):
         self._label = label;
         self._labelPos = labelPos;
-        self._labelSpan = kwargs.get('labelSpan',(1,1))
+        self._labelSpan = kwargs.get('labelSpan',_defaultSpan)
 
     # this is a bottom level object; it requires a parentInstance on initialization
     def initObj(self,parentInstance):
@@ -522,17 +1316,22 @@ class Widget:
         # expect in self._wxEvt
 
         if (self._widgetType == "text"):
+            # a text widget whose value is stored by a TextCommitter is stored when the user presses Enter;
+            # wx only generates EVT_TEXT_ENTER for controls with the wx.TE_PROCESS_ENTER style
+            processEnter = 0
+            if (self._function is not None and (self._commit or textCommitPolicy) != "keystroke"):
+                processEnter = wx.TE_PROCESS_ENTER
             if (self._style is None):
-                self._obj = wx.TextCtrl(parentInstance,value=self._initValue,name=self._name)
+                self._obj = wx.TextCtrl(parentInstance,value=self._initValue,name=self._name,style=processEnter)
                 self._wxEvt = wx.EVT_TEXT
             else:
                 if (self._size is not None):
                     self._obj = wx.TextCtrl(parentInstance,value='',size=self._size, \
-                         name = self._name,style = self._style)
+                         name = self._name,style = self._style | processEnter)
                     self._wxEvt = wx.EVT_TEXT
                 else:
                     self._obj = wx.TextCtrl(parentInstance, value = '', name = self._name, \
-                            style = self._style)
+                            style = self._style | processEnter)
                     self._wxEvt = wx.EVT_TEXT
 
     # need to add all types of widgets here; remember to overload necessary parameters for each via kwargs.get()
@@ -561,17 +1360,366 @@ class Widget:
             self._obj = wx.StaticText(parentInstance,label=self._name, name=self._name)
             self._wxEvt = None
 
+        # a grid stores its cells in myDict through its table; its function, if any, is called when a
+        # cell is double-clicked (see gridCellFunction)
+        elif (self._widgetType == "grid"):
+            if (self._columns is None or self._rows is None):
+                raise ValueError('%s: a grid widget requires columns and rows' %(self._name))
+            if (self._size is not None):
+                self._obj = wx.grid.Grid(parentInstance, -1, size=self._size, name=self._name)
+            else:
+                self._obj = wx.grid.Grid(parentInstance, -1, name=self._name)
+            countKeyword, maxRows = self._rows
+            self._obj.SetTable(StoreGridTable(myDict, self._columns, countKeyword, maxRows), True)
+            self._wxEvt = wx.grid.EVT_GRID_CELL_LEFT_DCLICK
+
         # all widgets with which we interact will store their data in the global dictionary;
         # access to this dictionary is controlled by the _dictKwarg attribute
         # this attribute must be appended to the wxWidget object, because I can't figure out
         # how to refer back to the base Widget class instance once we make the wxWidget swig object
         self._obj.__setattr__("_dictKwarg", self._dictKwarg)
 
+        # a widget constructed after its value was stored (e.g., on a page built lazily after a session
+        # was restored) shows that value
+        if (self._dictKwarg is not None and self._dictKwarg in myDict):
+            self.showValue(myDict.text(self._dictKwarg))
+
+    # display 'value' in the wx object without generating an event, so that the widget's function is not
+    # called (see bulkAssign).  Widgets that do not display a value (buttons, labels) are left as they are
+    def showValue(self,value):
+        if (self._obj is None):
+            return
+        value = storeText(value)
+        if (self._widgetType == "text"):
+            self._obj.ChangeValue(value)
+        elif (self._widgetType == "choice"):
+            if not self._obj.SetStringSelection(value):
+                self._obj.SetSelection(wx.NOT_FOUND)
+        elif (self._widgetType == "checkbox"):
+            self._obj.SetValue(value not in ("", "0", "False"))
+
+    # the message this widget sends to its slaves for its current value (see masterFunction)
+    def currentMessage(self):
+        if (self._obj is None or self._widgetType not in ("text", "choice")):
+            if (self._dictKwarg is None):
+                return ""
+            return myDict.text(self._dictKwarg)
+        if (self._widgetType == "text"):
+            return str(self._obj.GetValue())
+        return str(self._obj.GetStringSelection())
+
+# compile the master/slave relationships set via Widget.setMaster() into a dependency graph.
+# The widgets are sorted topologically (masters before their slaves) and each master stores
+# the list of all widgets that depend on it, directly or indirectly, in that order.
+# A ValueError is raised if the relationships contain a cycle.
+def compileDependencyGraph():
+
+    # Kahn's algorithm: repeatedly take the widgets none of whose masters remain unsorted
+    numberOfMasters = {}
+    for widget in Widget._register:
+        numberOfMasters[widget] = len(widget._masters)
+
+    order = [widget for widget in Widget._register if numberOfMasters[widget] == 0]
+    for widget in order:
+        for slave in widget._slaves:
+            numberOfMasters[slave] -= 1
+            if (numberOfMasters[slave] == 0):
+                order.append(slave)
+
+    if (len(order) < len(numberOfMasters)):
+        cyclic = [str(widget._dictKwarg or widget._name) for widget in Widget._register \
+                if numberOfMasters[widget] > 0]
+        raise ValueError('The master/slave relationships of these widgets form a cycle: %s' %(", ".join(cyclic)))
+
+    rank = {}
+    for index, widget in enumerate(order):
+        rank[widget] = index
+
+    # collect the widgets depending on each master
+    for widget in order:
+        if not widget._hasSlave:
+            widget._cascade = ()
+            widget._cascadeSet = _emptySet
+            continue
+        dependents = set()
+        toVisit = list(widget._slaves)
+        while toVisit:
+            slave = toVisit.pop()
+            if slave not in dependents:
+                dependents.add(slave)
+                toVisit.extend(slave._slaves)
+        widget._cascade = sorted(dependents, key = lambda item: rank[item])
+        widget._cascadeSet = frozenset(dependents)
+
+    Widget._order = order
+    Widget._graphVersion += 1
+    Widget._graphCompiled = True
+
+# the visibility of most of the form depends on a few master widgets (the "drivers"; e.g. the ensemble and
+# the number of species), each with a handful of choices.  A VisibilityTable precomputes, for every choice
+# of every driver, which of the widgets depending on it that choice hides, as a bitset (an int with one bit
+# per widget, in the order of Widget._order).  The tables are kept per driver, not per combination of the
+# drivers' choices: a change of one driver only involves its own table.  When a driver's selection changes,
+# propagateMessage() hands it to apply(), which XORs the bitsets of the old and new choices and updates,
+# shows or hides only the widgets whose bit differs, instead of evaluating the whole cascade below the driver.
+#
+# apply() does exactly what propagateMessage() would: the driver's bit in its slaves' hideMasks becomes
+# its new message and, below it, the entries of the masters it depends on are reset to ""; a widget is
+# shown only if none of its masters (including those that are not drivers) hides it.  The cascades of the
+# drivers must not contain another driver.  The table is rebuilt after the dependency graph changes, and
+# forgets the choices it last applied whenever the visibility is changed by other means (see forgetAll)
+class VisibilityTable(object):
+    # driver Widget -> the table it drives
+    _byDriver = {}
+    _tables = []
+
+    def __init__(self,drivers):
+        self._drivers = list(drivers)
+        for driver in self._drivers:
+            VisibilityTable._byDriver[driver] = self
+        VisibilityTable._tables.append(self)
+        self._graphVersion = None
+
+        # driver -> the message it last applied; a driver without one updates all of its slaves
+        self._current = {}
+
+    # the table must be built again after the graph is compiled again
+    def _build(self):
+        if not Widget._graphCompiled:
+            compileDependencyGraph()
+        for driver in self._drivers:
+            for other in self._drivers:
+                if other in driver._cascadeSet:
+                    raise ValueError('%s depends on %s; they cannot both drive a VisibilityTable' \
+                            %(other._dictKwarg, driver._dictKwarg))
+        affected = set()
+        for driver in self._drivers:
+            affected.update(driver._cascadeSet)
+        self._widgets = [widget for widget in Widget._order if widget in affected]
+        bits = dict([(widget, 1 << index) for index, widget in enumerate(self._widgets)])
+
+        # driver -> [(slave, indices of the driver in the slave's masters)], and the same as a dictionary
+        self._entries = {}
+        self._indices = {}
+        # driver -> message -> bitset of the slaves its entry hides
+        self._hideBits = {}
+        # driver -> [(widget, index)], the entries reset to "" below the driver, and the bitset of their widgets
+        self._resets = {}
+        self._resetBits = {}
+        for driver in self._drivers:
+            entries = []
+            for slave in driver._slaves:
+                if not any([entry[0] is slave for entry in entries]):
+                    entries.append((slave, [index for index, master in enumerate(slave._masters) \
+                            if master is driver]))
+            self._entries[driver] = entries
+            self._indices[driver] = dict(entries)
+            self._hideBits[driver] = {}
+            for message in self._messages(driver):
+                hidden = 0
+                for slave, indices in entries:
+                    if any([message in slave._hideWhen[index] for index in indices]):
+                        hidden |= bits[slave]
+                self._hideBits[driver][message] = hidden
+            resets = []
+            resetBits = 0
+            for widget in driver._cascade:
+                for index, master in enumerate(widget._masters):
+                    if master in driver._cascadeSet:
+                        resets.append((widget, index))
+                        if "" in widget._hideWhen[index]:
+                            resetBits |= bits[widget]
+            self._resets[driver] = resets
+            self._resetBits[driver] = resetBits
+        self._bits = bits
+        self._current = {}
+        self._graphVersion = Widget._graphVersion
+
+    # the messages a driver may send: the choices of a choice widget
+    def _messages(self,driver):
+        return [str(choice) for choice in (driver._choices or ())]
+
+    def _upToDate(self):
+        if (not Widget._graphCompiled or self._graphVersion != Widget._graphVersion):
+            self._build()
+
+    # the widgets whose bit is set in 'bitset'
+    def widgetsOf(self,bitset):
+        return [self._widgets[index] for index in bitIndices(bitset)]
+
+    # forget the messages applied last; the next change of each driver updates all of its slaves
+    def forget(self):
+        self._current = {}
+
+    @classmethod
+    def forgetAll(cls):
+        for table in cls._tables:
+            table.forget()
+
+    # 'driver' sent 'message'; returns False if the table cannot handle it (e.g., an unknown message)
+    def apply(self,driver,message):
+        self._upToDate()
+        hideBits = self._hideBits[driver]
+        if message not in hideBits:
+            return False
+        old = self._current.get(driver)
+        if old is None:
+            changed = sum([self._bits[slave] for slave, indices in self._entries[driver]])
+        else:
+            changed = hideBits[old] ^ hideBits[message]
+
+        # update the hideMasks, remembering whether each widget was hidden before, and whether one of
+        # the entries updated now hides it (as receiveMessages() does)
+        before = {}
+        hideMessages = {}
+        indices = self._indices[driver]
+        for slave in self.widgetsOf(changed):
+            before[slave] = (slave._hideMask != 0, slave._received)
+            for index in indices[slave]:
+                if slave.updateHideMask(index, message):
+                    hideMessages[slave] = True
+        for widget, index in self._resets[driver]:
+            if widget not in before:
+                before[widget] = (widget._hideMask != 0, widget._received)
+            if widget.updateHideMask(index, ""):
+                hideMessages[widget] = True
+
+        # show or hide the widgets whose visibility changed, masters first
+        layoutScheduler.begin()
+        try:
+            for widget in sorted(before, key = lambda item: self._bits[item]):
+                wasHidden, received = before[widget]
+                if ((widget._hideMask != 0) != wasHidden or not received):
+                    widget.applyVisibility(hideMessages.get(widget, False))
+        finally:
+            layoutScheduler.end()
+        self._current[driver] = message
+        return True
+
+# bring the visibility of the widgets depending on 'masters' (all widgets, if None) up to date with the
+# current values of their masters, e.g. after their values were set with bulkAssign().  Unlike
+# propagateMessage(), every master sends its current value rather than resetting the widgets below it;
+# the widgets are visited masters first, so a master hidden (and cleared) here sends its slaves ""
+def refreshVisibility(masters=None):
+    if not Widget._graphCompiled:
+        compileDependencyGraph()
+    VisibilityTable.forgetAll()
+    if masters is None:
+        widgets = [widget for widget in Widget._order if widget._hasMaster]
+    else:
+        affected = set()
+        for master in masters:
+            affected.update(master._cascadeSet)
+        widgets = [widget for widget in Widget._order if widget in affected]
+
+    layoutScheduler.begin()
+    try:
+        for widget in widgets:
+            wasHidden = (widget._hideMask != 0)
+            received = widget._received
+            for index, master in enumerate(widget._masters):
+                widget.updateHideMask(index, master.currentMessage())
+            hidden = (widget._hideMask != 0)
+            # widgets whose visibility did not change are left alone, unless a hidden one holds a value
+            if (hidden != wasHidden or not received or \
+                    (hidden and widget._dictKwarg is not None and widget._dictKwarg in myDict)):
+                widget.applyVisibility(hidden)
+    finally:
+        layoutScheduler.end()
+
+# the visibility of all widgets, as the bitset of visible widgets of each panel; pass it to
+# changedSince() to find the widgets shown or hidden since it was taken
+def visibilitySnapshot():
+    return dict([(panel, panel.visibleMask()) for panel in Panel._register])
+
+# the widgets whose visibility changed since 'snapshot' was taken with visibilitySnapshot()
+def changedSince(snapshot):
+    widgets = []
+    for panel in Panel._register:
+        widgets.extend(panel.widgetsOf(panel.changedSince(snapshot.get(panel, 0))))
+    return widgets
+
+# set the values of many widgets at once, e.g. bulkAssign({"s1 1-2 vdw": "0.0", "ensemble": "GCMC"}); an
+# empty value clears the keyword.  The widgets are updated with showValue(), which generates no events,
+# so no widget function runs once per value; the values are written to myDict in a single transaction,
+# so its subscribers are notified once; and the visibility of the widgets depending on the masters
+# whose value changed is updated once, at the end (see refreshVisibility).  Keywords without a widget are
+# stored all the same
+def bulkAssign(values):
+    changedMasters = []
+    with myDict.transaction():
+        for keyword, value in values.iteritems():
+            value = storeText(value)
+            if value:
+                myDict[keyword] = value
+            elif keyword in myDict:
+                del myDict[keyword]
+            for widget in Widget._register.find("_dictKwarg", keyword):
+                widget.showValue(value)
+                if widget._hasSlave:
+                    changedMasters.append(widget)
+        if changedMasters:
+            refreshVisibility(changedMasters)
+
+# create the widgets of a plan compiled by formSpec (see formSpec.py).  The panels, the functions the
+# widgets are bound to, and the actions of the columns of grids are named in the plan and looked up among
+# the globals of this module; styles are named in the plan and looked up in wx.
+# Returns an OrderedDict of id -> Widget, in the order of the plan
+def buildFromPlan(plan):
+    names = globals()
+    widgets = OrderedDict()
+    for id, panel, widgetType, name, pos, kwargs, key, function in plan:
+        kwargs = dict(kwargs)
+        if "choices" in kwargs:
+            kwargs["choices"] = list(kwargs["choices"])
+        if "style" in kwargs:
+            kwargs["style"] = getattr(wx, kwargs["style"])
+        if "columns" in kwargs:
+            kwargs["columns"] = [(label, pattern, choices, action and names[action]) \
+                    for label, pattern, choices, action in kwargs["columns"]]
+        widget = Widget(names[panel], widgetType = widgetType, name = name, pos = pos, **kwargs)
+        if key is not None:
+            widget.setDictKwarg(key)
+        if function is not None:
+            widget.setFunction(names[function])
+        widgets[id] = widget
+    return widgets
+
+# the function of a grid whose columns have actions (see StoreGridTable): calls the action of the column
+# of the cell that was double-clicked, with the grid and the species of the row
+def gridCellFunction(event):
+    grid = event.GetEventObject()
+    action = grid.GetTable().action(event.GetCol())
+    if action is not None:
+        action(grid, event.GetRow() + 1)
+    event.Skip()
+
+# the widgets of the rows of a plan repeated for every species are hidden while fewer species are chosen;
+# 'ids' are their ids in 'widgets', with %(species)s in place of the species number.  Above
+# formSpec.gridThreshold species, 'widgets' holds the grid 'gridId' instead, whose rows follow the number
+# of species; the grid is hidden while no number of species is chosen.  Returns the widgets of the rows
+def hideSpeciesRows(widgets,ids,gridId):
+    if gridId in widgets:
+        widgets[gridId].setMaster(numberOfSpeciesWidget, [""])
+        return []
+    rows = []
+    for species in range(1, maxNumberOfSpecies + 1):
+        # the numbers of species for which the rows of this species are hidden
+        messageForHiding = [""] + ["%s" %(k) for k in range(1, species)]
+        for id in ids:
+            widget = widgets[id %{"species": species}]
+            widget.setMaster(numberOfSpeciesWidget, messageForHiding)
+            rows.append(widget)
+    return rows
+
 # utf-8 encoding of the Angstrom unit symbol; useful to have here
 angstrom = u'\u212B'.encode('utf-8')
 
-# the maximum number of species we will allow the user to specify using the GUI
-maxNumberOfSpecies = 6
+# the number of species the user may choose; it may be raised with the environment variable
+# CASSANDRA_GUI_MAX_SPECIES.  The rows repeated for every species (the chemical potentials, the
+# intramolecular scale factors, the molecule files and the move probabilities) are built from formSpec,
+# and are entered in grids above formSpec.gridThreshold species
+maxNumberOfSpecies = int(os.environ.get("CASSANDRA_GUI_MAX_SPECIES", 6))
 
 ######################################################################################
 # SECTION 1: Creation of the main frame object and accompanying panels
@@ -590,10 +1738,13 @@ maxNumberOfSpecies = 6
 # change 'size' to any tuple of integers; this variable denotes the size, in
 # pixels, that the frame (GUI) will appear on the user's screen
 size = (900,620);
-MainFrame = Frame(None,"Cassandra Input File Editor v1.2",size);
+MainFrame = Frame(None,"Cassandra Input File Editor v1.2",size,statusBar=True);
 
 TopPanel = Panel(MainFrame);
-TopNotebook = Notebook(TopPanel);
+
+# the notebooks are lazy: pages are only constructed when the user first navigates to them,
+# so that the GUI appears without waiting on pages the user may never visit
+TopNotebook = Notebook(TopPanel,lazy=True);
 
 PanelOne = Panel(TopNotebook,name="Basic Information");
 PanelTwo = Panel(TopNotebook,name="Interaction Parameters");
@@ -624,11 +1775,11 @@ PanelFour = Panel(TopNotebook,name="File Handling");
 #
 #######################################################################################
 
-# create the notebooks that will hold the subpanels
-PanelOneNotebook = Notebook(PanelOne);
-PanelTwoNotebook = Notebook(PanelTwo);
-PanelThreeNotebook = Notebook(PanelThree);
-PanelFourNotebook = Notebook(PanelFour);
+# create the notebooks that will hold the subpanels (lazily constructed; see TopNotebook)
+PanelOneNotebook = Notebook(PanelOne,lazy=True);
+PanelTwoNotebook = Notebook(PanelTwo,lazy=True);
+PanelThreeNotebook = Notebook(PanelThree,lazy=True);
+PanelFourNotebook = Notebook(PanelFour,lazy=True);
 
 # the pages of the panel one notebook, "Basic Information"
 PanelOnePageOne = Panel(PanelOneNotebook,name="Page 1")
@@ -699,7 +1850,7 @@ def defaultTextFunction(event):
         if (objKeyword in myDict.keys()):
             del myDict[objKeyword]
 
-    print objKeyword, val
+    echo(objKeyword, val)
     event.Skip()
 
 # default behavior for our choice widget objects
@@ -727,7 +1878,7 @@ def defaultChoiceFunction(event):
         if (objKeyword in myDict.keys()):
             del myDict[objKeyword]
 
-    print objKeyword, val
+    echo(objKeyword, val)
     event.Skip()
 
 ######################################################################################
@@ -749,7 +1900,7 @@ def defaultChoiceFunction(event):
 
 # lists of options for the choice widgets on this panel
 numberOfSpeciesChoices = [""]
-# iterative over global variable 'maxNumberOfSpecies' to add options to the choice widget
+# iterative over 'maxNumberOfSpecies' to add options to the choice widget
 for i in range(maxNumberOfSpecies):
     numberOfSpeciesChoices.append("%s" %(i+1))
 
@@ -811,6 +1962,41 @@ ensembleWidget.setDictKwarg("ensemble")
 # definition of custom functions for this panel
 #################################################
 
+# file operations (e.g., reading a directory on a slow network filesystem) run on these worker threads, so that
+# they do not freeze the GUI; their results are handed back to the GUI thread by wx.CallAfter
+workerPool = WorkerPool(deliver = wx.CallAfter)
+
+# dictionary keyword -> the Task of the worker pool reading the file (or directory) for that keyword
+pendingFileTasks = {}
+
+# show 'message' in the status bar of the main frame; "" clears it
+def showStatus(message):
+    if (MainFrame._obj is not None):
+        MainFrame._obj.SetStatusText(message)
+
+# the onProgress callback of the tasks reading files; it runs on the GUI thread (see WorkerPool)
+def showProgress(fraction,message):
+    showStatus("%s (%d%%)" %(message, int(round(100 * fraction))))
+
+# a file selected for 'objKeyword' earlier, and still being read, is no longer of interest
+def cancelFileTask(objKeyword):
+    task = pendingFileTasks.pop(objKeyword, None)
+    if task is not None:
+        task.cancel()
+
+# the catalog of the files in the simulation directory (see directoryCatalog.py); it is built when the
+# directory is selected, and offers its MCFs when an MCF is to be selected
+simDirCatalog = None
+
+# runs on a worker thread: make sure the directory 'path' can be read, and catalog its files
+def catalogDirectory(task,path):
+    task.progress(0.0, "Scanning %s" %(path))
+    return DirectoryCatalog(path, progress = task.progress)
+
+# runs on a worker thread: bring the catalog up to date with the files in the directory
+def refreshCatalog(task,catalog):
+    return catalog.refresh(progress = task.progress)
+
 def simDirFunction(event):
     # retrieve the object that was interacted with on the GUI
     # for this function, we know it was the simulation directory button
@@ -829,39 +2015,161 @@ def simDirFunction(event):
     else:
         val = ''
 
-    # process the data
-    directoryName = os.path.split(val)
-    if val:
-        myDict['displaySimDir'] = directoryName[1]
-        strToDisplay = "/" + myDict['displaySimDir'] + "/"
-    else:
-        myDict['displaySimDir'] = ''
-        strToDisplay = myDict['displaySimDir']
-
-    # it will then store the relative path that the user has selected
-    simulationDirectoryDisplay._obj.SetValue((strToDisplay))
     objKeyword = obj._dictKwarg
 
     noKeywordAlert = "No dictionary keyword specified for this widget - your data isn't being stored!"
     if (objKeyword is None):
         raise ValueError(noKeywordAlert)
 
-    # otherwise, everything went ok and we'll put the value in the dictionary
-    if (val):
-       myDict[objKeyword] = val
+    cancelFileTask(objKeyword)
 
-    if not val:
-        if (objKeyword in myDict.keys()):
-            del myDict[objKeyword]
+    # the data is stored once we know the directory can be read
+    def storeDirectory(val,catalog=None):
+        global simDirCatalog
+        pendingFileTasks.pop(objKeyword, None)
+        simDirCatalog = catalog
+        showStatus("")
+
+        # process the data
+        directoryName = os.path.split(val)
+        if val:
+            myDict['displaySimDir'] = directoryName[1]
+            strToDisplay = "/" + myDict['displaySimDir'] + "/"
+        else:
+            myDict['displaySimDir'] = ''
+            strToDisplay = myDict['displaySimDir']
+
+        # it will then store the relative path that the user has selected
+        simulationDirectoryDisplay._obj.SetValue((strToDisplay))
 
-    print objKeyword, val
+        # otherwise, everything went ok and we'll put the value in the dictionary
+        if (val):
+           myDict[objKeyword] = val
+
+        if not val:
+            if (objKeyword in myDict.keys()):
+                del myDict[objKeyword]
+
+        echo(objKeyword, val)
+
+    def directoryError(error):
+        pendingFileTasks.pop(objKeyword, None)
+        showStatus("")
+        simulationDirectoryDisplay._obj.SetValue("(could not read /%s/)" %(os.path.split(val)[1]))
+        print error
+
+    if val:
+        simulationDirectoryDisplay._obj.SetValue("/%s/ (checking...)" %(os.path.split(val)[1]))
+        pendingFileTasks[objKeyword] = workerPool.submit(catalogDirectory, (val,), \
+                onDone = lambda catalog: storeDirectory(val, catalog), onError = directoryError, \
+                onProgress = showProgress)
+    else:
+        storeDirectory(val)
     event.Skip()
 
 
+# the generator of the input file; it caches the text of each section, so that it only renders the sections
+# that changed since the input file was last created
+inputFileGenerator = InputFileGenerator(myDict)
+
 def createInputFileFunction(event):
-    # TODO super dooper important, pretty much the reason for the whole thing
-    # see previous version of GUI to see the basic structure, less some modifications for v1.2
-    print myDict['runName']
+
+    # text that has been typed, but not stored yet (see textCommitPolicy), must be in myDict first
+    flushPendingText()
+
+    # values that could not be parsed (e.g., a letter in a numeric field) would make an invalid input file
+    errors = myDict.errors()
+    if errors:
+        for objKeyword in sorted(errors.keys()):
+            print errors[objKeyword]
+        event.Skip()
+        return
+
+    # the input file is written to the simulation directory (if one was selected), and named after the run
+    if not myDict.text('runName'):
+        print 'Please enter a run name; the input file is named after it.'
+        event.Skip()
+        return
+    # a line holding a value for each species (or box) must have all of them (see inputFileGenerator.py)
+    errors = inputFileGenerator.errors()
+    if errors:
+        for error in errors:
+            print error
+        event.Skip()
+        return
+    inputFileName = os.path.join(myDict.text('simDir', os.getcwd()), myDict.text('runName') + ".inp")
+    inputFileGenerator.write(inputFileName)
+    print 'Wrote %s' %(inputFileName)
+    event.Skip()
+
+# a session is the text of every keyword in myDict, saved as a JSON object (which batchInput.py can
+# also read as a parameter set).  Restoring a session replaces the values of the form with those of
+# the session through bulkAssign(), so the whole form is filled in without an event per widget
+def saveSession(path):
+    flushPendingText()
+    # as InputFileGenerator.write() does, the session is written to a temporary file in the same directory,
+    # which then replaces the file at 'path': an error while writing leaves the previous session intact
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporaryPath = tempfile.mkstemp(prefix = ".", suffix = ".json.tmp", dir = directory)
+    try:
+        f = os.fdopen(descriptor, "w")
+        try:
+            json.dump(dict(myDict), f, indent = 1, sort_keys = True)
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+        # mkstemp() creates the file readable by its owner only; give it the permissions of a new file
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temporaryPath, 0666 & ~umask)
+        # os.rename() replaces an existing file atomically, except on Windows, where it must be removed first
+        if (os.name == "nt" and os.path.exists(path)):
+            os.remove(path)
+        os.rename(temporaryPath, path)
+    except:
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+        raise
+
+def restoreSession(path):
+    global simDirCatalog
+    f = open(path, "r")
+    try:
+        session = json.load(f)
+    finally:
+        f.close()
+    if not isinstance(session, dict):
+        raise ValueError('%s does not hold a session' %(path))
+    flushPendingText()
+
+    # the keywords that are not in the session are cleared
+    values = dict([(keyword, "") for keyword in myDict.keys()])
+    for keyword, value in session.iteritems():
+        values[storeText(keyword)] = storeText(value)
+    bulkAssign(values)
+
+    # the simulation directory is catalogued again, in the background (see simDirFunction)
+    cancelFileTask("simDir")
+    simDirCatalog = None
+    directory = myDict.text("simDir")
+    if (simulationDirectoryDisplay._obj is not None):
+        if directory:
+            simulationDirectoryDisplay._obj.SetValue("/%s/" %(os.path.split(directory)[1]))
+        else:
+            simulationDirectoryDisplay._obj.SetValue("")
+    if directory:
+        def storeCatalog(catalog):
+            global simDirCatalog
+            pendingFileTasks.pop("simDir", None)
+            simDirCatalog = catalog
+            showStatus("")
+        def catalogError(error):
+            pendingFileTasks.pop("simDir", None)
+            showStatus("")
+            print error
+        pendingFileTasks["simDir"] = workerPool.submit(catalogDirectory, (directory,), \
+                onDone = storeCatalog, onError = catalogError, onProgress = showProgress)
 
 
 
@@ -875,6 +2183,10 @@ numberOfSpeciesWidget.setFunction(defaultChoiceFunction)
 ensembleWidget.setFunction(defaultChoiceFunction)
 makeInputFileWidget.setFunction(createInputFileFunction)
 
+# the visibility of most pages depends on the ensemble and the number of species; the widgets hidden by
+# each of their choices are precomputed (see VisibilityTable)
+visibilityTable = VisibilityTable([ensembleWidget, numberOfSpeciesWidget])
+
 
 # show/hide dynamics
 #
@@ -1000,73 +2312,49 @@ CBMCCutoffBox1 = Widget(PanelOnePageTwo, widgetType="text", name="cbmcCutoffB1",
 CBMCCutoffBox2 = Widget(PanelOnePageTwo, widgetType="text", name="cbmcCutoffB2", \
         pos=(18,2), label="Cutoff (%s) Box 2: " %(angstrom), labelPos=(18,1))
 
-# "Chemical Potential (kJ/mol)" label
-chemicalPotentialLabel = Widget(PanelOnePageTwo, widgetType = "static", \
-        name="Chemical Potential (kJ/mol)", pos=(1,5), span=(1,2))
-
-# our label for species 1
-chemicalPotentialS1Label = Widget(PanelOnePageTwo, widgetType = "static", \
-        name = "Species 1: ", pos =(2,5))
-
-# our labels for species 2-6 (same process)..
-chemicalPotentialS2Label = Widget(PanelOnePageTwo, widgetType = "static", \
-        name = "Species 2: ", pos =(3,5))
-chemicalPotentialS3Label = Widget(PanelOnePageTwo, widgetType = "static", \
-        name = "Species 3: ", pos =(4,5))
-chemicalPotentialS4Label = Widget(PanelOnePageTwo, widgetType = "static", \
-        name = "Species 4: ", pos =(5,5))
-chemicalPotentialS5Label = Widget(PanelOnePageTwo, widgetType = "static", \
-        name = "Species 5: ", pos =(6,5))
-chemicalPotentialS6Label = Widget(PanelOnePageTwo, widgetType = "static", \
-        name = "Species 6: ", pos =(7,5))
-
-# Chemical potential prompts, for species 1-6 (## IMPORTANT -
-# if support for more than 6 species within the GUI is desired, must change that here)
-
-# the text widgets for species 1-6
-chemicalPotentialS1Widget = Widget(PanelOnePageTwo, widgetType = "text", \
-        name = "", pos = (2,6))
-chemicalPotentialS2Widget = Widget(PanelOnePageTwo, widgetType = "text", \
-        name = "", pos = (3,6))
-chemicalPotentialS3Widget = Widget(PanelOnePageTwo, widgetType = "text", \
-        name = "", pos = (4,6))
-chemicalPotentialS4Widget = Widget(PanelOnePageTwo, widgetType = "text", \
-        name = "", pos = (5,6))
-chemicalPotentialS5Widget = Widget(PanelOnePageTwo, widgetType = "text", \
-        name = "", pos = (6,6))
-chemicalPotentialS6Widget = Widget(PanelOnePageTwo, widgetType = "text", \
-        name = "", pos = (7,6))
+# the "Chemical Potential (kJ/mol)" label, and the "Species N: " label and text widget of each species;
+# these are described in formSpec.chemicalPotentialSpec.  The widgets can be looked up by their id, e.g.
+# chemicalPotentialWidgets["chemicalPotentialS1Widget"]; above formSpec.gridThreshold species, the
+# chemical potentials are entered in chemicalPotentialWidgets["chemicalPotentialGrid"]
+chemicalPotentialPlan = formSpec.compilePlan(formSpec.chemicalPotentialSpec, maxNumberOfSpecies)
+chemicalPotentialWidgets = buildFromPlan(chemicalPotentialPlan)
 
 #### H-Matrix Frame objects & functions
+
+# the H-matrix frames are built once per box, the first time they are requested, and are hidden
+# (rather than destroyed) when the user is done with them; reopening a frame only repopulates its
+# text widgets from myDict.
+# box number ('1' or '2') -> (Frame, [(H-matrix text widget, its dictionary keyword), ...])
+hMatrixFrames = {}
+
 def destroyHMatrix(event):
 
-    # the user clicked 'Done', so destroy the Frame and its objects
+    # the user clicked 'Done', so hide the Frame; it is shown again by hMatrixFunction
 
     # first, we get the object that received the event (the "Done" button)
     obj = event.GetEventObject()
 
     # get the object obj's parent frame
-    # obj is the "Done" button, whose parent is the Panel, whose parent is the Frame;
-    # we call the Close() function on the Frame object (i.e., destroy the top level object).
-    frameToBeClosed = obj.GetParent().GetParent()
-    frameToBeClosed.Close();
+    # obj is the "Done" button, whose parent is the Panel, whose parent is the Frame
+    frameToBeHidden = obj.GetParent().GetParent()
+    frameToBeHidden.Hide()
     event.Skip()
 
+# closing an H-matrix frame (e.g., with the window manager's close button) also just hides it;
+# if the close cannot be vetoed (e.g., the application is exiting), let the frame be destroyed
+def closeHMatrix(event):
+    if event.CanVeto():
+        event.Veto()
+        event.GetEventObject().Hide()
+    else:
+        event.Skip()
 
-def hMatrixFunction(event):
-
-    # get the button from which the event originated
-    obj = event.GetEventObject()
-
-    # get the dictionary keyword argument assigned to the H-Matrix Button
-    objKeyword = obj._dictKwarg
-
-    # objKeyword is either 'hmatrix box 1' or 'hmatrix box 2'
-    # so, splice the objKeyword and store the last index (either '1' or '2') in a new variable
-    thisBox = str(objKeyword[-1])
+# build the H-matrix frame for box 'thisBox'; returns the Frame and its text widgets
+def buildHMatrixFrame(thisBox):
 
-    # now we need to spawn a frame
-    hMatrixFrame = Frame(None,"H Matrix",(360,300))
+    # now we need to spawn a frame; its parent is the main frame, so that it is destroyed along
+    # with the main frame when the application exits
+    hMatrixFrame = Frame(MainFrame._obj,"H Matrix",(360,300))
     hMatrixPanel = Panel(hMatrixFrame)
 
     # place the widgets on the frame
@@ -1076,136 +2364,73 @@ def hMatrixFunction(event):
             name = instructionsStringHMatrix, pos = (1,1), span = (1,4))
 
     # now, more static widget labels - our x, y, and z director vectors
-    xTopLabelHMatrix = Widget(hMatrixPanel, widgetType = "static", \
-            name = "x", pos = (2,2))
-    yTopLabelHMatrix = Widget(hMatrixPanel, widgetType = "static", \
-            name = "y", pos = (2,3))
-    zTopLabelHMatrix = Widget(hMatrixPanel, widgetType = "static", \
-            name = "z", pos = (2,4))
-
     # and x, y, z labels on the sides
-    xSideLabelHMatrix = Widget(hMatrixPanel, widgetType = "static", \
-            name = "x", pos = (3,1))
-    ySideLabelHMatrix = Widget(hMatrixPanel, widgetType = "static", \
-            name = "y", pos = (4,1))
-    zSideLabelHMatrix = Widget(hMatrixPanel, widgetType = "static", \
-            name = "z", pos = (5,1))
+    for column, vector in enumerate(("x", "y", "z")):
+        Widget(hMatrixPanel, widgetType = "static", name = vector, pos = (2,column+2))
+        Widget(hMatrixPanel, widgetType = "static", name = vector, pos = (column+3,1))
 
     # the text widgets forming the h-matrix
     #   xx    xy     xz
     #   yx    yy     yz
     #   zx    zy     zz
-
-    xxHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (3,2))
-    xyHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (3,3))
-    xzHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (3,4))
-
-    yxHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (4,2))
-    yyHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (4,3))
-    yzHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (4,4))
-
-    zxHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (5,2))
-    zyHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (5,3))
-    zzHMatrixTextWidget = Widget(hMatrixPanel, widgetType = "text", \
-            name = "", pos = (5,4))
+    # assign each its dictionary keyword argument (the director vector and the box number);
+    # these will all use the default text function
+    textWidgets = []
+    for row, first in enumerate(("x", "y", "z")):
+        for column, second in enumerate(("x", "y", "z")):
+            keyword = "%s%s %s" %(first, second, thisBox)
+            textWidget = Widget(hMatrixPanel, widgetType = "text", \
+                    name = "", pos = (row+3,column+2))
+            textWidget.setDictKwarg(keyword)
+            textWidget.setFunction(defaultTextFunction)
+            textWidgets.append((textWidget, keyword))
 
     # also, this is a Frame object, not a dialog (as with the simulation directory button)
-    # therefore, we need to add a button that destroys the frame when the user is done entering
+    # therefore, we need to add a button that hides the frame when the user is done entering
     # the information
-
     doneButtonHMatrix = Widget(hMatrixPanel, widgetType = "button", \
             name = "Done", pos = (7,4))
 
-    # we now have all of our widgets on the panel; assign dictionary keyword arguments
-    # to the relevant widgets (the widgets that will store or access data in dictionary 'myDict')
-    # for the h-matrix text widgets, assign it as the director vector  and the box number
-    xxHMatrixTextWidget.setDictKwarg("xx %s" %thisBox)
-    xyHMatrixTextWidget.setDictKwarg("xy %s" %thisBox)
-    xzHMatrixTextWidget.setDictKwarg("xz %s" %thisBox)
-    yxHMatrixTextWidget.setDictKwarg("yx %s" %thisBox)
-    yyHMatrixTextWidget.setDictKwarg("yy %s" %thisBox)
-    yzHMatrixTextWidget.setDictKwarg("yz %s" %thisBox)
-    zxHMatrixTextWidget.setDictKwarg("zx %s" %thisBox)
-    zyHMatrixTextWidget.setDictKwarg("zy %s" %thisBox)
-    zzHMatrixTextWidget.setDictKwarg("zz %s" %thisBox)
-
-    # these will all use the default text function
-    xxHMatrixTextWidget.setFunction(defaultTextFunction)
-    xyHMatrixTextWidget.setFunction(defaultTextFunction)
-    xzHMatrixTextWidget.setFunction(defaultTextFunction)
-    yxHMatrixTextWidget.setFunction(defaultTextFunction)
-    yyHMatrixTextWidget.setFunction(defaultTextFunction)
-    yzHMatrixTextWidget.setFunction(defaultTextFunction)
-    zxHMatrixTextWidget.setFunction(defaultTextFunction)
-    zyHMatrixTextWidget.setFunction(defaultTextFunction)
-    zzHMatrixTextWidget.setFunction(defaultTextFunction)
-
     # assign the 'close' functionality to the 'Done' button
     doneButtonHMatrix.setFunction(destroyHMatrix)
 
     # initialize all the objects.
     hMatrixFrame.initObj()
+    hMatrixFrame._obj.Bind(wx.EVT_CLOSE, closeHMatrix)
 
-    # now that we have all the objects instantiated, we can work with the wxWidgets objects
+    return hMatrixFrame, textWidgets
 
-    # we wish to populate the text widgets with their values if the user re-opens
-    # the window; so, look in myDict for the _dictKwarg assigned to each text widget; if it is
-    # in the dictionary, set the value of the textwidget to that value;
-    # else, set the value to an empty string
+def hMatrixFunction(event):
 
-    # there isn't a very elegant way to handle this; just copy and paste the same code for each widget
-    # we need to work with the wxWidget objects directly; access via ._obj syntax
-    if (("xx %s" %(thisBox)) in myDict.keys()):
-        xxHMatrixTextWidget._obj.SetValue(myDict["xx %s" %thisBox])
-    else:
-        xxHMatrixTextWidget._obj.SetValue('')
-    if (("xy %s" %(thisBox)) in myDict.keys()):
-        xyHMatrixTextWidget._obj.SetValue(myDict["xy %s" %thisBox])
-    else:
-        xyHMatrixTextWidget._obj.SetValue('')
-    if (("xz %s" %(thisBox)) in myDict.keys()):
-        xzHMatrixTextWidget._obj.SetValue(myDict["xz %s" %thisBox])
-    else:
-        xzHMatrixTextWidget._obj.SetValue('')
+    # get the button from which the event originated
+    obj = event.GetEventObject()
 
-    # and for our y[x,y,z] text widgets...
-    if (("yx %s" %(thisBox)) in myDict.keys()):
-        yxHMatrixTextWidget._obj.SetValue(myDict["yx %s" %thisBox])
-    else:
-        yxHMatrixTextWidget._obj.SetValue('')
-    if (("yy %s" %(thisBox)) in myDict.keys()):
-        yyHMatrixTextWidget._obj.SetValue(myDict["yy %s" %thisBox])
-    else:
-        yyHMatrixTextWidget._obj.SetValue('')
-    if (("yz %s" %(thisBox)) in myDict.keys()):
-        yzHMatrixTextWidget._obj.SetValue(myDict["yz %s" %thisBox])
-    else:
-        yzHMatrixTextWidget._obj.SetValue('')
+    # get the dictionary keyword argument assigned to the H-Matrix Button
+    objKeyword = obj._dictKwarg
 
-    # and for our z[x,y,z] text widgets...
-    if (("zx %s" %(thisBox)) in myDict.keys()):
-        zxHMatrixTextWidget._obj.SetValue(myDict["zx %s" %thisBox])
-    else:
-        zxHMatrixTextWidget._obj.SetValue('')
-    if (("zy %s" %(thisBox)) in myDict.keys()):
-        zyHMatrixTextWidget._obj.SetValue(myDict["zy %s" %thisBox])
-    else:
-        zyHMatrixTextWidget._obj.SetValue('')
-    if (("zz %s" %(thisBox)) in myDict.keys()):
-        zzHMatrixTextWidget._obj.SetValue(myDict["zz %s" %thisBox])
-    else:
-        zzHMatrixTextWidget._obj.SetValue('')
+    # objKeyword is either 'hmatrix box 1' or 'hmatrix box 2'
+    # so, splice the objKeyword and store the last index (either '1' or '2') in a new variable
+    thisBox = str(objKeyword[-1])
+
+    # build the frame for this box, unless it already exists (and has not been destroyed)
+    cached = hMatrixFrames.get(thisBox)
+    if (cached is None or cached[0]._obj is None):
+        cached = buildHMatrixFrame(thisBox)
+        hMatrixFrames[thisBox] = cached
+    hMatrixFrame, textWidgets = cached
+
+    # we wish to populate the text widgets with their values if the user re-opens
+    # the window; so, look in myDict for the _dictKwarg assigned to each text widget; if it is
+    # in the dictionary, set the value of the textwidget to that value;
+    # else, set the value to an empty string.
+    # ChangeValue() does not send a text event, so myDict is not written back to while doing so
+    for textWidget, keyword in textWidgets:
+        textWidget._obj.ChangeValue(myDict.text(keyword))
 
     # and that concludes the hMatrix panels.  note that this handles both
     # the box 1 and box 2 h matrix stuff.
+    hMatrixFrame._obj.Show()
+    hMatrixFrame._obj.Raise()
     event.Skip()
 
 
@@ -1230,12 +2455,6 @@ CBMCCutoffBox1.setDictKwarg("cbmcCutoffBox1")
 CBMCCutoffBox2.setDictKwarg("cbmcCutoffBox2")
 box1HMatrix.setDictKwarg("hmatrix box 1")
 box2HMatrix.setDictKwarg("hmatrix box 2")
-chemicalPotentialS1Widget.setDictKwarg("chemPot S1")
-chemicalPotentialS2Widget.setDictKwarg("chemPot S2")
-chemicalPotentialS3Widget.setDictKwarg("chemPot S3")
-chemicalPotentialS4Widget.setDictKwarg("chemPot S4")
-chemicalPotentialS5Widget.setDictKwarg("chemPot S5")
-chemicalPotentialS6Widget.setDictKwarg("chemPot S6")
 
 # bind the widgets on this panel to functions as needed
 temperatureWidget.setFunction(defaultTextFunction)
@@ -1256,12 +2475,6 @@ CBMCCutoffBox1.setFunction(defaultTextFunction)
 CBMCCutoffBox2.setFunction(defaultTextFunction)
 box1HMatrix.setFunction(hMatrixFunction)
 box2HMatrix.setFunction(hMatrixFunction)
-chemicalPotentialS1Widget.setFunction(defaultTextFunction)
-chemicalPotentialS2Widget.setFunction(defaultTextFunction)
-chemicalPotentialS3Widget.setFunction(defaultTextFunction)
-chemicalPotentialS4Widget.setFunction(defaultTextFunction)
-chemicalPotentialS5Widget.setFunction(defaultTextFunction)
-chemicalPotentialS6Widget.setFunction(defaultTextFunction)
 
 
 ######################################################################################
@@ -1289,39 +2502,14 @@ box2HMatrix.setMaster(box2ShapeChoice,["","CUBIC"])
 box2LengthWidget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GCMC"])
 CBMCCutoffBox2.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GCMC"])
 
-chemicalPotentialLabel.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialLabel.setMaster(numberOfSpeciesWidget,[""])
-
-# species 1-6; these are shown only if the ensemble chosen is GCMC; hide for all other selections
-# our labels
-chemicalPotentialS1Label.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS2Label.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS3Label.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS4Label.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS5Label.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS6Label.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-# our widgets
-chemicalPotentialS1Widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS2Widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS3Widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS4Widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS5Widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
-chemicalPotentialS6Widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
+# the chemical potentials are shown only if the ensemble chosen is GCMC; hide them for all other selections
+for widget in chemicalPotentialWidgets.itervalues():
+    widget.setMaster(ensembleWidget,["","NVT_MC","NVT_MIN","NPT_MC","GEMC","GEMC_NPT"])
+chemicalPotentialWidgets["chemicalPotentialLabel"].setMaster(numberOfSpeciesWidget,[""])
 
 # add number of species restrictions to the chemical potential widgets
-chemicalPotentialS1Label.setMaster(numberOfSpeciesWidget,[""])
-chemicalPotentialS2Label.setMaster(numberOfSpeciesWidget,["","1"])
-chemicalPotentialS3Label.setMaster(numberOfSpeciesWidget,["","1","2"])
-chemicalPotentialS4Label.setMaster(numberOfSpeciesWidget,["","1","2","3"])
-chemicalPotentialS5Label.setMaster(numberOfSpeciesWidget,["","1","2","3","4"])
-chemicalPotentialS6Label.setMaster(numberOfSpeciesWidget,["","1","2","3","4","5"])
-
-chemicalPotentialS1Widget.setMaster(numberOfSpeciesWidget,[""])
-chemicalPotentialS2Widget.setMaster(numberOfSpeciesWidget,["","1"])
-chemicalPotentialS3Widget.setMaster(numberOfSpeciesWidget,["","1","2"])
-chemicalPotentialS4Widget.setMaster(numberOfSpeciesWidget,["","1","2","3"])
-chemicalPotentialS5Widget.setMaster(numberOfSpeciesWidget,["","1","2","3","4"])
-chemicalPotentialS6Widget.setMaster(numberOfSpeciesWidget,["","1","2","3","4","5"])
+hideSpeciesRows(chemicalPotentialWidgets, ["chemicalPotentialS%(species)sLabel", \
+        "chemicalPotentialS%(species)sWidget"], "chemicalPotentialGrid")
 
 #####
 # and widgets that are initially hidden, even after considering navigational restrictions
@@ -1651,138 +2839,27 @@ amberCheckbox = Widget(PanelTwoIntramolecular, widgetType = "checkbox", \
 charmmCheckbox = Widget(PanelTwoIntramolecular, widgetType = "checkbox", \
         name = "CHARMM", pos = (1,4))
 
-# Species labels - left hand column
-s1IntraLabel = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "Species 1", pos = (5,1))
-s2IntraLabel = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "Species 2", pos = (7,1))
-s3IntraLabel = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "Species 3", pos = (9,1))
-s4IntraLabel = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "Species 4", pos = (11,1))
-s5IntraLabel = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "Species 5", pos = (13,1))
-s6IntraLabel = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "Species 6", pos = (15,1))
-
-vdwString = "van der Waals"
-coulombicString = "Coulombic"
-labelOptionsIntramolecular = [vdwString, coulombicString]
-# vdw /and/ charge style
-# we place these 6 times each
-
-# initialize an empty list, which will hold each static text widget, either
-# 'van der Waals' or 'Coulombic' static text, placed iteratively.
-# since they alternate, we take i mod 2, yielding either 0 or 1, which is the tuple index of
-# our desired string in the variable 'labelOptionsIntramolecular' about 8 lines above.
-labelsVdwCoulIntramolecular = []
-for i in range(maxNumberOfSpecies*2):
-    labelsVdwCoulIntramolecular.append(Widget(PanelTwoIntramolecular, \
-            widgetType = "static", name = labelOptionsIntramolecular[i%2],
-            pos = (i+5,2)))
-
-interactionsLabel12 = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "1-2 Scaling", pos = (4,3))
-interactionsLabel13 = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "1-3 Scaling", pos = (4,4))
-interactionsLabel14 = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "1-4 Scaling", pos = (4,5))
-interactionsLabel1N = Widget(PanelTwoIntramolecular, widgetType = "static", \
-        name = "1-N Scaling", pos = (4,6))
-
-# species 1,2,3,4,5,6 scaling for 1-2, 1-3, 1-4, 1-N interactions: these will be text widgets
-# so, we have 4 interaction scale factors for each [coulombic and vdw] interaction for
-# each species; thus, we need maxNumberOfSpecies * 4 * 2 textwidgets; at the time
-# of writing this comment, that is 6*4*2 = 48
-# so, we do it iteratively
-# however, it is easiest if we split up the vdw and the coulombic into separate lists
-# and also do this with the species in separate lists
-
-# initialize empty lists for each species coulomb and vdw interaction scale factors
-s1vdwScales = []
-s1coulScales = []
-
-s2vdwScales = []
-s2coulScales = []
-
-s3vdwScales = []
-s3coulScales = []
-
-s4vdwScales = []
-s4coulScales = []
-
-s5vdwScales = []
-s5coulScales = []
-
-s6vdwScales = []
-s6coulScales = []
-
-# but we'll just loop over these
-# that being said, it is convenient to have those other lists explicitly as well.
-# maybe, anyways.
-allVdwList = [s1vdwScales, s2vdwScales, s3vdwScales,s4vdwScales,s5vdwScales,s6vdwScales]
-allCoulList = [s1coulScales,s2coulScales,s3coulScales,s4coulScales,s5coulScales,s6coulScales]
-
-# and we'll make a list of the labels made above while we're at it.  they need show/hide dynamics
-# and we can take care of that now
-allLabelsListIntramolecular = [s1IntraLabel, s2IntraLabel, s3IntraLabel, s4IntraLabel,
-        s5IntraLabel, s6IntraLabel]
-
+# for each species, its label ("Species 1", in the left hand column), and two rows: the 'van der Waals'
+# label and the 1-2, 1-3, 1-4 and 1-N scale factors for van der Waals interactions, then the same for
+# Coulombic interactions.  These are described in formSpec.intramolecularSpec; the text widgets can be
+# looked up by their id, e.g. intramolecularWidgets["s1Vdw1-2"] or intramolecularWidgets["s1Coul1-N"].
+# Above formSpec.gridThreshold species, the scale factors are entered in
+# intramolecularWidgets["intramolecularGrid"]
+intramolecularPlan = formSpec.compilePlan(formSpec.intramolecularSpec, maxNumberOfSpecies)
+intramolecularWidgets = buildFromPlan(intramolecularPlan)
 
 # a list of the interactions.. we'll use this for defining the dictionary keyword arguments
 interactionScales = [" 1-2", " 1-3", " 1-4", " 1-N"]
 
-for i in range(len(allVdwList)):
-
-    # form the hideWhen message for based on which species we are making
-    messageForHiding = [""]
-    toAppendToMessage = ["%s" %(k+1) for k in range(i)]
-
-    # concatenate the lists - this is our list of number of species for which we hide the widget
-    messageForHiding = messageForHiding + toAppendToMessage
-
-    # implement show/hide for the "Species 1" "Species 2" .... labels
-    allLabelsListIntramolecular[i].setMaster(numberOfSpeciesWidget,messageForHiding)
-
-    # do the same thing for the "van der Waals" and "Coulombic" labels
-
-    # this will handle the widgets at 0,2,4,6,8,10 indices... i.e., "van der Waals"
-    labelsVdwCoulIntramolecular[2*i].setMaster(numberOfSpeciesWidget,messageForHiding)
-
-    # now "Coulombic"
-    labelsVdwCoulIntramolecular[2*i + 1].setMaster(numberOfSpeciesWidget,messageForHiding)
-
-
-
-    for j in range(4):
-        # the vdw labels are in position (5,[3,4,5,6]), (7,[3,4,5,6]), ....
-        # so alter their positions accordingly
-        thisVdwObj = Widget(PanelTwoIntramolecular, widgetType = "text", \
-                name = "", pos = (5 + 2*i, 3+j))
-
-        thisVdwObjKwarg = "s%s" %(i+1) + interactionScales[j] + " vdw"
-
-        # set the dictionary keyword argument for this object and the function
-        thisVdwObj.setDictKwarg(thisVdwObjKwarg)
-        thisVdwObj.setFunction(defaultTextFunction)
-
-        # set the master with the message defined above (above the j loop)
-        thisVdwObj.setMaster(numberOfSpeciesWidget,messageForHiding)
-        thisVdwObj.setInitHide(True)
-
-        # append to our list
-        allVdwList[i].append(thisVdwObj)
-
-        # repeat this process for the coulomb interaction
-        thisCoulObj = Widget(PanelTwoIntramolecular, widgetType = "text", \
-                name = "", pos = (6 + 2*i, 3+j))
-        thisCoulObjKwarg = "s%s" %(i+1) + interactionScales[j] + " coul"
-
-        thisCoulObj.setDictKwarg(thisCoulObjKwarg)
-        thisCoulObj.setFunction(defaultTextFunction)
-        thisCoulObj.setMaster(numberOfSpeciesWidget,messageForHiding)
-        thisCoulObj.setInitHide(True)
-        allCoulList[i].append(thisCoulObj)
+# implement show/hide for the "Species 1" "Species 2" .... labels, the "van der Waals" and "Coulombic"
+# labels and the scale factors of each species; the scale factors are also hidden initially
+intramolecularRows = hideSpeciesRows(intramolecularWidgets, ["s%(species)sIntraLabel", \
+        "s%(species)sVdwLabel", "s%(species)sCoulLabel"] + \
+        ["s%%(species)sVdw%s" %(scale.strip()) for scale in interactionScales] + \
+        ["s%%(species)sCoul%s" %(scale.strip()) for scale in interactionScales], "intramolecularGrid")
+for widget in intramolecularRows:
+    if (widget._widgetType == "text"):
+        widget.setInitHide(True)
 
 # additionally, define the functions for the CHARMM and AMBER checkboxes
 
@@ -1821,26 +2898,29 @@ def amberCharmmFunction(event):
         lj_vals = ["", "", "", ""]
         elec_vals = ["","","",""]
 
-    # for all species in the range of the maximum number of species (
-    # this is defined earlier as '6' - search to find):
+    # for all species the user may choose, collect the values of the scale factors; they are then
+    # assigned at once, without an EVT_TEXT (and its handler) per widget (or a redraw of the grid per value)
+    values = {}
     for i in range(maxNumberOfSpecies):
 
-        # extract the species widgets from the list of all species
-        thisSpeciesVdw = allVdwList[i]
-        thisSpeciesCoul = allCoulList[i]
+        # the dictionary keyword arguments of this species' scale factors, e.g. "s1 1-2 vdw"
+        thisSpeciesVdw = ["s%s" %(i+1) + scale + " vdw" for scale in interactionScales]
+        thisSpeciesCoul = ["s%s" %(i+1) + scale + " coul" for scale in interactionScales]
 
         # if (i+1) (since python uses 0,1,2,3,4,5 for range())
         # is less than or equal to numSpecies, the number of species in our simulation as selected
         # in the number of species widget:
-        if ((i+1) <= int(myDict['numSpecies'])):
+        if ((i+1) <= myDict.value('numSpecies', 0)):
             for j in range(4):
-                thisSpeciesVdw[j]._obj.SetValue(lj_vals[j])
-                thisSpeciesCoul[j]._obj.SetValue(elec_vals[j])
+                values[thisSpeciesVdw[j]] = lj_vals[j]
+                values[thisSpeciesCoul[j]] = elec_vals[j]
         # else, we pass an empty string
         else:
             for j in range(4):
-                thisSpeciesVdw[j]._obj.SetValue("")
-                thisSpeciesCoul[j]._obj.SetValue("")
+                values[thisSpeciesVdw[j]] = ""
+                values[thisSpeciesCoul[j]] = ""
+    bulkAssign(values)
+    echo("intramolecular scaling:", len(values), "values assigned")
 
 
 
@@ -1863,513 +2943,17 @@ charmmCheckbox.setFunction(amberCharmmFunction)
 
 
 ######################################################################################
-# SECTION 4.5: Addition of widgets to PanelThreeTranslation
-######################################################################################
-
-# "Please note that the sum of the move probabilities across all move types must
-# sum to 1." label
-P3TranslationString1 = "Please note that the sum of the move " + \
-        "probabilities across all move types must sum to 1."
-
-P3TranslationLabel1 = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = P3TranslationString1, pos = (1,2), span = (1,6))
-
-# "Enter the maximum displacement %s allowed for each species in each box below"
-# %(angstrom). label
-P3TranslationString2 = "Enter the maximum displacement (%s) allowed " %angstrom + \
-        "for each species in each box below."
-P3TranslationLabel2 = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = P3TranslationString2, pos = (3,2), span = (1,6))
-
-# Move probability widget and label
-moveProbabilityTranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Move Probability: ", pos = (0,2))
-moveProbabilityTranslationWidget = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (0,3))
-
-# Species 1: label
-s1TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Species 1: ", pos = (5,2))
-# Species 2: label
-s2TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Species 2: ", pos = (6,2))
-# Species 3: label
-s3TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Species 3: ", pos = (7,2))
-# Species 4: label
-s4TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Species 4: ", pos = (8,2))
-# Species 5: label
-s5TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Species 5: ", pos = (9,2))
-# Species 6: label
-s6TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Species 6: ", pos = (10,2))
-# Box 1 label
-box1TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Box 1", pos = (4,3))
-# Box 2 label
-box2TranslationLabel = Widget(PanelThreeTranslation, widgetType = "static", \
-        name = "Box 2", pos =(4,4))
-
-# species 1 box 1 text widget
-s1b1Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (5,3))
-# species 1 box 2 text widget
-s1b2Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (5,4))
-# species 2 box 1 text widget
-s2b1Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (6,3))
-# species 2 box 2 text widget
-s2b2Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (6,4))
-# species 3 box 1 text widget
-s3b1Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (7,3))
-# species 3 box 2 text widget
-s3b2Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (7,4))
-# species 4 box 1 text widget
-s4b1Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (8,3))
-
-# species 4 box 2 text widget
-s4b2Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (8,4))
-# species 5 box 1 text widget
-s5b1Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (9,3))
-# species 5 box 2 text widget
-s5b2Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (9,4))
-# species 6 box 1 text widget
-s6b1Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (10,3))
-# species 6 box 2 text widget
-s6b2Translation = Widget(PanelThreeTranslation, widgetType = "text", \
-        name = "", pos = (10,4))
-
-
-# set the dictionary keywords for the text widgets on this panel
-moveProbabilityTranslationWidget.setDictKwarg("prob translation")
-s1b1Translation.setDictKwarg("prob trans s1 b1")
-s1b2Translation.setDictKwarg("prob trans s1 b2")
-s2b1Translation.setDictKwarg("prob trans s2 b1")
-s2b2Translation.setDictKwarg("prob trans s2 b2")
-s3b1Translation.setDictKwarg("prob trans s3 b1")
-s3b2Translation.setDictKwarg("prob trans s3 b2")
-s4b1Translation.setDictKwarg("prob trans s4 b1")
-s4b2Translation.setDictKwarg("prob trans s4 b2")
-s5b1Translation.setDictKwarg("prob trans s5 b1")
-s5b2Translation.setDictKwarg("prob trans s5 b2")
-s6b1Translation.setDictKwarg("prob trans s6 b1")
-s6b2Translation.setDictKwarg("prob trans s6 b2")
-
-# bind to functions
-moveProbabilityTranslationWidget.setFunction(defaultTextFunction)
-s1b1Translation.setFunction(defaultTextFunction)
-s1b2Translation.setFunction(defaultTextFunction)
-s2b1Translation.setFunction(defaultTextFunction)
-s2b2Translation.setFunction(defaultTextFunction)
-s3b1Translation.setFunction(defaultTextFunction)
-s3b2Translation.setFunction(defaultTextFunction)
-s4b1Translation.setFunction(defaultTextFunction)
-s4b2Translation.setFunction(defaultTextFunction)
-s5b1Translation.setFunction(defaultTextFunction)
-s5b2Translation.setFunction(defaultTextFunction)
-s6b1Translation.setFunction(defaultTextFunction)
-s6b2Translation.setFunction(defaultTextFunction)
-
-# show/hide functionality \TODO
-
-
-######################################################################################
-# SECTION 4.6: Addition of widgets to PanelThreeRotation
-######################################################################################
-
-# "Please note that the sum of the move probabilities across all move types must
-# sum to 1." label
-P3RotationString1 = "Please note that the sum of the move probabilities across " + \
-        "all move types must sum to 1."
-P3RotationString1Label = Widget(PanelThreeRotation, widgetType = "static", \
-        name = P3RotationString1, pos = (1,2), span = (1,6))
-
-# "Enter the maximum rotational width in degrees for each species in each box below"
-# label
-P3RotationString2 = "Enter the maximum rotational width in degrees for each " + \
-        "species in each box below."
-P3RotationString2Label = Widget(PanelThreeRotation, widgetType = "static", \
-        name = P3RotationString2, pos = (3,2), span = (1,6))
-
-# Move probability widget
-moveProbabilityRotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Move Probability: ", pos = (0,2))
-moveProbabilityRotationWidget = Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (0,3))
-
-# Species 1 label
-s1RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Species 1: ", pos = (5,2))
-#....
-s2RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Species 2: ", pos = (6,2))
-s3RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Species 3: ", pos = (7,2))
-s4RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Species 4: ", pos = (8,2))
-s5RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Species 5: ", pos = (9,2))
-s6RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Species 6: ", pos = (10,2))
-
-# Box 1 Label
-box1RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Box 1", pos = (4,3))
-# box 2 label
-box2RotationLabel = Widget(PanelThreeRotation, widgetType = "static", \
-        name = "Box 2", pos = (4,4))
-
-# s1 b1 text widget
-
-s1b1Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (5,3))
-# s1 b2 text widget
-
-s1b2Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (5,4))
-s2b1Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (6,3))
-s2b2Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (6,4))
-s3b1Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (7,3))
-s3b2Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (7,4))
-s4b1Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (8,3))
-s4b2Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (8,4))
-s5b1Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (9,3))
-s5b2Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (9,4))
-s6b1Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (10,3))
-s6b2Rotation= Widget(PanelThreeRotation, widgetType = "text", \
-        name = "", pos = (10,4))
-
-# set the dictionary keywords
-moveProbabilityRotationWidget.setDictKwarg("prob rotation")
-s1b1Rotation.setDictKwarg("prob rot s1 b1")
-s1b2Rotation.setDictKwarg("prob rot s1 b2")
-s2b1Rotation.setDictKwarg("prob rot s2 b1")
-s2b2Rotation.setDictKwarg("prob rot s2 b2")
-s3b1Rotation.setDictKwarg("prob rot s3 b1")
-s3b2Rotation.setDictKwarg("prob rot s3 b2")
-s4b1Rotation.setDictKwarg("prob rot s4 b1")
-s4b2Rotation.setDictKwarg("prob rot s4 b2")
-s5b1Rotation.setDictKwarg("prob rot s5 b1")
-s5b2Rotation.setDictKwarg("prob rot s5 b2")
-s6b1Rotation.setDictKwarg("prob rot s6 b1")
-s6b2Rotation.setDictKwarg("prob rot s6 b2")
-
-
-# set functionality
-moveProbabilityRotationWidget.setFunction(defaultTextFunction)
-s1b1Rotation.setFunction(defaultTextFunction)
-s1b2Rotation.setFunction(defaultTextFunction)
-s2b1Rotation.setFunction(defaultTextFunction)
-s2b2Rotation.setFunction(defaultTextFunction)
-s3b1Rotation.setFunction(defaultTextFunction)
-s3b2Rotation.setFunction(defaultTextFunction)
-s4b1Rotation.setFunction(defaultTextFunction)
-s4b2Rotation.setFunction(defaultTextFunction)
-s5b1Rotation.setFunction(defaultTextFunction)
-s5b2Rotation.setFunction(defaultTextFunction)
-s6b1Rotation.setFunction(defaultTextFunction)
-s6b2Rotation.setFunction(defaultTextFunction)
-
-
-# implement show/hide TODO
-
-######################################################################################
-# SECTION 4.7: Addition of widgets to PanelThreeRegrowth
-######################################################################################
-
-# "Please note that the sum of the move probabilities across all move types must
-# sum to 1." label
-P3RegrowthString1 = "Please note that the sum of the move " + \
-        "probabilities across all move types must sum to 1."
-P3RegrowthString1Label = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = P3RegrowthString1, pos = (1,2), span = (1,6))
-
-# "Enter the relative probablity of regrowth for each species below." label
-P3RegrowthString2 = "Enter the relative probability of regrowth for each species below."
-P3RegrowthString2Label = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = P3RegrowthString2, pos = (3,2), span = (1,6))
-
-# "Note that the relative probabilities below must sum to 1." label
-P3RegrowthString3 = "Note that the relative probabilities below must sum to 1."
-P3RegrowthString3Label = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = P3RegrowthString3, pos = (4,2), span = (1,6))
-
-# move probability label and widget
-moveProbabilityRegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Move Probability: ", pos = (0,2))
-moveProbabilityRegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (0,3))
-
-# Species 1 textwidget and label
-s1RegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Species 1: ", pos = (5,2))
-s2RegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Species 2: ", pos = (6,2))
-s3RegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Species 3: ", pos = (7,2))
-s4RegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Species 4: ", pos = (8,2))
-s5RegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Species 5: ", pos = (9,2))
-s6RegrowthLabel = Widget(PanelThreeRegrowth, widgetType = "static", \
-        name = "Species 6: ", pos = (10,2))
-
-# textwidgets
-s1RegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (5,3))
-s2RegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (6,3))
-s3RegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (7,3))
-s4RegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (8,3))
-s5RegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (9,3))
-s6RegrowthWidget = Widget(PanelThreeRegrowth, widgetType = "text", \
-        name = "", pos = (10,3))
-
-# assign dictionary keyword arguments
-moveProbabilityRegrowthWidget.setDictKwarg("prob regrowth")
-s1RegrowthWidget.setDictKwarg("prob regrowth s1")
-s2RegrowthWidget.setDictKwarg("prob regrowth s2")
-s3RegrowthWidget.setDictKwarg("prob regrowth s3")
-s4RegrowthWidget.setDictKwarg("prob regrowth s4")
-s5RegrowthWidget.setDictKwarg("prob regrowth s5")
-s6RegrowthWidget.setDictKwarg("prob regrowth s6")
-
-# set functions
-moveProbabilityRegrowthWidget.setFunction(defaultTextFunction)
-s1RegrowthWidget.setFunction(defaultTextFunction)
-s2RegrowthWidget.setFunction(defaultTextFunction)
-s3RegrowthWidget.setFunction(defaultTextFunction)
-s4RegrowthWidget.setFunction(defaultTextFunction)
-s5RegrowthWidget.setFunction(defaultTextFunction)
-s6RegrowthWidget.setFunction(defaultTextFunction)
-
-# show/hide functionality
-
-
-######################################################################################
-# SECTION 4.8: Addition of widgets to PanelThreeVolume
-######################################################################################
-
-# "Please note that the sum of the move probabilities across all move types must
-# sum to 1." label
-P3VolumeString1 = "Please note that the sum of the move probabilities " + \
-        "across all move types must sum to 1."
-P3VolumeString1Label = Widget(PanelThreeVolume, widgetType = "static", \
-        name = P3VolumeString1, pos = (1,2), span = (1,6))
-
-P3VolumeString2 = "Enter the maximum volume displacements in " + \
-        " %s^3 for the simulation box(es) below" %angstrom
-P3VolumeString2Label = Widget(PanelThreeVolume, widgetType = "static", \
-        name = P3VolumeString2, pos = (3,2), span = (1,6))
-
-P3VolumeString3 = "This flag is required for NPT-MC, GEMC-NPT, and " + \
-        "GEMC-NVT simulations, and may not be used for other simulation types."
-P3VolumeString3Label = Widget(PanelThreeVolume, widgetType = "static", \
-        name = P3VolumeString3, pos = (4,2), span = (1,8))
-
-moveProbabilityVolumeLabel = Widget(PanelThreeVolume, widgetType = "static", \
-        name = "Move Probability: ", pos = (0,2))
-moveProbabilityVolumeWidget = Widget(PanelThreeVolume, widgetType = "text", \
-        name = "", pos = (0,3))
-# box 1 label
-box1VolumeLabel = Widget(PanelThreeVolume, widgetType = "static", \
-        name = "Box 1: ", pos = (5,2))
-box2VolumeLabel = Widget(PanelThreeVolume, widgetType = "static", \
-        name = "Box 2: ", pos = (6,2))
-box1VolumeWidget = Widget(PanelThreeVolume, widgetType = "text", \
-        name = "", pos = (5,3))
-box2VolumeWidget = Widget(PanelThreeVolume, widgetType = "text", \
-        name = "", pos = (6,3))
-
-# set the dictionary keyword arguments
-moveProbabilityVolumeWidget.setDictKwarg("prob vol")
-box1VolumeWidget.setDictKwarg("prob vol b1")
-box2VolumeWidget.setDictKwarg("prob vol b2")
-
-# set the functionality
-moveProbabilityVolumeWidget.setFunction(defaultTextFunction)
-box1VolumeWidget.setFunction(defaultTextFunction)
-box2VolumeWidget.setFunction(defaultTextFunction)
-
-# show/ hide stuff TODO
-
-######################################################################################
-# SECTION 4.9: Addition of widgets to PanelThreeInsertion
-######################################################################################
-
-# "Please note that the sum of the move probabilities across all move types must
-# sum to 1." label
-P3InsertionString1 = "Please note that the sum of the move probabilities " + \
-        "across all move types must sum to 1."
-P3InsertionString1Label = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = P3InsertionString1, pos = (1,2), span = (1,6))
-
-# another string to be placed on the panel
-P3InsertionString2 = "Additionally, insertion moves define an equal probability of " + \
-        "deletion, and so this "
-P3InsertionString3 = "probability should be counted twice when summing to 1."
-
-P3InsertionString2Label = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = P3InsertionString2, pos = (2,2), span = (1,6))
-
-P3InsertionString3Label = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = P3InsertionString3, pos = (3,2), span = (1,6))
-# another string to be placed on the panel...
-P3InsertionString3 = "This flag is allowed only for GCMC simulations."
-P3InsertionString3Label = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = P3InsertionString3, pos = (8,4), span = (1,6))
-
-# and we prompt for the probability of an insertion (deletion) move to occur
-moveProbabilityInsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Move Probability: ", pos = (0,2))
-moveProbabilityInsertionWidget = Widget(PanelThreeInsertion, widgetType = "text", \
-        name = "", pos = (0,3))
-
-# our choices for the insertion method are as follows
-insertionChoiceOptions = ["", "cbmc", "none"]
-
-# the species 1 - 6 labels
-s1InsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Species 1: ", pos = (5,2))
-s2InsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Species 2: ", pos = (6,2))
-s3InsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Species 3: ", pos = (7,2))
-s4InsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Species 4: ", pos = (8,2))
-s5InsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Species 5: ", pos = (9,2))
-s6InsertionLabel = Widget(PanelThreeInsertion, widgetType = "static", \
-        name = "Species 6: ", pos = (10,2))
-
-# choice widgets for each species
-s1InsertionWidget = Widget(PanelThreeInsertion, widgetType = "choice", \
-        name = "", pos = (5,3), choices = insertionChoiceOptions)
-s2InsertionWidget = Widget(PanelThreeInsertion, widgetType = "choice", \
-        name = "", pos = (6,3), choices = insertionChoiceOptions)
-s3InsertionWidget = Widget(PanelThreeInsertion, widgetType = "choice", \
-        name = "", pos = (7,3), choices = insertionChoiceOptions)
-s4InsertionWidget = Widget(PanelThreeInsertion, widgetType = "choice", \
-        name = "", pos = (8,3), choices = insertionChoiceOptions)
-s5InsertionWidget = Widget(PanelThreeInsertion, widgetType = "choice", \
-        name = "", pos = (9,3), choices = insertionChoiceOptions)
-s6InsertionWidget = Widget(PanelThreeInsertion, widgetType = "choice", \
-        name = "", pos = (10,3), choices = insertionChoiceOptions)
-
-# assign dictionary keyword arguments to the text and choice widgets
-moveProbabilityInsertionWidget.setDictKwarg("prob insertion")
-s1InsertionWidget.setDictKwarg("insertion method s1")
-s2InsertionWidget.setDictKwarg("insertion method s2")
-s3InsertionWidget.setDictKwarg("insertion method s3")
-s4InsertionWidget.setDictKwarg("insertion method s4")
-s5InsertionWidget.setDictKwarg("insertion method s5")
-s6InsertionWidget.setDictKwarg("insertion method s6")
-
-# set the functions
-moveProbabilityInsertionWidget.setFunction(defaultTextFunction)
-s1InsertionWidget.setFunction(defaultChoiceFunction)
-s2InsertionWidget.setFunction(defaultChoiceFunction)
-s3InsertionWidget.setFunction(defaultChoiceFunction)
-s4InsertionWidget.setFunction(defaultChoiceFunction)
-s5InsertionWidget.setFunction(defaultChoiceFunction)
-s6InsertionWidget.setFunction(defaultChoiceFunction)
-
-# show/hide functionality
-
-######################################################################################
-# SECTION 4.10: Addition of widgets to PanelThreeSwap
+# SECTION 4.5 - 4.10: Addition of widgets to the PanelThree pages (Translation, Rotation,
+# Regrowth, Volume, Insertion, Swap)
 ######################################################################################
 
-# "Please note that the sum of the move probabilities across all move types must
-# sum to 1." label
-P3SwapString1 = "Please note that the sum of the move probabilities across " + \
-        "all move types must sum to 1."
-P3SwapString1Label = Widget(PanelThreeSwap, widgetType = "static", \
-        name = P3SwapString1, pos = (1,2), span = (1,6))
-
-P3SwapString2 = "This flag is allowed only for GEMC simulations."
-P3SwapString2Label = Widget(PanelThreeSwap, widgetType = "static", \
-        name = P3SwapString2, pos = (8,4), span = (1,6))
-
-P3SwapString3 = "Select the swap method for each relevant species in the simulation below."
-P3SwapString3Label = Widget(PanelThreeSwap, widgetType = "static", \
-        name = P3SwapString3, pos = (3,2), span = (1,6))
-
-moveProbabilitySwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Move Probability: ", pos = (0,2))
-moveProbabilitySwapWidget = Widget(PanelThreeSwap, widgetType = "text", \
-        name = "", pos = (0,3))
-
-swapChoiceOptions = ["", "reservoir", "none"]
-
-# species 1-6 labels
-s1SwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Species 1: ", pos = (5,2))
-s2SwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Species 2: ", pos = (6,2))
-s3SwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Species 3: ", pos = (7,2))
-s4SwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Species 4: ", pos = (8,2))
-s5SwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Species 5: ", pos = (9,2))
-s6SwapLabel = Widget(PanelThreeSwap, widgetType = "static", \
-        name = "Species 6: ", pos = (10,2))
-
-# choice widgets
-s1SwapChoice = Widget(PanelThreeSwap, widgetType = "choice", \
-        name = "", pos = (5,3), choices = swapChoiceOptions)
-s2SwapChoice = Widget(PanelThreeSwap, widgetType = "choice", \
-        name = "", pos = (6,3), choices = swapChoiceOptions)
-s3SwapChoice = Widget(PanelThreeSwap, widgetType = "choice", \
-        name = "", pos = (7,3), choices = swapChoiceOptions)
-s4SwapChoice = Widget(PanelThreeSwap, widgetType = "choice", \
-        name = "", pos = (8,3), choices = swapChoiceOptions)
-s5SwapChoice = Widget(PanelThreeSwap, widgetType = "choice", \
-        name = "", pos = (9,3), choices = swapChoiceOptions)
-s6SwapChoice = Widget(PanelThreeSwap, widgetType = "choice", \
-        name = "", pos = (10,3), choices = swapChoiceOptions)
-
-# set dictionary keyword arguments
-moveProbabilitySwapWidget.setDictKwarg("prob swap")
-s1SwapChoice.setDictKwarg("swap method s1")
-s2SwapChoice.setDictKwarg("swap method s2")
-s3SwapChoice.setDictKwarg("swap method s3")
-s4SwapChoice.setDictKwarg("swap method s4")
-s5SwapChoice.setDictKwarg("swap method s5")
-s6SwapChoice.setDictKwarg("swap method s6")
-
-# set functionality
-moveProbabilitySwapWidget.setFunction(defaultTextFunction)
-s1SwapChoice.setFunction(defaultChoiceFunction)
-s2SwapChoice.setFunction(defaultChoiceFunction)
-s3SwapChoice.setFunction(defaultChoiceFunction)
-s4SwapChoice.setFunction(defaultChoiceFunction)
-s5SwapChoice.setFunction(defaultChoiceFunction)
-s6SwapChoice.setFunction(defaultChoiceFunction)
+# these pages repeat the same rows for every species and box; they are described in
+# formSpec.moveProbabilitySpec, and built here from its plan, for as many species as
+# the user may choose.  The widgets can be looked up by their id, e.g.
+# moveProbabilityWidgets["s1b2Translation"]; above formSpec.gridThreshold species, the rows of each
+# page are entered in a single grid instead, e.g. moveProbabilityWidgets["PanelThreeTranslationGrid"]
+moveProbabilityPlan = formSpec.compilePlan(formSpec.moveProbabilitySpec, maxNumberOfSpecies)
+moveProbabilityWidgets = buildFromPlan(moveProbabilityPlan)
 
 
 ######################################################################################
@@ -2388,187 +2972,157 @@ P4MCFString2 = "This number will be used for memory allocation purposes only."
 P4MCFString2Label = Widget(PanelFourMoleculeFiles, widgetType = "static", \
         name = P4MCFString2, pos = (2,1), span = (1,5))
 
-# 'Select' Label
-selectMCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Select", pos = (3,2))
-
-# 'Selection' label
-selectionString = "                     Selection                     "
-selectionMCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = selectionString, pos = (3,3))
-
-# '# Molecules' label
-nMoleculesLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "# Molecules", pos = (3,4))
-
-# species 1-6 labels
-s1MCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Species 1: ", pos = (4,1))
-s2MCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Species 2: ", pos = (5,1))
-s3MCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Species 3: ", pos = (6,1))
-s4MCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Species 4: ", pos = (7,1))
-s5MCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Species 5: ", pos = (8,1))
-s6MCFLabel = Widget(PanelFourMoleculeFiles, widgetType = "static", \
-        name = "Species 6: ", pos = (9,1))
-
-# species 1-6 buttons
-s1MCFButton = Widget(PanelFourMoleculeFiles, widgetType = "button", \
-        name = "Select MCF File", pos = (4,2))
-s2MCFButton = Widget(PanelFourMoleculeFiles, widgetType = "button", \
-        name = "Select MCF File", pos = (5,2))
-s3MCFButton = Widget(PanelFourMoleculeFiles, widgetType = "button", \
-        name = "Select MCF File", pos = (6,2))
-s4MCFButton = Widget(PanelFourMoleculeFiles, widgetType = "button", \
-        name = "Select MCF File", pos = (7,2))
-s5MCFButton = Widget(PanelFourMoleculeFiles, widgetType = "button", \
-        name = "Select MCF File", pos = (8,2))
-s6MCFButton = Widget(PanelFourMoleculeFiles, widgetType = "button", \
-        name = "Select MCF File", pos = (9,2))
-
-# species 1-6 display selections (TE_READONLY text widgets)
-s1MCFDisplay = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (4,3), style = wx.TE_READONLY)
-s2MCFDisplay = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (5,3), style = wx.TE_READONLY)
-s3MCFDisplay = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (6,3), style = wx.TE_READONLY)
-s4MCFDisplay = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (7,3), style = wx.TE_READONLY)
-s5MCFDisplay = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (8,3), style = wx.TE_READONLY)
-s6MCFDisplay = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (9,3), style = wx.TE_READONLY)
-
-# species 1-6 nmolecules textwidgets
-s1NmolsWidget = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (4,4))
-s2NmolsWidget = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (5,4))
-s3NmolsWidget = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (6,4))
-s4NmolsWidget = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (7,4))
-s5NmolsWidget = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (8,4))
-s6NmolsWidget = Widget(PanelFourMoleculeFiles, widgetType = "text", \
-        name = "", pos = (9,4))
-
-# set dictionary keyword arguments for the buttons and the nmols textwidgets
-# (these are the only widgets which will store data)
-s1MCFButton.setDictKwarg("MCF s1")
-s2MCFButton.setDictKwarg("MCF s2")
-s3MCFButton.setDictKwarg("MCF s3")
-s4MCFButton.setDictKwarg("MCF s4")
-s5MCFButton.setDictKwarg("MCF s5")
-s6MCFButton.setDictKwarg("MCF s6")
-s1NmolsWidget.setDictKwarg("max nmols s1")
-s2NmolsWidget.setDictKwarg("max nmols s2")
-s3NmolsWidget.setDictKwarg("max nmols s3")
-s4NmolsWidget.setDictKwarg("max nmols s4")
-s5NmolsWidget.setDictKwarg("max nmols s5")
-s6NmolsWidget.setDictKwarg("max nmols s6")
-
-
-# our custom function for what to do when a "Select MCF File" button is clicked
-def MCFButtonFunction(event):
-
-    # get the object that received the event
-    obj = event.GetEventObject();
+# the column headers, and for each species its label, the "Select MCF File" button, the display of
+# the MCF selected and the maximum number of molecules are built below (see moleculeFilesSpec), once the
+# functions of the buttons are defined
+
+
+# runs on a worker thread: the number of fragments of the molecule in the MCF 'path'
+def readFragmentCount(task,path):
+    task.progress(0.0, "Reading %s" %(os.path.basename(path)))
+    # the number of fragments is on the line following '# Fragment_Info'; mcfParser reads only
+    # that line (and remembers it, should the same file be selected again)
+    return mcfParser.fragmentCount(path)
+
+# the Task of the worker pool refreshing simDirCatalog, if one was started
+catalogRefresh = None
+
+# the simulation directory could not be checked for new files (e.g., it was removed)
+def catalogRefreshError(error):
+    showStatus("")
+    print error
+
+# the choice that lets the user look for an MCF that is not in the catalog of the simulation directory
+browseChoice = "Browse..."
+
+# let the user select an MCF; returns its path, or '' if the user cancelled.
+# the MCFs in the catalog of the simulation directory are offered at once; a file dialog is only
+# needed if the MCF is elsewhere (or there is no catalog)
+def selectMCF(obj):
+    if (simDirCatalog is not None and simDirCatalog.root == os.path.abspath(myDict.text('simDir'))):
+        choices = simDirCatalog.files("mcf")
+        # meanwhile, check the directory for new files, so that the next selection offers them
+        # (unless the previous check is still going on)
+        global catalogRefresh
+        if (catalogRefresh is None or catalogRefresh.isFinished()):
+            catalogRefresh = workerPool.submit(refreshCatalog, (simDirCatalog,), \
+                    onDone = lambda changed: showStatus(""), onError = catalogRefreshError, \
+                    onProgress = showProgress)
+        if choices:
+            dlg = wx.SingleChoiceDialog(obj, "Select MCF File", "MCF Files", choices + [browseChoice])
+            if (dlg.ShowModal() != wx.ID_OK):
+                return ''
+            if (dlg.GetStringSelection() != browseChoice):
+                return os.path.join(simDirCatalog.root, dlg.GetStringSelection())
 
     # instantiate a wx.FileDialog object
     # we search the simulation directory for *.mcf files
-    dlg = wx.FileDialog(obj,"Select MCF File", myDict['simDir'], "","*.mcf",wx.OPEN)
+    dlg = wx.FileDialog(obj,"Select MCF File", myDict.text('simDir'), "","*.mcf",wx.OPEN)
+    if dlg.ShowModal() == wx.ID_OK:
+        return dlg.GetPath()
+    return ''
+
+# select the MCF of species 'speciesNumber'; 'obj' is the wx object the MCF is selected from (the
+# parent of the dialogs), and 'display' a function displaying a string (the MCF, or that it is being read)
+# next to it, or None
+def selectSpeciesMCF(obj,speciesNumber,display=None):
 
     # once the user has selected the file, read the file to get the expected number of fragments
     # for the selected species
 
-    # an array of the display widgets
-    displayMCFVector = [s1MCFDisplay, s2MCFDisplay, s3MCFDisplay, s4MCFDisplay, s5MCFDisplay, s6MCFDisplay]
+    # the dictionary keyword argument of the MCF of this species: "MCF s1", "MCF s2", etc...
+    objKeyword = "MCF s%d" %speciesNumber
 
-    # the species number, as identified by the object that received the event
-    thisSpeciesNum = int(obj._dictKwarg[-1])
-    # the above syntax works because the MCF Buttons have the ._dictKwargs
-    # "MCF s1", "MCF s2", "MCF s3", etc... and so we are splicing the string to get either 1,2,3,... etc.
-    # which we will later use as an index to access the appropriate text display widget
+    # in a grid, the MCF is displayed in its cell, which shows the value stored in the dictionary;
+    # there is nothing else to display
+    if display is None:
+        display = lambda strToDisplay: None
 
-    # if the user clicked OK, do the following:
-    if dlg.ShowModal() == wx.ID_OK:
-        val = dlg.GetPath()
-        f = file(val)
-        nfrags_ind = ""
-        nfrags_data = ""
-        for ind, line in enumerate(f):
-            if '#' in line and 'Fragment_Info' in line:
-                nfrags_ind = ind+1
-            if nfrags_ind:
-                if ind == nfrags_ind:
-                    line_data = line.split()
-                    nfrags_data = int(line_data[0])
-        if not nfrags_data:
-            print 'Number of fragments could not be identified for this species.'
-            nfrags_data = 0
-        file_data = os.path.relpath(val, str(myDict['simDir']))
-        val = file_data
-
-        # store the expected number of fragments in the global dictionary
-        nameOfFragData = "nfrags expected s%d" %thisSpeciesNum
-
-        # store the value in the dictionary
-        myDict[nameOfFragData] = nfrags_data
+    # an MCF selected earlier for this species, and still being read, is no longer of interest
+    cancelFileTask(objKeyword)
 
-    else:
-        val = ''
+    # the data is stored once the file has been read
+    def storeMCF(val,nfrags_data):
+        pendingFileTasks.pop(objKeyword, None)
+        showStatus("")
+
+        if val:
+            if not nfrags_data:
+                print 'Number of fragments could not be identified for this species.'
+                nfrags_data = 0
+            file_data = os.path.relpath(val, myDict.text('simDir'))
+            val = file_data
 
-    # we now have a value - whether that is the empty string, or the MCF relative file path
-    # so, display it on the appropriate text widget, and then store it in a dictionary
+            # store the expected number of fragments in the global dictionary
+            nameOfFragData = "nfrags expected s%d" %speciesNumber
+
+            # store the value in the dictionary
+            myDict[nameOfFragData] = nfrags_data
+
+        # we now have a value - whether that is the empty string, or the MCF relative file path
+        # so, display it, and then store it in a dictionary
+        if val:
+            strToDisplay = "/" + os.path.split(val)[1] + "/"
+        else:
+            strToDisplay = val
+        display(strToDisplay)
+
+        # otherwise, everything went ok and we'll put the value in the dictionary
+        if (val):
+           myDict[objKeyword] = val
+
+        if not val:
+            if (objKeyword in myDict.keys()):
+                del myDict[objKeyword]
+
+        echo(objKeyword, val)
+
+    def MCFError(error):
+        pendingFileTasks.pop(objKeyword, None)
+        showStatus("")
+        display("(could not read /%s/)" %(os.path.split(val)[1]))
+        print error
+
+    # if the user selected a file, read it on a worker thread; the display shows that it is being read
+    val = selectMCF(obj)
     if val:
-        strToDisplay = "/" + os.path.split(val)[1] + "/"
+        display("/%s/ (reading...)" %(os.path.split(val)[1]))
+        pendingFileTasks[objKeyword] = workerPool.submit(readFragmentCount, (val,), \
+                onDone = lambda nfrags_data: storeMCF(val, nfrags_data), onError = MCFError, \
+                onProgress = showProgress)
     else:
-        strToDisplay = val
+        storeMCF(val, None)
 
-    # the species number goes from 1 to 6, the python indices go from 0-5, so subtract 1 from the species number
-    # and then access the ._obj (the wxWidgets object) and use the .SetValue() method to display the string
-    displayMCFVector[thisSpeciesNum-1]._obj.SetValue(strToDisplay)
+# our custom function for what to do when a "Select MCF File" button is clicked
+def MCFButtonFunction(event):
 
-    # finally, store our data in the dictionary using the keyword argument from the button
-    objKeyword = obj._dictKwarg
+    # get the object that received the event
+    obj = event.GetEventObject();
 
     noKeywordAlert = "No dictionary keyword specified for this widget - your data isn't being stored!"
-    if (objKeyword is None):
+    if (obj._dictKwarg is None):
         raise ValueError(noKeywordAlert)
 
-    # otherwise, everything went ok and we'll put the value in the dictionary
-    if (val):
-       myDict[objKeyword] = val
-
-    if not val:
-        if (objKeyword in myDict.keys()):
-            del myDict[objKeyword]
+    # the species number, as identified by the object that received the event
+    thisSpeciesNum = int(obj._dictKwarg[len("MCF s"):])
+    # the above syntax works because the MCF Buttons have the ._dictKwargs
+    # "MCF s1", "MCF s2", "MCF s3", etc... and so we are splicing the string to get either 1,2,3,... etc.
+    # which we will later use to access the appropriate text display widget
 
-    print objKeyword, val
+    # the display widget of this species, and its .SetValue() method to display the string
+    displayWidget = moleculeFilesWidgets["s%dMCFDisplay" %thisSpeciesNum]
+    selectSpeciesMCF(obj, thisSpeciesNum, displayWidget._obj.SetValue)
 
     event.Skip()
 
 
-# bind the buttons to a specific button function (defined above)
-# bind the Nmols widgets to the default text function
-# and also, have the MCF buttons send their value to the corresponding display widget
-s1MCFButton.setFunction(MCFButtonFunction)
-s2MCFButton.setFunction(MCFButtonFunction)
-s3MCFButton.setFunction(MCFButtonFunction)
-s4MCFButton.setFunction(MCFButtonFunction)
-s5MCFButton.setFunction(MCFButtonFunction)
-s6MCFButton.setFunction(MCFButtonFunction)
-s1NmolsWidget.setFunction(defaultTextFunction)
-s2NmolsWidget.setFunction(defaultTextFunction)
-s3NmolsWidget.setFunction(defaultTextFunction)
-s4NmolsWidget.setFunction(defaultTextFunction)
-s5NmolsWidget.setFunction(defaultTextFunction)
-s6NmolsWidget.setFunction(defaultTextFunction)
+# the widgets of this panel are described in formSpec.moleculeFilesSpec: the buttons are bound to
+# MCFButtonFunction, and the Nmols widgets to the default text function.  The widgets can be looked up
+# by their id, e.g. moleculeFilesWidgets["s1MCFButton"]; above formSpec.gridThreshold species, the MCFs
+# (selected by double-clicking their cells, see selectSpeciesMCF) and the numbers of molecules are
+# entered in moleculeFilesWidgets["moleculeFilesGrid"]
+moleculeFilesPlan = formSpec.compilePlan(formSpec.moleculeFilesSpec, maxNumberOfSpecies)
+moleculeFilesWidgets = buildFromPlan(moleculeFilesPlan)
 
 
 ######################################################################################
@@ -2596,8 +3150,8 @@ ffOptionsPrepared = ["","Yes","No"]
 areFragFilesPreparedChoice = Widget(PanelFourFragmentFiles, widgetType = "choice", \
         name = "", pos = (1,3), choices = ffOptionsPrepared)
 
-# they may select the fragment files for species 1 thru 6
-ffSpeciesOptions = ["","1","2","3","4","5","6"]
+# they may select the fragment files for any of the species the user may choose
+ffSpeciesOptions = [""] + ["%s" %(i+1) for i in range(maxNumberOfSpecies)]
 
 # our label prompting the user to select a species
 P4SelectASpecies = Widget(PanelFourFragmentFiles, widgetType = "static", \
@@ -2620,6 +3174,158 @@ P4FragFileDisplay = Widget(PanelFourFragmentFiles, widgetType = "text", \
 # assign dictionary keyword arguments for the assorted choices and buttons -
 # at least, those that store data..
 
+# the fragment libraries are validated on these worker threads, several files at once; the results are
+# handed back to the GUI thread, where they are collected by a FragmentSelection
+fragmentPool = WorkerPool(threads = 8, deliver = wx.CallAfter)
+
+# species number -> the report on the fragment files selected for it, as displayed in P4FragFileDisplay
+fragmentReports = {}
+
+# runs on a worker thread: validate a single fragment library
+def validateFragmentFileTask(task,path):
+    return fragmentFiles.validateFragmentFile(path)
+
+# runs on a worker thread: the number of fragments declared by the MCF 'path' of a species, or None if
+# no MCF has been selected for it
+def expectedFragmentsTask(task,path):
+    if not path:
+        return None
+    return mcfParser.fragmentCount(path)
+
+# the fragment files selected for one species, while they are being validated
+class FragmentSelection:
+    def __init__(self,speciesNumber,paths):
+        self._speciesNumber = speciesNumber
+        self._paths = paths
+        self._results = [None] * len(paths)
+        self._expected = None
+        # the files, and the MCF of the species
+        self._remaining = len(paths) + 1
+        self._tasks = []
+
+    def start(self):
+        # the number of fragments is read from the MCF of the species as it is now, so that the count
+        # is checked against the MCF that will be written to the input file
+        mcf = myDict.text("MCF s%d" %self._speciesNumber)
+        if mcf:
+            mcf = os.path.join(myDict.text('simDir'), mcf)
+        self._tasks.append(fragmentPool.submit(expectedFragmentsTask, (mcf,), \
+                onDone = self.onCounted, onError = self.onCountFailed))
+        for index, path in enumerate(self._paths):
+            self._tasks.append(fragmentPool.submit(validateFragmentFileTask, (path,), \
+                    onDone = lambda result, index = index: self.onValidated(index, result), \
+                    onError = lambda error, index = index: self.onFailed(index, error)))
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def onValidated(self,index,result):
+        self._results[index] = result
+        self.taskFinished()
+
+    def onCounted(self,expected):
+        self._expected = expected
+        self.taskFinished()
+
+    # the MCF could not be read; the number of fragments is not checked
+    def onCountFailed(self,error):
+        print error
+        self.taskFinished()
+
+    def taskFinished(self):
+        self._remaining -= 1
+        if self._remaining:
+            showFragmentReport(self._speciesNumber, "Species %d: validated %d of %d fragment files..." \
+                    %(self._speciesNumber, len([result for result in self._results if result]), len(self._paths)))
+            return
+        self.finish()
+
+    # validating the file at 'index' raised 'error'; the file counts as invalid
+    def onFailed(self,index,error):
+        self.onValidated(index, fragmentFiles.FragmentFileResult(self._paths[index], False, 0, \
+                "could not be validated (%s)" %(error)))
+
+    # all files have been validated; store the selection if it is complete and valid, and report on it
+    def finish(self):
+        pendingFragmentSelections.pop(self._speciesNumber, None)
+        objKeyword = "fragment files s%d" %self._speciesNumber
+        expected = self._expected
+        messages = fragmentFiles.validateSelection(self._results, expected)
+
+        lines = ["Species %d: %d fragment file(s)" %(self._speciesNumber, len(self._paths))]
+        for result in self._results:
+            lines.append("  /%s/  %s" %(os.path.basename(result.path), \
+                    result.valid and ("%d atom lines" %result.numberOfAtoms) or "INVALID"))
+        if expected is None:
+            lines.append("No MCF has been selected for this species; the number of fragments was not checked.")
+        else:
+            lines.append("The MCF of this species declares %d fragment(s)." %(expected))
+        if messages:
+            lines.append("")
+            lines.extend(messages)
+            if (objKeyword in myDict.keys()):
+                del myDict[objKeyword]
+        else:
+            # the files are stored relative to the simulation directory, one per line
+            relativePaths = [os.path.relpath(path, myDict.text('simDir')) for path in self._paths]
+            myDict[objKeyword] = "\n".join(relativePaths)
+        showFragmentReport(self._speciesNumber, "\n".join(lines))
+        echo(objKeyword, len(self._paths), messages)
+
+# species number -> the FragmentSelection being validated for it
+pendingFragmentSelections = {}
+
+# keep the report on the fragment files of a species, and display it if that species is selected
+def showFragmentReport(speciesNumber,report):
+    fragmentReports[speciesNumber] = report
+    if (P4SelectSpeciesChoice._obj.GetStringSelection() == str(speciesNumber)):
+        P4FragFileDisplay._obj.ChangeValue(report)
+
+# the species selected on the Fragment Files page, or None
+def selectedFragmentSpecies():
+    selection = P4SelectSpeciesChoice._obj.GetStringSelection()
+    if not selection:
+        return None
+    return int(selection)
+
+# a species was selected: display the report on its fragment files
+def fragmentSpeciesFunction(event):
+    speciesNumber = selectedFragmentSpecies()
+    P4FragFileDisplay._obj.ChangeValue(fragmentReports.get(speciesNumber, ""))
+    event.Skip()
+
+# select the fragment files of the selected species; they are validated in parallel on the fragment pool
+def fragmentFilesFunction(event):
+    obj = event.GetEventObject()
+    speciesNumber = selectedFragmentSpecies()
+    if speciesNumber is None:
+        P4FragFileDisplay._obj.ChangeValue("Please select a species first.")
+        event.Skip()
+        return
+
+    dlg = wx.FileDialog(obj, "Select Fragment Files for Species %d" %speciesNumber, myDict.text('simDir'), \
+            "", "*.dat", wx.OPEN | wx.MULTIPLE)
+    if (dlg.ShowModal() != wx.ID_OK or not dlg.GetPaths()):
+        event.Skip()
+        return
+
+    # the files selected before for this species, if they are still being validated, are no longer of interest
+    previous = pendingFragmentSelections.pop(speciesNumber, None)
+    if previous is not None:
+        previous.cancel()
+
+    # fragment libraries are numbered in the input file in this order: frag_2.dat goes before frag_10.dat
+    selection = FragmentSelection(speciesNumber, sorted(dlg.GetPaths(), key = fragmentFiles.naturalKey))
+    pendingFragmentSelections[speciesNumber] = selection
+    showFragmentReport(speciesNumber, "Species %d: validating %d fragment files..." %(speciesNumber, \
+            len(dlg.GetPaths())))
+    selection.start()
+    event.Skip()
+
+P4SelectSpeciesChoice.setFunction(fragmentSpeciesFunction)
+P4FFButton.setFunction(fragmentFilesFunction)
+
 
 ######################################################################################
 # SECTION 4.13: Addition of widgets to PanelFourInputFile
@@ -0,0 +1,164 @@
+#********************************************************************************
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#********************************************************************************
+
+# A small pool of worker threads, for running file operations (reading MCFs, scanning directories, ...)
+# without blocking the thread of the GUI.
+#
+#       pool = WorkerPool(deliver = wx.CallAfter)
+#       task = pool.submit(function, arguments, onDone = ..., onError = ..., onProgress = ...)
+#
+# function(task, *arguments) runs on a worker thread.  It may report its progress with
+# task.progress(fraction, message), and should return early once task.isCancelled() is True.
+# Its result is handed to onDone(result), or the exception it raised to onError(exception);
+# these, and onProgress(fraction, message), are called through 'deliver': with wx.CallAfter (or
+# the headless backend's CallAfter), they run on the thread of the GUI, so they may update widgets
+# and myDict.  Without 'deliver' (e.g., in batch scripts), they run on the worker thread.
+#
+# task.cancel() cancels a task: if it has not started, it never runs; if it is running, it is asked to
+# stop; either way, none of its callbacks are called any more.
+
+import threading, Queue, atexit
+
+class Task(object):
+    def __init__(self,pool,function,arguments,onDone,onError,onProgress):
+        self._pool = pool
+        self._function = function
+        self._arguments = arguments
+        self._onDone = onDone
+        self._onError = onError
+        self._onProgress = onProgress
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def isCancelled(self):
+        return self._cancelled.is_set()
+
+    def isFinished(self):
+        return self._finished.is_set()
+
+    # report the progress of the task, from its function; 'fraction' is between 0 and 1
+    def progress(self,fraction,message=""):
+        if (self._onProgress is not None and not self.isCancelled()):
+            self._pool._deliver(self._onProgress, fraction, message)
+
+    # wait for the task to finish, and return its result (or raise its exception)
+    def result(self,timeout=None):
+        self._finished.wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def _run(self):
+        try:
+            if self.isCancelled():
+                return
+            try:
+                self._result = self._function(self, *self._arguments)
+            except Exception, exception:
+                self._exception = exception
+                if (self._onError is not None and not self.isCancelled()):
+                    self._pool._deliver(self._onDeliveredError, exception)
+                return
+            if (self._onDone is not None and not self.isCancelled()):
+                self._pool._deliver(self._onDelivered, self._result)
+        finally:
+            self._finished.set()
+
+    # the callbacks are delivered some time after the task finished; check again that it was not cancelled since
+    def _onDelivered(self,result):
+        if not self.isCancelled():
+            self._onDone(result)
+
+    def _onDeliveredError(self,exception):
+        if not self.isCancelled():
+            self._onError(exception)
+
+class WorkerPool(object):
+    def __init__(self,threads=2,deliver=None):
+        self._deliver = deliver or (lambda function, *arguments: function(*arguments))
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._numberOfThreads = threads
+        self._lock = threading.Lock()
+        self._unfinished = []
+        self._registered = False
+
+    # the threads are started by the first submit(), so that a pool costs nothing until it is used
+    def _start(self):
+        for index in range(self._numberOfThreads - len(self._threads)):
+            thread = threading.Thread(target = self._work, name = "WorkerPool-%d" %(len(self._threads)))
+            # a running task does not keep the application from exiting
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        if not self._registered:
+            atexit.register(self._exit)
+            self._registered = True
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            task._run()
+            with self._lock:
+                if task in self._unfinished:
+                    self._unfinished.remove(task)
+
+    # run function(task, *arguments) on a worker thread; returns the Task
+    def submit(self,function,arguments=(),onDone=None,onError=None,onProgress=None):
+        task = Task(self, function, tuple(arguments), onDone, onError, onProgress)
+        with self._lock:
+            self._unfinished.append(task)
+            if not self._threads:
+                self._start()
+        self._queue.put(task)
+        return task
+
+    # cancel all of the tasks that have not finished
+    def cancelAll(self):
+        with self._lock:
+            for task in self._unfinished:
+                task.cancel()
+
+    # wait until all of the tasks submitted so far have finished
+    def wait(self,timeout=None):
+        with self._lock:
+            tasks = list(self._unfinished)
+        for task in tasks:
+            task._finished.wait(timeout)
+
+    # stop the worker threads, once the tasks already submitted have finished; give up waiting for them
+    # after 'timeout' seconds (if given)
+    def shutdown(self,timeout=None):
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+        for thread in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    # when the application exits, the idle threads are stopped before the interpreter is torn down
+    # (a task still reading a file is not waited for long)
+    def _exit(self):
+        self.cancelAll()
+        self.shutdown(0.5)